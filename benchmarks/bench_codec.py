@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Encode and decode throughput of the HID++ frame codec.
+
+The ``inline`` cases are the format string packing and slicing the codec replaced, for comparison.
+"""
+
+import struct
+
+import harness
+
+from logitech_receiver import codec
+
+SHORT_PACKET = b"\x10\x01\x00\x1a\x01\x02\x03"
+LONG_PACKET = b"\x11\x01\x05\x1a" + bytes(range(16))
+
+
+def _inline_request(request_id, *params):
+    params = b"".join(struct.pack("B", p) if isinstance(p, int) else p for p in params)
+    return struct.pack("!H", request_id) + params
+
+
+def _inline_decode(data):
+    return ord(data[:1]), ord(data[1:2]), data[2:]
+
+
+CASES = {
+    "encode short": lambda: codec.encode_message(0x01, b"\x00\x1a\x01", False),
+    "encode long": lambda: codec.encode_message(0x01, b"\x05\x1a\x01\x02", True),
+    "encode request": lambda: codec.encode_request(0x051A, codec.pack_params((0x01, 0x02, 0x03))),
+    "encode mixed request": lambda: codec.encode_request(0x051A, codec.pack_params((0x01, 0x02, b"\x03"))),
+    "encode bytes request": lambda: codec.encode_request(0x051A, codec.pack_params((b"\x01\x02\x03",))),
+    "decode short": lambda: codec.decode(SHORT_PACKET),
+    "decode long": lambda: codec.decode(LONG_PACKET),
+    "inline encode long": lambda: struct.pack("!BB18s", 0x11, 0x01, b"\x05\x1a\x01\x02"),
+    "inline encode request": lambda: _inline_request(0x051A, 0x01, 0x02, 0x03),
+    "inline decode long": lambda: _inline_decode(LONG_PACKET),
+}
+
+for _name, _case in CASES.items():
+    harness.benchmark(f"codec {_name}", number=100000)(lambda case=_case: case)
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
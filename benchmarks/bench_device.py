@@ -0,0 +1,88 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Setting up receivers and devices: construction, feature discovery and settings detection and application.
+
+Each call works on fresh objects, so caches in them are cold, and pays the simulated latency for every request.
+"""
+
+import harness
+
+from logitech_receiver import hidpp20
+from logitech_receiver import receiver
+from logitech_receiver import settings
+from logitech_receiver import settings_templates
+
+from tests.logitech_receiver import test_receiver
+from tests.logitech_receiver import test_setting_templates
+
+SETUPS = test_setting_templates.simple_tests + test_setting_templates.key_tests
+
+
+def _setting_devices():
+    """One fake device per setting test in the test suite, each with the feature of its setting."""
+    return [
+        harness.fake_device(
+            responses=list(setup.responses),
+            feature=setup.test.sclass.feature,
+            offset=setup.test.offset,
+            version=setup.test.version,
+        )
+        for setup in SETUPS
+    ]
+
+
+@harness.benchmark("receiver construction", number=100)
+def receiver_construction():
+    low_level = harness.LowLevel(test_receiver.responses_unifying)
+    device_info = test_receiver.DeviceInfo("11")
+    return lambda: receiver.create_receiver(low_level, device_info, lambda *args: None)
+
+
+@harness.benchmark("device construction", number=100)
+def device_construction():
+    return harness.keyboard
+
+
+@harness.benchmark("feature discovery", number=100)
+def feature_discovery():
+    return lambda: list(hidpp20.FeaturesArray(harness.keyboard()).enumerate())
+
+
+@harness.benchmark("check_feature_settings", number=3)
+def check_feature_settings():
+    def check():
+        for dev in _setting_devices():
+            settings_templates.check_feature_settings(dev, [])
+
+    return check
+
+
+@harness.benchmark("apply_all_settings", number=3)
+def apply_all_settings():
+    devices = _setting_devices()
+    for dev in devices:
+        settings_templates.check_feature_settings(dev, dev.settings)
+
+    def apply():
+        for dev in devices:
+            settings.apply_all_settings(dev)
+
+    return apply
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
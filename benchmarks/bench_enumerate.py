@@ -0,0 +1,101 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Enumeration of receivers and devices over a synthetic set of HID nodes."""
+
+import harness
+
+from logitech_receiver import base
+from logitech_receiver import base_usb
+from logitech_receiver.common import LOGITECH_VENDOR_ID
+
+
+def _nodes():
+    """Every known receiver, every known device and some other HID devices, as hidapi would find them."""
+    nodes = [(r.get("bus_id", 0x03), r["vendor_id"], r["product_id"], None, None) for r in base_usb.KNOWN_RECEIVERS]
+    nodes += [(d.get("bus_id", 0x03), d["vendor_id"], d["product_id"], True, True) for d in base.KNOWN_DEVICE_IDS]
+    nodes += [(0x03, 0x046D, product_id, False, False) for product_id in range(0xC300, 0xC340)]  # non-HID++ Logitech
+    nodes += [(0x03, 0x1234 + n, 0x5678, False, False) for n in range(64)]  # other vendors
+    return nodes
+
+
+class _FakeHidapi:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def enumerate(self, filter_func):
+        for bus_id, vendor_id, product_id, hidpp_short, hidpp_long in self.nodes:
+            if filter_func(bus_id, vendor_id, product_id, hidpp_short, hidpp_long):
+                yield bus_id, vendor_id, product_id
+
+
+def _with_fake_hidapi(enumerate):
+    def setup():
+        base.hidapi = _FakeHidapi(_nodes())
+        return lambda: list(enumerate())
+
+    return setup
+
+
+harness.benchmark("enumerate receivers", number=100)(_with_fake_hidapi(base.receivers))
+harness.benchmark("enumerate receivers and devices", number=100)(_with_fake_hidapi(base.receivers_and_devices))
+
+
+@harness.benchmark("filter unknown product", number=10000)
+def filter_unknown():
+    return lambda: base._filter_products_of_interest(0x03, LOGITECH_VENDOR_ID, 0xC3FF, False, False)
+
+
+def _synthetic_nodes(count: int = 500):
+    """Known devices and receivers, devices in the HID++ 2.0 ranges and other devices, in turn."""
+    known = [(d["bus_id"], d["vendor_id"], d["product_id"], True, True) for d in base.KNOWN_DEVICE_IDS]
+    receivers = [(0x03, r["vendor_id"], r["product_id"], None, None) for r in base_usb.KNOWN_RECEIVERS]
+    in_ranges = [(0x03, LOGITECH_VENDOR_ID, 0xC32B + n, None, None) for n in range(0x1A)]
+    in_ranges += [(0x05, LOGITECH_VENDOR_ID, 0xB317 + n, None, None) for n in range(0x40)]
+    other = [(0x03, LOGITECH_VENDOR_ID, 0xC300 + n, False, False) for n in range(0x20)]
+    other += [(0x03, 0x1234 + n, 0x5678, False, False) for n in range(0x40)]
+    pools = (known, receivers, in_ranges, other)
+    return [pools[n % len(pools)][n // len(pools) % len(pools[n % len(pools)])] for n in range(count)]
+
+
+def _linear_filter(bus_id, vendor_id, product_id, hidpp_short=False, hidpp_long=False):
+    """Product filtering with a scan of all known devices, as before they were indexed, for comparison."""
+    record = base._filter_receivers(bus_id, vendor_id, product_id, hidpp_short, hidpp_long)
+    if record:
+        return record
+    for record in base.KNOWN_DEVICE_IDS:
+        if base._match(record, bus_id, vendor_id, product_id):
+            return record
+    if hidpp_short or hidpp_long:
+        return {"vendor_id": vendor_id, "product_id": product_id, "bus_id": bus_id, "isDevice": True}
+    elif hidpp_short is None and hidpp_long is None:
+        return base._other_device_check(bus_id, vendor_id, product_id)
+
+
+def _filter_synthetic(filter_func):
+    def setup():
+        nodes = _synthetic_nodes()
+        return lambda: [filter_func(*node) for node in nodes]
+
+    return setup
+
+
+harness.benchmark("filter 500 products", number=100)(_filter_synthetic(base._filter_products_of_interest))
+harness.benchmark("filter 500 products linear scan", number=100)(_filter_synthetic(_linear_filter))
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
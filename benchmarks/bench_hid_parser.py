@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""Finding the HID++ capabilities of report descriptors, with the full parser and with the report size scanner.
+
+The corpus is the report descriptors of the interfaces of a Unifying receiver and of a few common devices.
+"""
+
+import warnings
+
+import harness
+import hid_parser
+
+CORPUS = {
+    "receiver hidpp": bytes.fromhex(
+        "0600FF0901A101851075089506150026FF000901810009019100C0"
+        "0600FF0902A101851175089513150026FF000902810009029100C0"
+        "0600FF0904A10185207508950E150026FF000941810009419100"
+        "8521951F150026FF000942810009429100C0"
+    ),
+    "receiver keyboard": bytes.fromhex(
+        "05010906A101050719E029E71500250175019508810295017508810395057501050819012905910295017503910395067508"
+        "150026FF00050719002AFF008100C0"
+    ),
+    "receiver mouse": bytes.fromhex(
+        "05010902A1010901A100050919012903150025019503750181029505750181010501093009311581257F750895028106C0C0"
+    ),
+    "receiver consumer": bytes.fromhex("050C0901A101850375109502150126FF0219012AFF028100C0"),
+}
+
+
+def _full_parser(descriptor):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        rd = hid_parser.ReportDescriptor(descriptor)
+        return (
+            0x10 in rd.input_report_ids and int(rd.get_input_report_size(0x10)) == 6 * 8,
+            0x11 in rd.input_report_ids and int(rd.get_input_report_size(0x11)) == 19 * 8,
+        )
+
+
+def _scanner(descriptor):
+    sizes = hid_parser.report_sizes(descriptor)
+    return sizes.get(0x10) == 6 * 8, sizes.get(0x11) == 19 * 8
+
+
+def _corpus(capabilities):
+    def run():
+        for descriptor in CORPUS.values():
+            capabilities(descriptor)
+
+    return run
+
+
+harness.benchmark("hid_parser corpus full parser", number=100)(lambda: _corpus(_full_parser))
+harness.benchmark("hid_parser corpus report sizes", number=10000)(lambda: _corpus(_scanner))
+for _name, _descriptor in CORPUS.items():
+    harness.benchmark(f"hid_parser {_name} full parser", number=100)(lambda d=_descriptor: lambda: _full_parser(d))
+    harness.benchmark(f"hid_parser {_name} report sizes", number=10000)(lambda d=_descriptor: lambda: _scanner(d))
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
@@ -0,0 +1,58 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Throughput of notifications.process for the feature notifications that arrive most often."""
+
+import harness
+
+from logitech_receiver import base
+from logitech_receiver import notifications
+
+# feature indexes of the keyboard in fake_hidpp
+_REPROG_CONTROLS_V4 = 0x05
+_BATTERY_STATUS = 0x08
+
+
+def _notification(sub_id, address, data):
+    return base.make_notification(0x11, 0xFF, bytes([sub_id, address]) + data)
+
+
+def _process(*notification_list):
+    def setup():
+        dev = harness.keyboard()
+        list(dev.features.enumerate())
+
+        def process():
+            for n in notification_list:
+                notifications.process(dev, n)
+
+        return process
+
+    return setup
+
+
+_battery = _notification(_BATTERY_STATUS, 0x00, b"\x32\x00\x00" + bytes(13))
+_key_down = _notification(_REPROG_CONTROLS_V4, 0x00, b"\x00\xc4" + bytes(14))
+_key_up = _notification(_REPROG_CONTROLS_V4, 0x00, bytes(16))
+_raw_xy = _notification(_REPROG_CONTROLS_V4, 0x10, b"\x00\x05\xff\xfb" + bytes(12))
+
+harness.benchmark("notification battery", number=10000)(_process(_battery))
+harness.benchmark("notification key press and release", number=5000)(_process(_key_down, _key_up))
+harness.benchmark("notification raw xy", number=10000)(_process(_raw_xy))
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
@@ -0,0 +1,59 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Evaluation of the rules of rule-based processing for a key notification that no rule acts on."""
+
+import harness
+
+from logitech_receiver import base
+from logitech_receiver import diversion
+from logitech_receiver import special_keys
+from logitech_receiver.hidpp20_constants import FEATURE
+
+_KEYS = [str(key) for key in list(special_keys.CONTROL)[1:26]]
+
+
+def _user_rules():
+    """Fifty rules that do not match, like those of a user who set up per-key and per-feature processing."""
+    rules = [{"Rule": [{"Key": [key, "released"]}, {"KeyPress": "a"}]} for key in _KEYS]
+    rules += [{"Rule": [{"Feature": "THUMB_WHEEL"}, {"Test": "thumb_wheel_up"}, {"KeyPress": "b"}]} for _ in range(15)]
+    rules += [{"Rule": [{"Report": 0x03}, {"TestBytes": [0, 2, 0xFFFF]}, {"KeyPress": "c"}]} for _ in range(10)]
+    return diversion.Rule([*rules, diversion.built_in_rules])
+
+
+@harness.benchmark("evaluate_rules built-in", number=10000)
+def evaluate_built_in():
+    dev = harness.keyboard()
+    notification = base.make_notification(0x11, 0xFF, b"\x05\x00\x00\xc4" + bytes(12))
+    diversion.rules = diversion.built_in_rules
+    return lambda: diversion.evaluate_rules(FEATURE.REPROG_CONTROLS_V4, notification, dev)
+
+
+@harness.benchmark("evaluate_rules fifty user rules", number=2000)
+def evaluate_user_rules():
+    dev = harness.keyboard()
+    notification = base.make_notification(0x11, 0xFF, b"\x05\x00\x00\xc4" + bytes(12))
+    rules = _user_rules()
+
+    def evaluate():
+        diversion.rules = rules
+        diversion.evaluate_rules(FEATURE.REPROG_CONTROLS_V4, notification, dev)
+
+    return evaluate
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
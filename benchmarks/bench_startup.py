@@ -0,0 +1,44 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Start-up of ``solaar show`` and ``solaar config``, up to parsing their arguments, in a new interpreter."""
+
+import os
+import subprocess
+import sys
+
+import harness
+
+
+def _start(action):
+    code = f"import solaar.gtk, solaar.cli.{action}"
+    env = {**os.environ, "PYTHONPATH": os.path.join(harness.ROOT, "lib")}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)  # so that compiling is not measured
+    return lambda: subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+@harness.benchmark("start-up solaar show", number=5)
+def start_show():
+    return _start("show")
+
+
+@harness.benchmark("start-up solaar config", number=5)
+def start_config():
+    return _start("config")
+
+
+if __name__ == "__main__":
+    harness.main(modules=(__name__,))
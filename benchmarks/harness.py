@@ -0,0 +1,253 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Registration, timing and reporting of benchmarks, and fake devices with simulated latency.
+
+Benchmarks are set-up functions registered with ``@benchmark``; they return the callable to time,
+so that setting up is not measured. The fake devices answer from the response tables in
+tests/logitech_receiver/fake_hidpp.py, waiting ``latency`` seconds per request and ping
+to simulate the round trip to a wireless device.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from dataclasses import dataclass
+from struct import pack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "lib"), ROOT]
+# keep the benchmarks away from the configuration, rules and caches of the user
+os.environ["XDG_CONFIG_HOME"] = tempfile.mkdtemp(prefix="solaar-benchmarks-")
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="solaar-benchmarks-")
+
+MODULES = (
+    "bench_codec",
+    "bench_hid_parser",
+    "bench_enumerate",
+    "bench_device",
+    "bench_notifications",
+    "bench_rules",
+    "bench_startup",
+)
+
+latency = 0.0  # simulated round trip of a request, in seconds
+
+_benchmarks = {}  # name -> (set-up function, default number of calls per timing run)
+
+
+def benchmark(name: str, number: int = 1000):
+    """Register a set-up function that returns the callable to time."""
+
+    def decorator(setup):
+        _benchmarks[name] = (setup, number)
+        return setup
+
+    return decorator
+
+
+def simulate_latency():
+    if latency:
+        time.sleep(latency)
+
+
+def pipelined(answer, calls) -> list:
+    """The answers to pipelined requests, after the simulated latency once for each batch of outstanding requests."""
+    from logitech_receiver import base
+
+    replies = []
+    for position, call in enumerate(calls):
+        if position % base._PIPELINE_DEPTH == 0:
+            simulate_latency()
+        replies.append(answer(*call))
+    return replies
+
+
+def _pack_params(params) -> bytes:
+    return b"".join(pack("B", p) if isinstance(p, int) else p for p in params)
+
+
+def _index_responses(responses) -> dict:
+    index = {}
+    for r in responses:
+        index.setdefault((r.handle, r.devnumber, r.id, bytes.fromhex(r.params)), r.response)
+    return index
+
+
+class LowLevel:
+    """A low-level interface for device.Device and receiver.Receiver answering from fake_hidpp responses."""
+
+    def __init__(self, responses):
+        self.responses = _index_responses(responses)
+        self.pings = {(r.handle, r.devnumber): r.response for r in reversed(responses) if r.id == 0x0010}
+
+    def open_path(self, path):
+        return int(path, 16)
+
+    def product_information(self, usb_id: int) -> dict:
+        from logitech_receiver import base
+
+        return base.product_information(usb_id)
+
+    def find_paired_node(self, receiver_path: str, index: int, timeout: int):
+        return None
+
+    def request(self, handle, devnumber, request_id, *params, **kwargs):
+        simulate_latency()
+        return self._answer(handle, devnumber, request_id, params)
+
+    def requests(self, handle, devnumber, calls, **kwargs):
+        return pipelined(lambda request_id, *params: self._answer(handle, devnumber, request_id, params), calls)
+
+    def _answer(self, handle, devnumber, request_id, params):
+        response = self.responses.get((handle, devnumber, request_id, _pack_params(params)))
+        return bytes.fromhex(response) if isinstance(response, str) else response
+
+    def ping(self, handle, devnumber, long_message=False):
+        simulate_latency()
+        return self.pings.get((handle, devnumber))
+
+    def close(self, *args, **kwargs):
+        pass
+
+
+@dataclass
+class DeviceInfo:
+    path: str
+    product_id: str
+    vendor_id: int = 0x046D
+    hidpp_short: bool = False
+    hidpp_long: bool = True
+    bus_id: int = 0x0003  # USB
+    serial: str = "aa:aa:aa;aa"
+
+
+def keyboard(responses=None):
+    """A device.Device for the HID++ 2.0 Bluetooth keyboard in fake_hidpp, its features are not looked up yet."""
+    from logitech_receiver import device
+
+    from tests.logitech_receiver import fake_hidpp
+
+    low_level = LowLevel(responses if responses is not None else fake_hidpp.r_keyboard_2)
+    return device.Device(low_level, None, None, None, handle=0x11, device_info=DeviceInfo("11", "B350", bus_id=0x0005))
+
+
+def fake_device(**kwargs):
+    """A fake_hidpp.Device that answers without printing, after the simulated latency."""
+    from tests.logitech_receiver import fake_hidpp
+
+    class QuietDevice(fake_hidpp.Device):
+        def request(self, id, *params, no_reply=False, long_message=False, protocol=2.0):
+            simulate_latency()
+            return self._answer(id, *params)
+
+        def requests(self, calls):
+            return pipelined(self._answer, calls)
+
+        def _answer(self, id, *params):
+            if not hasattr(self, "_responses"):
+                self._responses = {}
+                for r in self.responses:
+                    self._responses.setdefault((r.id, bytes.fromhex(r.params)), r.response)
+            response = self._responses.get((id, _pack_params(params)))
+            return bytes.fromhex(response) if isinstance(response, str) else response
+
+        def ping(self, handle=None, devnumber=None, long_message=False):
+            simulate_latency()
+            return self._protocol
+
+    return QuietDevice(**kwargs)
+
+
+def _time(setup, number: int, repeat: int) -> dict:
+    target = setup()
+    timings = timeit.repeat(target, number=number, repeat=repeat)
+    best = min(timings)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_s": best,
+        "mean_s": sum(timings) / len(timings),
+        "usec_per_op": best / number * 1e6,
+        "ops_per_sec": number / best if best else None,
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(modules=MODULES, select: str | None = None, number: int | None = None, repeat: int = 5) -> dict:
+    """Import the benchmark modules and time their benchmarks, returning the results."""
+    skipped = {}
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:  # e.g., GTK is not available
+            skipped[module] = str(e)
+    results = {}
+    for name, (setup, default_number) in _benchmarks.items():
+        if select is None or select in name:
+            results[name] = _time(setup, number or default_number, repeat)
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "latency_ms": latency * 1000,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def main(modules=MODULES):
+    global latency
+    parser = argparse.ArgumentParser(description="Run Solaar benchmarks.")
+    parser.add_argument("-k", dest="select", metavar="TEXT", help="only run benchmarks with TEXT in their name")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated request round trip in milliseconds")
+    parser.add_argument("--number", type=int, help="calls per timing run, instead of each benchmark's default")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best one is reported (default 5)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("-o", "--output", metavar="FILE", help="also write the results as JSON to FILE")
+    args = parser.parse_args()
+
+    latency = args.latency / 1000
+    report = run(modules, args.select, args.number, args.repeat)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, result in report["results"].items():
+        print(f"{name:48} {result['ops_per_sec']:>14,.1f} ops/s {result['usec_per_op']:>12.3f} us/op")
+    for module, reason in report["skipped"].items():
+        print(f"skipped {module}: {reason}")
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Run the Solaar benchmarks.
+
+Run from the top of the source tree, e.g., ``python benchmarks/run.py --latency 8 -o results.json``.
+Benchmarks whose modules cannot be imported, e.g., because GTK is missing, are reported as skipped.
+"""
+
+import harness
+
+if __name__ == "__main__":
+    harness.main()
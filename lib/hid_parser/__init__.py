@@ -21,11 +21,35 @@ from typing import TextIO
 from typing import Tuple
 from typing import Union
 
-import hid_parser.data
+import hid_parser
 
 __version__ = "0.0.3"
 
 
+def __getattr__(name: str) -> Any:
+    # the usage tables take long to build and are not needed to find report sizes
+    if name == "data":
+        import hid_parser.data
+
+        return hid_parser.data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazyClassAttribute:
+    """A class attribute computed on first access, replacing itself with the value."""
+
+    def __init__(self, compute):
+        self._compute = compute
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, instance, owner):
+        value = self._compute()
+        setattr(owner, self._name, value)
+        return value
+
+
 class HIDWarning(Warning):
     pass
 
@@ -378,16 +402,18 @@ class MainItem(BaseItem):
 
 
 class VariableItem(MainItem):
-    _INCOMPATIBLE_TYPES = (
-        # array types
-        hid_parser.data.UsageTypes.SELECTOR,
-        # collection types
-        hid_parser.data.UsageTypes.NAMED_ARRAY,
-        hid_parser.data.UsageTypes.COLLECTION_APPLICATION,
-        hid_parser.data.UsageTypes.COLLECTION_LOGICAL,
-        hid_parser.data.UsageTypes.COLLECTION_PHYSICAL,
-        hid_parser.data.UsageTypes.USAGE_SWITCH,
-        hid_parser.data.UsageTypes.USAGE_MODIFIER,
+    _INCOMPATIBLE_TYPES = _LazyClassAttribute(
+        lambda: (
+            # array types
+            hid_parser.data.UsageTypes.SELECTOR,
+            # collection types
+            hid_parser.data.UsageTypes.NAMED_ARRAY,
+            hid_parser.data.UsageTypes.COLLECTION_APPLICATION,
+            hid_parser.data.UsageTypes.COLLECTION_LOGICAL,
+            hid_parser.data.UsageTypes.COLLECTION_PHYSICAL,
+            hid_parser.data.UsageTypes.USAGE_SWITCH,
+            hid_parser.data.UsageTypes.USAGE_MODIFIER,
+        )
     )
 
     def __init__(
@@ -465,26 +491,30 @@ class VariableItem(MainItem):
 
 
 class ArrayItem(MainItem):
-    _INCOMPATIBLE_TYPES = (
-        # variable types
-        hid_parser.data.UsageTypes.LINEAR_CONTROL,
-        hid_parser.data.UsageTypes.ON_OFF_CONTROL,
-        hid_parser.data.UsageTypes.MOMENTARY_CONTROL,
-        hid_parser.data.UsageTypes.ONE_SHOT_CONTROL,
-        hid_parser.data.UsageTypes.RE_TRIGGER_CONTROL,
-        hid_parser.data.UsageTypes.STATIC_VALUE,
-        hid_parser.data.UsageTypes.STATIC_FLAG,
-        hid_parser.data.UsageTypes.DYNAMIC_VALUE,
-        hid_parser.data.UsageTypes.DYNAMIC_FLAG,
-        # collection types
-        hid_parser.data.UsageTypes.NAMED_ARRAY,
-        hid_parser.data.UsageTypes.COLLECTION_APPLICATION,
-        hid_parser.data.UsageTypes.COLLECTION_LOGICAL,
-        hid_parser.data.UsageTypes.COLLECTION_PHYSICAL,
-        hid_parser.data.UsageTypes.USAGE_SWITCH,
-        hid_parser.data.UsageTypes.USAGE_MODIFIER,
+    _INCOMPATIBLE_TYPES = _LazyClassAttribute(
+        lambda: (
+            # variable types
+            hid_parser.data.UsageTypes.LINEAR_CONTROL,
+            hid_parser.data.UsageTypes.ON_OFF_CONTROL,
+            hid_parser.data.UsageTypes.MOMENTARY_CONTROL,
+            hid_parser.data.UsageTypes.ONE_SHOT_CONTROL,
+            hid_parser.data.UsageTypes.RE_TRIGGER_CONTROL,
+            hid_parser.data.UsageTypes.STATIC_VALUE,
+            hid_parser.data.UsageTypes.STATIC_FLAG,
+            hid_parser.data.UsageTypes.DYNAMIC_VALUE,
+            hid_parser.data.UsageTypes.DYNAMIC_FLAG,
+            # collection types
+            hid_parser.data.UsageTypes.NAMED_ARRAY,
+            hid_parser.data.UsageTypes.COLLECTION_APPLICATION,
+            hid_parser.data.UsageTypes.COLLECTION_LOGICAL,
+            hid_parser.data.UsageTypes.COLLECTION_PHYSICAL,
+            hid_parser.data.UsageTypes.USAGE_SWITCH,
+            hid_parser.data.UsageTypes.USAGE_MODIFIER,
+        )
+    )
+    _IGNORE_USAGE_VALUES = _LazyClassAttribute(
+        lambda: ((hid_parser.data.UsagePages.KEYBOARD_KEYPAD_PAGE, hid_parser.data.KeyboardKeypad.NO_EVENT),)
     )
-    _IGNORE_USAGE_VALUES = ((hid_parser.data.UsagePages.KEYBOARD_KEYPAD_PAGE, hid_parser.data.KeyboardKeypad.NO_EVENT),)
 
     def __init__(
         self,
@@ -582,22 +612,102 @@ class InvalidReportDescriptor(Exception):
 # report ID (None for no report ID), item list
 _ITEM_POOL = Dict[Optional[int], List[BaseItem]]
 
+# item prefixes without their size bits
+_PREFIX_INPUT = (TagMain.INPUT << 4) | (Type.MAIN << 2)
+_PREFIX_OUTPUT = (TagMain.OUTPUT << 4) | (Type.MAIN << 2)
+_PREFIX_FEATURE = (TagMain.FEATURE << 4) | (Type.MAIN << 2)
+_PREFIX_REPORT_SIZE = (TagGlobal.REPORT_SIZE << 4) | (Type.GLOBAL << 2)
+_PREFIX_REPORT_ID = (TagGlobal.REPORT_ID << 4) | (Type.GLOBAL << 2)
+_PREFIX_REPORT_COUNT = (TagGlobal.REPORT_COUNT << 4) | (Type.GLOBAL << 2)
+
+
+def report_sizes(data: Sequence[int], tag: int = TagMain.INPUT) -> Dict[Optional[int], int]:
+    """
+    Size in bits of the reports of a kind (TagMain.INPUT, OUTPUT or FEATURE) by report ID,
+    None being the ID when reports are not numbered.
+
+    This is the same as the report sizes of a ReportDescriptor, but found in a single pass over
+    the raw items that only keeps track of report IDs, sizes and counts, without building any
+    item or usage. Items that do not change report sizes are not checked.
+    """
+    kind = (tag << 4) | (Type.MAIN << 2)
+    sizes: Dict[Optional[int], int] = {}
+    report_id: Optional[int] = None
+    report_size: Optional[int] = None
+    report_count: Optional[int] = None
+    has_items = False
+    length = len(data)
+    i = 0
+    while i < length:
+        prefix = data[i]
+        size = prefix & 0b11
+        if size == 3:  # 6.2.2.2
+            size = 4
+        end = i + 1 + size
+        if end > length:
+            raise InvalidReportDescriptor(f"Invalid size: expecting >={end}, got {length}")
+        prefix &= 0b11111100
+
+        if prefix == kind:
+            if report_count is None:
+                raise InvalidReportDescriptor("Trying to append an item but no report count given")
+            if report_size is None:
+                raise InvalidReportDescriptor("Trying to append an item but no report size given")
+            if size == 0:
+                raise InvalidReportDescriptor("Invalid main item")
+            if report_count:
+                sizes[report_id] = sizes.get(report_id, 0) + report_count * report_size
+                has_items = True
+        elif prefix in (_PREFIX_INPUT, _PREFIX_OUTPUT, _PREFIX_FEATURE):
+            has_items = has_items or bool(report_count)
+        elif prefix in (_PREFIX_REPORT_SIZE, _PREFIX_REPORT_ID, _PREFIX_REPORT_COUNT):
+            if size == 0:
+                value = None
+            elif size == 1:
+                value = data[i + 1]
+            elif size == 2:
+                value = data[i + 1] | data[i + 2] << 8
+            else:
+                value = int.from_bytes(bytes(data[i + 1 : end]), byteorder="little")
+            if prefix == _PREFIX_REPORT_SIZE:
+                report_size = value
+            elif prefix == _PREFIX_REPORT_COUNT:
+                report_count = value
+            else:
+                if not report_id and has_items:
+                    raise InvalidReportDescriptor("Tried to set a report ID in a report that does not use them")
+                report_id = value
+
+        i = end
+    return sizes
+
 
 class ReportDescriptor:
     def __init__(self, data: Sequence[int]) -> None:
         self._data = data
 
-        for byte in data:
-            if byte < 0 or byte > 255:
-                raise InvalidReportDescriptor(
-                    f"A report descriptor should be represented by a list of bytes: found value {byte}"
-                )
+        if not isinstance(data, (bytes, bytearray)):
+            for byte in data:
+                if byte < 0 or byte > 255:
+                    raise InvalidReportDescriptor(
+                        f"A report descriptor should be represented by a list of bytes: found value {byte}"
+                    )
 
+        # the items are only built when first needed, see _ensure_parsed
+        self._parsed = False
         self._input: _ITEM_POOL = {}
         self._output: _ITEM_POOL = {}
         self._feature: _ITEM_POOL = {}
 
-        self._parse()
+    def _ensure_parsed(self) -> None:
+        if self._parsed:
+            return
+        try:
+            self._parse()
+        except Exception:
+            self._input, self._output, self._feature = {}, {}, {}
+            raise
+        self._parsed = True
 
     @property
     def data(self) -> Sequence[int]:
@@ -605,14 +715,17 @@ class ReportDescriptor:
 
     @property
     def input_report_ids(self) -> List[Optional[int]]:
+        self._ensure_parsed()
         return list(self._input.keys())
 
     @property
     def output_report_ids(self) -> List[Optional[int]]:
+        self._ensure_parsed()
         return list(self._output.keys())
 
     @property
     def feature_report_ids(self) -> List[Optional[int]]:
+        self._ensure_parsed()
         return list(self._feature.keys())
 
     def _get_report_size(self, items: List[BaseItem]) -> BitNumber:
@@ -625,6 +738,7 @@ class ReportDescriptor:
         return BitNumber(size)
 
     def get_input_items(self, report_id: Optional[int] = None) -> List[BaseItem]:
+        self._ensure_parsed()
         return self._input[report_id]
 
     @functools.lru_cache(maxsize=16)  # noqa
@@ -632,6 +746,7 @@ class ReportDescriptor:
         return self._get_report_size(self.get_input_items(report_id))
 
     def get_output_items(self, report_id: Optional[int] = None) -> List[BaseItem]:
+        self._ensure_parsed()
         return self._output[report_id]
 
     @functools.lru_cache(maxsize=16)  # noqa
@@ -639,6 +754,7 @@ class ReportDescriptor:
         return self._get_report_size(self.get_output_items(report_id))
 
     def get_feature_items(self, report_id: Optional[int] = None) -> List[BaseItem]:
+        self._ensure_parsed()
         return self._feature[report_id]
 
     @functools.lru_cache(maxsize=16)  # noqa
@@ -669,12 +785,15 @@ class ReportDescriptor:
             return self._parse_report_items(item_poll[data[0]], data[1:])
 
     def parse_input_report(self, data: Sequence[int]) -> Dict[Usage, UsageValue]:
+        self._ensure_parsed()
         return self._parse_report(self._input, data)
 
     def parse_output_report(self, data: Sequence[int]) -> Dict[Usage, UsageValue]:
+        self._ensure_parsed()
         return self._parse_report(self._output, data)
 
     def parse_feature_report(self, data: Sequence[int]) -> Dict[Usage, UsageValue]:
+        self._ensure_parsed()
         return self._parse_report(self._feature, data)
 
     def _iterate_raw(self) -> Iterable[Tuple[int, int, Optional[int]]]:
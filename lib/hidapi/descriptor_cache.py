@@ -0,0 +1,96 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""HID++ capabilities of report descriptors, cached in memory and in a file.
+
+Parsing a report descriptor to find out whether a device can send HID++ reports takes
+much longer than hashing it, and the same few descriptors are seen again at each enumeration
+and each hotplug, so the result is kept by a hash of the descriptor, in
+``$XDG_CACHE_HOME/solaar/report_descriptors.json``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_XDG_CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+_file_path = os.path.join(_XDG_CACHE_HOME, "solaar", "report_descriptors.json")
+
+_VERSION = 1  # change when what is derived from descriptors changes
+_MAX_ENTRIES = 512
+
+_lock = threading.Lock()
+_cache = None  # descriptor hash -> (hidpp_short, hidpp_long)
+
+
+def _key(descriptor: bytes) -> str:
+    return hashlib.blake2b(descriptor, digest_size=16).hexdigest()
+
+
+def _load() -> dict:
+    try:
+        with open(_file_path) as cache_file:
+            loaded = json.load(cache_file)
+        if loaded.get("version") == _VERSION:
+            return {key: tuple(value) for key, value in loaded["descriptors"].items()}
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.info("ignoring report descriptor cache %s: %s", _file_path, e)
+    return {}
+
+
+def _save(cache: dict):
+    try:
+        directory = os.path.dirname(_file_path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".report_descriptors.", delete=False) as cache_file:
+            json.dump({"version": _VERSION, "descriptors": cache}, cache_file)
+        os.replace(cache_file.name, _file_path)
+    except Exception as e:
+        logger.info("could not save report descriptor cache %s: %s", _file_path, e)
+
+
+def hidpp_capabilities(descriptor: bytes, parse: Callable[[bytes], tuple[bool, bool]]) -> tuple[bool, bool]:
+    """Whether the descriptor has HID++ short and long input reports, from the cache or else from parse(descriptor).
+
+    Exceptions from parse are passed on and nothing is cached for the descriptor.
+    """
+    global _cache
+    key = _key(descriptor)
+    with _lock:
+        if _cache is None:
+            _cache = _load()
+        capabilities = _cache.get(key)
+    if capabilities is not None:
+        return capabilities
+
+    capabilities = tuple(parse(descriptor))
+    with _lock:
+        _cache[key] = capabilities
+        while len(_cache) > _MAX_ENTRIES:
+            del _cache[next(iter(_cache))]
+        _save(_cache)
+    return capabilities
@@ -28,6 +28,7 @@ from __future__ import annotations
 import atexit
 import ctypes
 import logging
+import os
 import platform
 import typing
 
@@ -36,6 +37,7 @@ from time import sleep
 from typing import Any
 from typing import Callable
 
+from hidapi import hidraw_watch
 from hidapi.common import DeviceInfo
 
 if typing.TYPE_CHECKING:
@@ -51,6 +53,7 @@ ACTION_REMOVE = "remove"
 
 # Global handle to hidapi
 _hidapi = None
+_library_name = None  # the name of the hidapi binary that was loaded
 
 # hidapi binary names for various platforms
 _library_paths = (
@@ -68,12 +71,16 @@ _library_paths = (
 for lib in _library_paths:
     try:
         _hidapi = ctypes.cdll.LoadLibrary(lib)
+        _library_name = lib
         break
     except OSError:
         pass
 else:
     raise ImportError(f"Unable to load hidapi library, tried: {' '.join(_library_paths)}")
 
+# hidraw nodes can be watched instead of polling for devices
+_hidraw_backend = platform.system() == "Linux" and "hidraw" in _library_name
+
 
 # Retrieve version of hdiapi library
 class _cHidApiVersion(ctypes.Structure):
@@ -200,8 +207,19 @@ def _enumerate_devices():
     return unique_devices
 
 
+def _device_key(device):
+    return tuple(device.items())
+
+
 # Use a separate thread to check if devices have been removed or connected
 class _DeviceMonitor(Thread):
+    """Watch for HID devices being added or removed.
+
+    With the hidraw backend of hidapi on Linux the hidraw nodes in /dev are watched and
+    devices are only enumerated when a node changes, otherwise they are enumerated every
+    polling_delay seconds.
+    """
+
     def __init__(self, device_callback, polling_delay=5.0):
         self.device_callback = device_callback
         self.polling_delay = polling_delay
@@ -210,20 +228,38 @@ class _DeviceMonitor(Thread):
         super().__init__(daemon=True)
 
     def run(self):
+        watcher = None
+        if _hidraw_backend:
+            try:
+                watcher = hidraw_watch.HidrawWatcher()
+            except OSError as e:
+                logger.warning("cannot watch hidraw nodes, polling for HID devices instead: %s", e)
+
         # Populate initial set of devices so startup doesn't cause any callbacks
-        self.prev_devices = {tuple(dev.items()): dev for dev in _enumerate_devices()}
+        self.prev_devices = {_device_key(dev): dev for dev in _enumerate_devices()}
 
+        if watcher:
+            while True:
+                self._update(watcher.wait())
         # Continously enumerate devices and raise callback for changes
         while True:
-            current_devices = {tuple(dev.items()): dev for dev in _enumerate_devices()}
-            for key, device in self.prev_devices.items():
-                if key not in current_devices:
-                    self.device_callback(ACTION_REMOVE, device)
-            for key, device in current_devices.items():
-                if key not in self.prev_devices:
-                    self.device_callback(ACTION_ADD, device)
-            self.prev_devices = current_devices
             sleep(self.polling_delay)
+            self._update()
+
+    def _update(self, paths=None):
+        """Raise callbacks for the devices that changed, among those at paths if given."""
+        if paths is None:
+            current_devices = {_device_key(dev): dev for dev in _enumerate_devices()}
+        else:
+            paths = {os.fsencode(path) for path in paths}
+            current_devices = {key: dev for key, dev in self.prev_devices.items() if dev["path"] not in paths}
+            if any(os.path.exists(path) for path in paths):
+                current_devices.update((_device_key(dev), dev) for dev in _enumerate_devices() if dev["path"] in paths)
+        for key in self.prev_devices.keys() - current_devices.keys():
+            self.device_callback(ACTION_REMOVE, self.prev_devices[key])
+        for key in current_devices.keys() - self.prev_devices.keys():
+            self.device_callback(ACTION_ADD, current_devices[key])
+        self.prev_devices = current_devices
 
 
 def _match(
@@ -479,6 +515,28 @@ def read(device_handle, bytes_count, timeout_ms=None):
     return data.raw[:bytes_read]
 
 
+def read_into(device_handle, buffer, timeout_ms=None):
+    """Read an Input report from a HID device into a preallocated buffer.
+
+    :param device_handle: a device handle returned by open() or open_path().
+    :param buffer: a writable buffer (e.g., a bytearray or memoryview) at least as large as a report.
+    :param timeout_ms: as for read().
+
+    :returns: the number of bytes read, 0 if a timeout was reached.
+    """
+    assert device_handle
+
+    data = (ctypes.c_char * len(buffer)).from_buffer(buffer)
+    if timeout_ms is None or timeout_ms < 0:
+        bytes_read = _hidapi.hid_read(device_handle, data, len(buffer))
+    else:
+        bytes_read = _hidapi.hid_read_timeout(device_handle, data, len(buffer), timeout_ms)
+
+    if bytes_read < 0:
+        raise HIDError(_hidapi.hid_error(device_handle))
+    return bytes_read
+
+
 def _get_input_report(device_handle, report_id, size):
     assert device_handle
     data = ctypes.create_string_buffer(size)
@@ -0,0 +1,105 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Changes of hidraw device nodes, from inotify on the directory they are in.
+
+This lets a HID backend without udev find out when a HID device is added or removed
+without enumerating all HID devices again and again.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+
+from select import select
+
+logger = logging.getLogger(__name__)
+
+_IN_ATTRIB = 0x00000004  # permissions changed, e.g., by udev rules after the node is created
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")  # watch descriptor, mask, cookie, length of the name that follows
+
+SETTLE_DELAY = 0.5  # changes of nodes are reported once there has been no change for this long, in seconds
+
+_libc = None
+
+
+def _inotify():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+
+class HidrawWatcher:
+    """Watch a directory for hidraw nodes being created, removed or made accessible.
+
+    Raises OSError when inotify is not available.
+    """
+
+    def __init__(self, directory: str = "/dev", prefix: str = "hidraw"):
+        self.directory = directory
+        self.prefix = prefix
+        libc = _inotify()
+        self._fd = libc.inotify_init1(_IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_CREATE | _IN_DELETE | _IN_ATTRIB) < 0:
+            code = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(code, f"cannot watch {directory}")
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def _read(self, changed: set):
+        data = os.read(self._fd, 4096)
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if name.startswith(self.prefix):
+                changed.add(os.path.join(self.directory, name))
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """The paths of the nodes that changed, once they have settled, or an empty set after timeout seconds."""
+        changed = set()
+        while not changed:
+            if not select([self._fd], [], [], timeout)[0]:
+                return changed
+            self._read(changed)
+        while select([self._fd], [], [], SETTLE_DELAY)[0]:
+            self._read(changed)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
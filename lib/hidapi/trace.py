@@ -0,0 +1,363 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Recording and replaying of HID traffic.
+
+A Recorder wraps a backend such as udev_impl and writes every report read or written,
+and the results of enumeration, to a compact binary trace with monotonic timestamps.
+A Replay implements the same functions from such a trace, so a captured session can be
+run again without the hardware, either in real time or as fast as possible.
+
+The trace starts with a magic line, followed by records of a fixed header
+(seconds since the start of the trace, record kind, handle slot, payload length)
+and the payload: the report for reads and writes, the path for opens,
+and JSON for enumeration and other calls.
+"""
+
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import errno
+import heapq
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+
+from collections import deque
+from select import select
+from time import monotonic
+from typing import Any
+from typing import Callable
+
+from hidapi.common import DeviceInfo
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SOLAAR-HID-TRACE 1\n"
+
+_RECORD = struct.Struct("<dBHH")  # timestamp, kind, slot, payload length
+
+OPEN = 1
+CLOSE = 2
+WRITE = 3
+READ = 4
+CALL = 5
+
+
+def _wait_readable(device_handle, timeout_ms):
+    timeout = None if timeout_ms is None or timeout_ms < 0 else timeout_ms / 1000.0
+    rlist, wlist, xlist = select([device_handle], [], [device_handle], timeout)
+    if xlist:
+        raise OSError(errno.EIO, f"exception on file descriptor {int(device_handle)}")
+    return bool(rlist)
+
+
+class Recorder:
+    """Passes all calls on to a HID backend, writing the traffic to a trace file.
+
+    Functions that are not traced, like ``get_serial()``, are passed on unchanged.
+    """
+
+    def __init__(self, backend, path: str):
+        self._backend = backend
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._start = monotonic()
+        self._slots = {}  # handle -> slot
+        self._next_slot = 0
+        atexit.register(self.close_trace)
+
+    def _record(self, kind: int, slot: int, payload: bytes):
+        with self._lock:
+            if self._file is not None:
+                self._file.write(_RECORD.pack(monotonic() - self._start, kind, slot, len(payload)))
+                self._file.write(payload)
+
+    def _record_call(self, call: str, args: list, result: Any):
+        self._record(CALL, 0, json.dumps({"call": call, "args": args, "result": result}).encode())
+
+    def _opened(self, key: str, handle):
+        if handle is not None:
+            with self._lock:
+                slot = self._slots[handle] = self._next_slot
+                self._next_slot += 1
+            self._record(OPEN, slot, key.encode())
+        return handle
+
+    def close_trace(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def enumerate(self, filter_func):
+        result = list(self._backend.enumerate(filter_func))
+        self._record_call("enumerate", [], [dataclasses.asdict(device_info) for device_info in result])
+        return iter(result)
+
+    def find_paired_node(self, receiver_path: str, index: int, timeout: int):
+        result = self._backend.find_paired_node(receiver_path, index, timeout)
+        self._record_call("find_paired_node", [receiver_path, index], result)
+        return result
+
+    def find_paired_node_wpid(self, receiver_path: str, index: int):
+        result = self._backend.find_paired_node_wpid(receiver_path, index)
+        self._record_call("find_paired_node_wpid", [receiver_path, index], result)
+        return result
+
+    def monitor_glib(self, glib, callback: Callable, filter_func: Callable):
+        return self._backend.monitor_glib(glib, callback, filter_func)
+
+    def open(self, vendor_id, product_id, serial=None):
+        return self._opened(
+            f"usb:{vendor_id:04X}:{product_id:04X}:{serial}", self._backend.open(vendor_id, product_id, serial)
+        )
+
+    def open_path(self, device_path):
+        return self._opened(device_path, self._backend.open_path(device_path))
+
+    def close(self, device_handle):
+        slot = self._slots.pop(device_handle, None)
+        if slot is not None:
+            self._record(CLOSE, slot, b"")
+        return self._backend.close(device_handle)
+
+    def write(self, device_handle, data):
+        self._record(WRITE, self._slots.get(device_handle, 0xFFFF), data)
+        return self._backend.write(device_handle, data)
+
+    def read(self, device_handle, bytes_count, timeout_ms=-1):
+        data = self._backend.read(device_handle, bytes_count, timeout_ms)
+        if data:
+            self._record(READ, self._slots.get(device_handle, 0xFFFF), data)
+        return data
+
+    def read_into(self, device_handle, buffer, timeout_ms=-1):
+        count = self._backend.read_into(device_handle, buffer, timeout_ms)
+        if count:
+            self._record(READ, self._slots.get(device_handle, 0xFFFF), bytes(buffer[:count]))
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+
+@dataclasses.dataclass
+class TraceRecord:
+    timestamp: float
+    kind: int
+    slot: int
+    payload: bytes
+
+
+def load(path: str) -> list[TraceRecord]:
+    """Read all records of a trace file."""
+    with open(path, "rb") as trace_file:
+        data = trace_file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a HID trace")
+    records = []
+    offset = len(MAGIC)
+    while offset + _RECORD.size <= len(data):
+        timestamp, kind, slot, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        records.append(TraceRecord(timestamp, kind, slot, data[offset : offset + length]))
+        offset += length
+    return records
+
+
+class Replay:
+    """A HID backend that answers from a trace instead of real devices.
+
+    Each opened handle is one end of a socket pair, so it can be waited on with select or epoll
+    like a hidraw file descriptor. A report read in the trace is made available once the writes
+    recorded before it have been made, either right away or, in real time mode, after the same
+    delay as in the trace.
+    """
+
+    def __init__(self, path: str, realtime: bool = False):
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        self._calls = {}  # call name -> list of (args, result)
+        self._opens = {}  # open key -> slots opened with it, in order
+        self._writes = []  # (timestamp, data) of all writes, in order
+        self._reads = []  # (writes before, timestamp, slot, data) of all reads, in order
+        for record in load(path):
+            if record.kind == OPEN:
+                self._opens.setdefault(record.payload.decode(), deque()).append(record.slot)
+            elif record.kind == WRITE:
+                self._writes.append((record.timestamp, record.payload))
+            elif record.kind == READ:
+                self._reads.append((len(self._writes), record.timestamp, record.slot, record.payload))
+            elif record.kind == CALL:
+                call = json.loads(record.payload)
+                self._calls.setdefault(call["call"], []).append((call["args"], call["result"]))
+        self._writes_done = 0
+        self._read_cursor = 0
+        self._anchor = (monotonic(), 0.0)  # replay time and trace time of the last write
+        self._sockets = {}  # slot -> (handle socket, feeding socket)
+        self._handles = {}  # handle -> slot
+        self._waiting = {}  # slot -> reports released before the slot was opened
+        self._closed = set()
+        self._substitutions = {}  # (devnumber, sub ID, recorded software ID byte) -> replayed software ID byte
+        self._due = []  # heap of (due time, sequence, slot, data), in real time mode
+        self._due_changed = threading.Condition(self._lock)
+        if realtime:
+            threading.Thread(target=self._feed_due, name=self.__class__.__name__, daemon=True).start()
+
+    def enumerate(self, filter_func=None):
+        calls = self._calls.get("enumerate")
+        if calls:
+            for device_info in calls[0][1]:
+                yield DeviceInfo(**device_info)
+
+    def _recorded_call(self, call: str, args: list):
+        for recorded_args, result in self._calls.get(call, ()):
+            if recorded_args == args:
+                return result
+
+    def find_paired_node(self, receiver_path: str, index: int, timeout: int):
+        return self._recorded_call("find_paired_node", [receiver_path, index])
+
+    def find_paired_node_wpid(self, receiver_path: str, index: int):
+        return self._recorded_call("find_paired_node_wpid", [receiver_path, index])
+
+    def monitor_glib(self, glib, callback: Callable, filter_func: Callable):
+        pass  # a trace has no hotplug events
+
+    def open(self, vendor_id, product_id, serial=None):
+        return self._open(f"usb:{vendor_id:04X}:{product_id:04X}:{serial}")
+
+    def open_path(self, device_path):
+        return self._open(device_path)
+
+    def _open(self, key: str):
+        with self._lock:
+            slots = self._opens.get(key)
+            if not slots:
+                raise OSError(errno.ENOENT, f"{key} was not opened in the trace")
+            slot = slots.popleft()
+            handle_socket, feeding_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            feeding_socket.setblocking(False)
+            handle = handle_socket.fileno()
+            self._sockets[slot] = (handle_socket, feeding_socket)
+            self._handles[handle] = slot
+            for data in self._waiting.pop(slot, ()):
+                feeding_socket.send(data)
+            self._release()
+        return handle
+
+    def close(self, device_handle):
+        with self._lock:
+            slot = self._handles.pop(device_handle)
+            self._closed.add(slot)
+            for s in self._sockets.pop(slot):
+                s.close()
+
+    def write(self, device_handle, data):
+        with self._lock:
+            if device_handle not in self._handles:
+                raise OSError(errno.EBADF, f"handle {device_handle} is not open")
+            if self._writes_done < len(self._writes):
+                timestamp, expected = self._writes[self._writes_done]
+                if expected != data:
+                    self._substitute(expected, data)
+                self._anchor = (monotonic(), timestamp)
+            self._writes_done += 1
+            self._release()
+
+    def _substitute(self, expected: bytes, data: bytes):
+        """Remember a differing software ID, to use it in the replies to this request."""
+        if (
+            len(expected) == len(data) > 4
+            and expected[:3] == data[:3]
+            and expected[3] & 0xF0 == data[3] & 0xF0
+            and expected[4:] == data[4:]
+        ):
+            self._substitutions[(data[1], data[2], expected[3])] = data[3]
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("replay write %s differs from trace %s", data.hex(), expected.hex())
+
+    def _patch(self, data: bytes) -> bytes:
+        if len(data) > 4 and data[0] in (0x10, 0x11):
+            index = 3 if data[2] in (0x8F, 0xFF) else 2  # error replies repeat the request after their sub ID
+            if len(data) > index + 1:
+                sw_id = self._substitutions.get((data[1], data[index], data[index + 1]))
+                if sw_id is not None:
+                    return data[: index + 1] + bytes((sw_id,)) + data[index + 2 :]
+        return data
+
+    def _release(self):
+        """Make available all reports recorded before the next write, called with the lock held."""
+        replay_time, trace_time = self._anchor
+        while self._read_cursor < len(self._reads):
+            writes_before, timestamp, slot, data = self._reads[self._read_cursor]
+            if writes_before > self._writes_done:
+                break
+            self._read_cursor += 1
+            data = self._patch(data)
+            if self.realtime:
+                heapq.heappush(self._due, (replay_time + timestamp - trace_time, self._read_cursor, slot, data))
+                self._due_changed.notify()
+            else:
+                self._deliver(slot, data)
+
+    def _deliver(self, slot: int, data: bytes):
+        sockets = self._sockets.get(slot)
+        if sockets is not None:
+            try:
+                sockets[1].send(data)
+            except BlockingIOError:  # nobody is reading, drop the report like a full hidraw buffer would
+                logger.debug("replay dropped report %s", data.hex())
+        elif slot not in self._closed:
+            self._waiting.setdefault(slot, []).append(data)
+
+    def _feed_due(self):
+        with self._lock:
+            while True:
+                if not self._due:
+                    self._due_changed.wait()
+                    continue
+                delay = self._due[0][0] - monotonic()
+                if delay > 0:
+                    self._due_changed.wait(delay)
+                    continue
+                _due, _sequence, slot, data = heapq.heappop(self._due)
+                self._deliver(slot, data)
+
+    def read(self, device_handle, bytes_count, timeout_ms=-1):
+        if _wait_readable(device_handle, timeout_ms):
+            return os.read(device_handle, bytes_count)
+        return b""
+
+    def read_into(self, device_handle, buffer, timeout_ms=-1):
+        if _wait_readable(device_handle, timeout_ms):
+            return os.readv(device_handle, [buffer])
+        return 0
+
+    def get_manufacturer(self, device_handle):
+        return None
+
+    def get_product(self, device_handle):
+        return None
+
+    def get_serial(self, device_handle):
+        return None
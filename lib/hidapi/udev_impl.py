@@ -28,8 +28,8 @@ from __future__ import annotations
 import errno
 import logging
 import os
+import threading
 import typing
-import warnings
 
 
 # the tuple object we'll expose when enumerating devices
@@ -40,6 +40,7 @@ from typing import Callable
 
 import pyudev
 
+from hidapi import descriptor_cache
 from hidapi.common import DeviceInfo
 
 if typing.TYPE_CHECKING:
@@ -79,6 +80,18 @@ def exit():
     return True
 
 
+def _hidpp_capabilities(descriptor: bytes) -> tuple[bool, bool]:
+    """Whether a report descriptor has HID++ short and long input reports."""
+    from hid_parser import report_sizes
+
+    sizes = report_sizes(descriptor)
+    hidpp_short = sizes.get(0x10) == 6 * 8
+    # and _Usage(0xFF00, 0x0001) in rd.get_input_items(0x10)[0].usages  # be more permissive
+    hidpp_long = sizes.get(0x11) == 19 * 8
+    # and _Usage(0xFF00, 0x0002) in rd.get_input_items(0x11)[0].usages  # be more permissive
+    return hidpp_short, hidpp_long
+
+
 def _match(action: str, device, filter_func: typing.Callable[[int, int, int, bool, bool], dict[str, typing.Any]]):
     """
 
@@ -100,18 +113,9 @@ def _match(action: str, device, filter_func: typing.Callable[[int, int, int, boo
         return  # these are devices connected through a receiver so don't pick them up here
 
     try:  # if report descriptor does not indicate HID++ capabilities then this device is not of interest to Solaar
-        from hid_parser import ReportDescriptor
-
-        hidpp_short = hidpp_long = False
         devfile = "/sys" + hid_device.properties.get("DEVPATH") + "/report_descriptor"
         with fileopen(devfile, "rb") as fd:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                rd = ReportDescriptor(fd.read())
-            hidpp_short = 0x10 in rd.input_report_ids and 6 * 8 == int(rd.get_input_report_size(0x10))
-            # and _Usage(0xFF00, 0x0001) in rd.get_input_items(0x10)[0].usages  # be more permissive
-            hidpp_long = 0x11 in rd.input_report_ids and 19 * 8 == int(rd.get_input_report_size(0x11))
-            # and _Usage(0xFF00, 0x0002) in rd.get_input_items(0x11)[0].usages  # be more permissive
+            hidpp_short, hidpp_long = descriptor_cache.hidpp_capabilities(fd.read(), _hidpp_capabilities)
         if not hidpp_short and not hidpp_long:
             return
     except Exception as e:  # if can't process report descriptor fall back to old scheme
@@ -189,45 +193,103 @@ def _match(action: str, device, filter_func: typing.Callable[[int, int, int, boo
         return d_info
 
 
+# How often to rescan for a paired node that has not shown up, in case udev events are not being monitored
+_RESCAN_INTERVAL = 0.25  # in seconds
+
+
+class _PhysIndex:
+    """The hidraw nodes by the HID_PHYS of their HID device, kept up to date by the udev monitor.
+
+    Paired devices have the HID_PHYS of their receiver followed by ``:`` and their device number.
+    Looking for a node that is not there yet waits for udev events, rescanning now and then
+    in case one was missed. Without a udev monitor every lookup starts with a rescan.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._by_phys = {}  # HID_PHYS -> (device node, HID_ID)
+        self._by_node = {}  # device node -> HID_PHYS
+        self._scanned = False
+        self.monitored = False  # whether udev events are being followed
+
+    def _add(self, device):
+        hid = device.find_parent("hid")
+        phys = hid.get("HID_PHYS") if hid is not None else None
+        node = device.device_node
+        if phys and node:
+            self._by_phys[phys] = (node, hid.get("HID_ID"))
+            self._by_node[node] = phys
+
+    def _scan(self):
+        self._by_phys.clear()
+        self._by_node.clear()
+        for device in pyudev.Context().list_devices(subsystem="hidraw"):
+            self._add(device)
+        self._scanned = True
+
+    def start_monitoring(self):
+        with self._changed:
+            self.monitored = True
+            self._scanned = False  # to catch up on what changed before the monitor started
+
+    def update(self, action: str, device):
+        """Follow a hidraw udev event."""
+        with self._changed:
+            if action == ACTION_ADD:
+                self._add(device)
+            elif action == ACTION_REMOVE:
+                phys = self._by_node.pop(device.device_node, None)
+                if phys is not None and self._by_phys.get(phys, (None,))[0] == device.device_node:
+                    del self._by_phys[phys]
+            self._changed.notify_all()
+
+    def phys(self, node: str) -> str | None:
+        with self._changed:
+            if not self._scanned:
+                self._scan()
+            phys = self._by_node.get(node)
+        if phys is None:  # e.g. not a hidraw node
+            phys = pyudev.Devices.from_device_file(pyudev.Context(), node).find_parent("hid").get("HID_PHYS")
+        return phys
+
+    def find(self, phys: str, timeout: float = 0):
+        """The node and HID_ID of the HID device with this HID_PHYS, waiting up to timeout seconds for it to appear."""
+        deadline = time() + timeout
+        with self._changed:
+            if not self._scanned or not self.monitored:
+                self._scan()
+            while True:
+                found = self._by_phys.get(phys)
+                remaining = deadline - time()
+                if found or remaining <= 0:
+                    return found
+                if not self._changed.wait(min(remaining, _RESCAN_INTERVAL)):
+                    self._scan()
+
+
+_phys_index = _PhysIndex()
+
+
 def find_paired_node(receiver_path: str, index: int, timeout: int):
     """Find the node of a device paired with a receiver"""
-    context = pyudev.Context()
-    receiver_phys = pyudev.Devices.from_device_file(context, receiver_path).find_parent("hid").get("HID_PHYS")
-
+    receiver_phys = _phys_index.phys(receiver_path)
     if not receiver_phys:
         return None
 
-    phys = f"{receiver_phys}:{index}"  # noqa: E231
-    timeout += time()
-    delta = time()
-    while delta < timeout:
-        for dev in context.list_devices(subsystem="hidraw"):
-            dev_phys = dev.find_parent("hid").get("HID_PHYS")
-            if dev_phys and dev_phys == phys:
-                return dev.device_node
-        delta = time()
-
-    return None
+    found = _phys_index.find(f"{receiver_phys}:{index}", timeout)  # noqa: E231
+    return found[0] if found else None
 
 
 def find_paired_node_wpid(receiver_path: str, index: int):
     """Find the node of a device paired with a receiver, get wpid from udev"""
-    context = pyudev.Context()
-    receiver_phys = pyudev.Devices.from_device_file(context, receiver_path).find_parent("hid").get("HID_PHYS")
-
+    receiver_phys = _phys_index.phys(receiver_path)
     if not receiver_phys:
         return None
 
-    phys = f"{receiver_phys}:{index}"  # noqa: E231
-    for dev in context.list_devices(subsystem="hidraw"):
-        dev_phys = dev.find_parent("hid").get("HID_PHYS")
-        if dev_phys and dev_phys == phys:
-            # get hid id like 0003:0000046D:00000065
-            hid_id = dev.find_parent("hid").get("HID_ID")
-            # get wpid - last 4 symbols
-            udev_wpid = hid_id[-4:]
-            return udev_wpid
-
+    found = _phys_index.find(f"{receiver_phys}:{index}")  # noqa: E231
+    if found and found[1]:
+        # hid id like 0003:0000046D:00000065, the wpid is its last 4 symbols
+        return found[1][-4:]
     return None
 
 
@@ -249,6 +311,7 @@ def monitor_glib(glib: GLib, callback: Callable, filter_func: Callable):
             if event:
                 action, device = event
                 # print ("***", action, device)
+                _phys_index.update(action, device)
                 if action == ACTION_ADD:
                     d_info = _match(action, device, filter_func)
                     if d_info:
@@ -271,6 +334,7 @@ def monitor_glib(glib: GLib, callback: Callable, filter_func: Callable):
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug("Starting dbus monitoring")
     m.start()
+    _phys_index.start_monitoring()
 
 
 def enumerate(filter_func: typing.Callable[[int, int, int, bool, bool], dict[str, typing.Any]]):
@@ -412,6 +476,32 @@ def read(device_handle, bytes_count, timeout_ms=-1):
         return b""
 
 
+def read_into(device_handle, buffer, timeout_ms=-1):
+    """Read an Input report from a HID device into a preallocated buffer.
+
+    Like read(), but avoids allocating a new bytes object for every report.
+
+    :param device_handle: a device handle returned by open() or open_path().
+    :param buffer: a writable buffer (e.g., a bytearray or memoryview) at least as large as a report.
+    :param timeout_ms: as for read().
+
+    :returns: the number of bytes read, 0 if a timeout was reached.
+    """
+    assert device_handle
+    timeout = None if timeout_ms < 0 else timeout_ms / 1000.0
+    rlist, wlist, xlist = select([device_handle], [], [device_handle], timeout)
+
+    if xlist:
+        assert xlist == [device_handle]
+        raise OSError(errno.EIO, f"exception on file descriptor {int(device_handle)}")
+
+    if rlist:
+        assert rlist == [device_handle]
+        return os.readv(device_handle, [buffer])
+    else:
+        return 0
+
+
 _DEVICE_STRINGS = {
     0: "manufacturer",
     1: "product",
@@ -18,25 +18,28 @@
 
 from __future__ import annotations
 
+import collections
 import dataclasses
 import logging
 import platform
-import struct
 import threading
+import types
 import typing
 
-from contextlib import contextmanager
 from random import getrandbits
 from time import time
 from typing import Any
 from typing import Callable
 
 from . import base_usb
+from . import codec
 from . import common
 from . import descriptors
 from . import exceptions
 from . import hidpp10_constants
 from . import hidpp20_constants
+from . import stats
+from . import timeouts
 from .common import LOGITECH_VENDOR_ID
 from .common import BusID
 
@@ -80,6 +83,9 @@ class HIDAPI(typing.Protocol):
     def read(self, device_handle, bytes_count, timeout_ms):
         ...
 
+    def read_into(self, device_handle, buffer, timeout_ms) -> int:
+        ...
+
     def write(self, device_handle: int, data: bytes) -> int:
         ...
 
@@ -89,14 +95,14 @@ class HIDAPI(typing.Protocol):
 
 hidapi = typing.cast(HIDAPI, hidapi)
 
-SHORT_MESSAGE_SIZE = 7
-_LONG_MESSAGE_SIZE = 20
-_MEDIUM_MESSAGE_SIZE = 15
-_MAX_READ_SIZE = 32
+SHORT_MESSAGE_SIZE = codec.SHORT_MESSAGE_SIZE
+_LONG_MESSAGE_SIZE = codec.LONG_MESSAGE_SIZE
+_MEDIUM_MESSAGE_SIZE = codec.MEDIUM_MESSAGE_SIZE
+_MAX_READ_SIZE = codec.MAX_READ_SIZE
 
-HIDPP_SHORT_MESSAGE_ID = 0x10
-HIDPP_LONG_MESSAGE_ID = 0x11
-DJ_MESSAGE_ID = 0x20
+HIDPP_SHORT_MESSAGE_ID = codec.HIDPP_SHORT_MESSAGE_ID
+HIDPP_LONG_MESSAGE_ID = codec.HIDPP_LONG_MESSAGE_ID
+DJ_MESSAGE_ID = codec.DJ_MESSAGE_ID
 
 
 """Default timeout on read (in seconds)."""
@@ -111,6 +117,8 @@ _PING_TIMEOUT = DEFAULT_TIMEOUT
 
 @dataclasses.dataclass
 class HIDPPNotification:
+    __slots__ = ("report_id", "devnumber", "sub_id", "address", "data")
+
     report_id: int
     devnumber: int
     sub_id: int
@@ -145,6 +153,22 @@ for _ignore, d in descriptors.DEVICES.items():
     if d.btid:
         KNOWN_DEVICE_IDS.append(_bluetooth_device(d.btid))
 
+# (bus_id, product_id) -> record of KNOWN_DEVICE_IDS, the first one when there are several
+_KNOWN_DEVICES = types.MappingProxyType({(r["bus_id"], r["product_id"]): r for r in reversed(KNOWN_DEVICE_IDS)})
+
+# bus_id -> product ID ranges of Logitech devices that use HID++ 2.0
+_OTHER_DEVICE_RANGES = types.MappingProxyType(
+    {
+        BusID.USB: ((0xC07D, 0xC094), (0xC32B, 0xC344)),
+        BusID.BLUETOOTH: ((0xB012, 0xB0FF), (0xB317, 0xB3FF)),
+    }
+)
+
+
+def _known_device(bus_id: int, vendor_id: int, product_id: int) -> dict[str, Any] | None:
+    if vendor_id == LOGITECH_VENDOR_ID:
+        return _KNOWN_DEVICES.get((bus_id, product_id))
+
 
 def _other_device_check(bus_id: int, vendor_id: int, product_id: int) -> dict[str, Any] | None:
     """Check whether product is a Logitech USB-connected or Bluetooth device based on bus, vendor, and product IDs
@@ -152,12 +176,10 @@ def _other_device_check(bus_id: int, vendor_id: int, product_id: int) -> dict[st
     if vendor_id != LOGITECH_VENDOR_ID:
         return
 
-    device_info = None
-    if bus_id == BusID.USB and (0xC07D <= product_id <= 0xC094 or 0xC32B <= product_id <= 0xC344):
-        device_info = _usb_device(product_id, 2)
-    elif bus_id == BusID.BLUETOOTH and (0xB012 <= product_id <= 0xB0FF or 0xB317 <= product_id <= 0xB3FF):
-        device_info = _bluetooth_device(product_id)
-    return device_info
+    for low, high in _OTHER_DEVICE_RANGES.get(bus_id, ()):
+        if low <= product_id <= high:
+            return _usb_device(product_id, 2) if bus_id == BusID.USB else _bluetooth_device(product_id)
+    return None
 
 
 def product_information(usb_id: int) -> dict[str, Any]:
@@ -182,12 +204,9 @@ def _filter_receivers(
 
     If so return the receiver record for further checking.
     """
-    try:
-        record = base_usb.get_receiver_info(product_id)
-        if _match(record, bus_id, vendor_id, product_id):
-            return record
-    except ValueError:
-        pass
+    record = base_usb.KNOWN_RECEIVERS_BY_PRODUCT_ID.get(product_id)
+    if record is not None and _match(record, bus_id, vendor_id, product_id):
+        return record
 
     if vendor_id == LOGITECH_VENDOR_ID and 0xC500 <= product_id <= 0xC5FF:  # unknown receiver
         return {"vendor_id": vendor_id, "product_id": product_id, "bus_id": bus_id, "isDevice": False}
@@ -207,9 +226,9 @@ def _filter_products_of_interest(
     if record:  # known or unknown receiver
         return record
 
-    for record in KNOWN_DEVICE_IDS:
-        if _match(record, bus_id, vendor_id, product_id):
-            return record
+    record = _known_device(bus_id, vendor_id, product_id)
+    if record:
+        return record
     if hidpp_short or hidpp_long:  # unknown devices that use HID++
         return {"vendor_id": vendor_id, "product_id": product_id, "bus_id": bus_id, "isDevice": True}
     elif hidpp_short is None and hidpp_long is None:  # unknown devices in correct range of IDs
@@ -246,7 +265,9 @@ def open_path(path):
     :returns: an open receiver handle if this is the right Linux device, or
     ``None``.
     """
-    return hidapi.open_path(path)
+    handle = hidapi.open_path(path)
+    stats.record_open(handle, path)
+    return handle
 
 
 def open():
@@ -263,6 +284,8 @@ def open():
 def close(handle):
     """Closes a HID device handle."""
     if handle:
+        _forget_demultiplexer(handle)
+        timeouts.forget(handle)
         try:
             if isinstance(handle, int):
                 hidapi.close(handle)
@@ -288,19 +311,15 @@ def write(handle, devnumber, data, long_message=False):
     been physically removed from the machine, or the kernel driver has been
     unloaded. The handle will be closed automatically.
     """
-    # the data is padded to either 5 or 18 bytes
     assert data is not None
     assert isinstance(data, bytes), (repr(data), type(data))
 
-    if long_message or len(data) > SHORT_MESSAGE_SIZE - 2 or data[:1] == b"\x82":
-        wdata = struct.pack("!BB18s", HIDPP_LONG_MESSAGE_ID, devnumber, data)
-    else:
-        wdata = struct.pack("!BB5s", HIDPP_SHORT_MESSAGE_ID, devnumber, data)
+    wdata = codec.encode_message(devnumber, data, long_message)
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug(
             "(%s) <= w[%02X %02X %s %s]",
             handle,
-            ord(wdata[:1]),
+            wdata[0],
             devnumber,
             common.strhex(wdata[2:4]),
             common.strhex(wdata[4:]),
@@ -332,28 +351,40 @@ def read(handle, timeout=DEFAULT_TIMEOUT):
         return reply
 
 
-def _is_relevant_message(data: bytes) -> bool:
+def _is_relevant_message(data: bytes | memoryview) -> bool:
     """Checks if given id is a HID++ or DJ message.
 
     Applies sanity checks on message report ID and message size.
     """
-    assert isinstance(data, bytes), (repr(data), type(data))
+    if codec.is_relevant(data):
+        return True
+    if data[0] in codec.REPORT_LENGTHS:
+        logger.warning(f"unexpected message size: report_id {data[0]:02X} message {common.strhex(data)}")
+    return False
 
-    # mapping from report_id to message length
-    report_lengths = {
-        HIDPP_SHORT_MESSAGE_ID: SHORT_MESSAGE_SIZE,
-        HIDPP_LONG_MESSAGE_ID: _LONG_MESSAGE_SIZE,
-        DJ_MESSAGE_ID: _MEDIUM_MESSAGE_SIZE,
-        0x21: _MAX_READ_SIZE,
-    }
 
-    report_id = ord(data[:1])
-    if report_id in report_lengths:
-        if report_lengths.get(report_id) == len(data):
-            return True
-        else:
-            logger.warning(f"unexpected message size: report_id {report_id:02X} message {common.strhex(data)}")
-    return False
+_read_buffers = threading.local()
+
+
+def _read_packet(handle, timeout_ms: int):
+    """Read one packet into this thread's read buffer and split off its header.
+
+    Only the payload of relevant messages is copied out of the buffer.
+
+    :returns: a ``codec.Frame`` of (report_id, devnumber, payload), ``None`` for an irrelevant message,
+    or ``False`` if nothing was read before the timeout.
+    """
+    try:
+        view = _read_buffers.view
+    except AttributeError:
+        view = _read_buffers.view = memoryview(bytearray(_MAX_READ_SIZE))
+    count = hidapi.read_into(int(handle), view, timeout_ms)
+    if not count:
+        return False
+    packet = view[:count]
+    if _is_relevant_message(packet):  # ignore messages that fail check
+        stats.record_packet(handle)
+        return codec.decode(packet)
 
 
 def _read(handle, timeout):
@@ -367,64 +398,64 @@ def _read(handle, timeout):
     """
     try:
         # convert timeout to milliseconds, the hidapi expects it
-        timeout = int(timeout * 1000)
-        data = hidapi.read(int(handle), _MAX_READ_SIZE, timeout)
+        packet = _read_packet(handle, int(timeout * 1000))
     except Exception as reason:
         logger.warning("read failed, assuming handle %r no longer available", handle)
         close(handle)
         raise exceptions.NoReceiver(reason=reason) from reason
 
-    if data and _is_relevant_message(data):  # ignore messages that fail check
-        report_id = ord(data[:1])
-        devnumber = ord(data[1:2])
-
-        if logger.isEnabledFor(logging.DEBUG) and (
-            report_id != DJ_MESSAGE_ID or ord(data[2:3]) > 0x10
-        ):  # ignore DJ input messages
+    if packet:
+        report_id, devnumber, data = packet
+        if logger.isEnabledFor(logging.DEBUG) and (report_id != DJ_MESSAGE_ID or data[0] > 0x10):  # ignore DJ input messages
             logger.debug(
                 "(%s) => r[%02X %02X %s %s]",
                 handle,
                 report_id,
                 devnumber,
-                common.strhex(data[2:4]),
-                common.strhex(data[4:]),
+                common.strhex(data[:2]),
+                common.strhex(data[2:]),
             )
-
-        return report_id, devnumber, data[2:]
+        return packet
 
 
 def _skip_incoming(handle, ihandle, notifications_hook):
     """Read anything already in the input buffer.
 
     Used by request() and ping() before their write.
+    Replies to requests that are still outstanding on the handle are handed to them,
+    anything else is passed on as a notification or dropped.
+    If another thread is currently reading from the same file descriptor, wait for it to hand over,
+    which it does as soon as it has read a packet. If it does not do so in time it is waiting
+    on an empty buffer, so there is nothing to drain.
     """
-
-    while True:
-        try:
-            # read whatever is already in the buffer, if any
-            data = hidapi.read(ihandle, _MAX_READ_SIZE, 0)
-        except Exception as reason:
-            logger.error("read failed, assuming receiver %s no longer available", handle)
-            close(handle)
-            raise exceptions.NoReceiver(reason=reason) from reason
-
-        if data:
-            if _is_relevant_message(data):  # only process messages that pass check
-                # report_id = ord(data[:1])
-                if notifications_hook:
-                    n = make_notification(ord(data[:1]), ord(data[1:2]), data[2:])
-                    if n:
-                        notifications_hook(n)
-        else:
-            # nothing in the input buffer, we're done
-            return
+    demux = _demultiplexer(handle)
+    reader = demux.reader(ihandle)
+    if not reader.acquire(timeout=_READER_HANDOFF, drain=True):
+        return
+    try:
+        while True:
+            try:
+                # read whatever is already in the buffer, if any
+                packet = _read_packet(ihandle, 0)
+            except Exception as reason:
+                logger.error("read failed, assuming receiver %s no longer available", handle)
+                close(handle)
+                raise exceptions.NoReceiver(reason=reason) from reason
+
+            if packet:  # only process messages that pass check
+                demux.dispatch(*packet, notifications_hook)
+            elif packet is False:
+                # nothing in the input buffer, we're done
+                return
+    finally:
+        reader.release()
 
 
 def make_notification(report_id: int, devnumber: int, data: bytes) -> HIDPPNotification | None:
     """Guess if this is a notification (and not just a request reply), and
     return a Notification if it is."""
 
-    sub_id = ord(data[:1])
+    sub_id = data[0]
     if sub_id & 0x80 == 0x80:
         # this is either a HID++1.0 register r/w, or an error reply
         return None
@@ -433,7 +464,7 @@ def make_notification(report_id: int, devnumber: int, data: bytes) -> HIDPPNotif
     if report_id == DJ_MESSAGE_ID and (sub_id < 0x10):
         return None
 
-    address = ord(data[1:2])
+    address = data[1]
     if sub_id == 0x00 and (address & 0x0F == 0x00):
         # this is a no-op notification - don't do anything with it
         return None
@@ -443,7 +474,7 @@ def make_notification(report_id: int, devnumber: int, data: bytes) -> HIDPPNotif
         (sub_id >= 0x40)  # noqa: E131
         or
         # custom HID++1.0 battery events, where SubId is 0x07/0x0D
-        (sub_id in (0x07, 0x0D) and len(data) == 5 and data[4:5] == b"\x00")
+        (sub_id in (0x07, 0x0D) and len(data) == 5 and data[4] == 0x00)
         or
         # custom HID++1.0 illumination event, where SubId is 0x17
         (sub_id == 0x17 and len(data) == 5)
@@ -455,30 +486,368 @@ def make_notification(report_id: int, devnumber: int, data: bytes) -> HIDPPNotif
     return None
 
 
-request_lock = threading.Lock()  # serialize all requests
-handles_lock = {}
+# How long a thread waiting for a reply sleeps before checking whether it has to take over reading the handle
+_READER_HANDOFF = 0.05  # in seconds
+# How long to wait for an earlier request with the same reply signature to finish
+_SLOT_TIMEOUT = 10.0  # in seconds
+# How many requests of a batch are outstanding at a time, well below the 14 software IDs, which other threads also use
+_PIPELINE_DEPTH = 8
+
+
+class PendingReply:
+    """A request that has been written to a handle and is waiting for its reply.
+
+    Replies are matched to requests by device number, feature index (or register),
+    and software ID, so several requests can be outstanding on one handle.
+    Whichever thread is waiting for a reply reads from the handle and hands each reply to its request.
+    """
+
+    __slots__ = (
+        "handle",
+        "devnumber",
+        "request_id",
+        "request_data",
+        "params",
+        "return_error",
+        "is_ping",
+        "timeout",
+        "sent",
+        "started",
+        "reply",
+        "exception",
+        "_event",
+        "_callbacks",
+    )
+
+    def __init__(self, handle, devnumber, request_id, request_data, params, timeout, return_error=False, is_ping=False):
+        self.handle = handle
+        self.devnumber = devnumber
+        self.request_id = request_id
+        self.request_data = request_data
+        self.params = params
+        self.return_error = return_error
+        self.is_ping = is_ping
+        self.timeout = timeout
+        self.sent = None
+        self.started = None
+        self.reply = None
+        self.exception = None
+        self._event = threading.Event()
+        self._callbacks = []
+
+    @property
+    def key(self):
+        return self.devnumber, self.request_data[:2]
+
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def add_done_callback(self, callback: Callable[[PendingReply], None]):
+        """Call callback with this request once it has completed, failed, or timed out.
+
+        The callback is run on the thread that read the reply, so it should be quick."""
+        if self.done():
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def result(self, timeout: float | None = None):
+        """Wait for the reply, reading from the handle if no other thread is doing so.
+
+        :returns: the reply data, or ``None`` on timeout or error.
+        :raises FeatureCallError: if the device replied with a HID++ 2.0 error.
+        """
+        if not self.done():
+            _wait_for_reply(self, timeout)
+        if self.exception is not None:
+            raise self.exception
+        return self.reply
+
+    def _finish(self, reply=None, exception=None):
+        self.reply = reply
+        self.exception = exception
+        self._event.set()
+        for callback in self._callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("reply callback for request {%04X}", self.request_id)
+        self._callbacks = []
+
+    def match(self, report_id: int, data: bytes):
+        """Check whether this is the reply to the request.
+
+        :returns: ``None`` if it is not, else a tuple of the reply value and the exception to raise, if any.
+        """
+        if self.is_ping:
+            return self._match_ping(report_id, data)
+        request_data = self.request_data
+        if report_id == HIDPP_SHORT_MESSAGE_ID and data[0] == 0x8F and data[1:3] == request_data[:2]:
+            error = data[3]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "(%s) device 0x%02X error on request {%04X}: %d = %s",
+                    self.handle,
+                    self.devnumber,
+                    self.request_id,
+                    error,
+                    hidpp10_constants.ERROR[error],
+                )
+            return hidpp10_constants.ERROR[error] if self.return_error else None, None
+        if data[0] == 0xFF and data[1:3] == request_data[:2]:
+            # a HID++ 2.0 feature call returned with an error
+            error = data[3]
+            logger.error(
+                "(%s) device %d error on feature request {%04X}: %d = %s",
+                self.handle,
+                self.devnumber,
+                self.request_id,
+                error,
+                hidpp20_constants.ERROR[error],
+            )
+            return None, exceptions.FeatureCallError(
+                number=self.devnumber, request=self.request_id, error=error, params=self.params
+            )
+        if data[:2] == request_data[:2]:
+            if self.devnumber == 0xFF and (self.request_id == 0x83B5 or self.request_id == 0x81F1):
+                # these replies have to match the first parameter as well
+                if data[2:3] != self.params[:1]:
+                    return None  # hm, not matching my request, and certainly not a notification
+            return data[2:], None
+        return None
+
+    def _match_ping(self, report_id: int, data: bytes):
+        request_data = self.request_data
+        if data[:2] == request_data[:2] and data[4:5] == request_data[-1:]:
+            # HID++ 2.0+ device, currently connected
+            return data[2] + data[3] / 10.0, None
+        if report_id == HIDPP_SHORT_MESSAGE_ID and data[0] == 0x8F and data[1:3] == request_data[:2]:  # error response
+            error = data[3]
+            if error == hidpp10_constants.ERROR.invalid_SubID__command:
+                return 1.0, None  # a valid reply from a HID++ 1.0 device
+            if error == hidpp10_constants.ERROR.resource_error or error == hidpp10_constants.ERROR.connection_request_failed:
+                return None, None  # device unreachable
+            if error == hidpp10_constants.ERROR.unknown_device:  # no paired device with that number
+                logger.error("(%s) device %d error on ping request: unknown device", self.handle, self.devnumber)
+                return None, exceptions.NoSuchDevice(number=self.devnumber, request=self.request_id)
+        return None
+
+
+class _Reader:
+    """The right to read from a file descriptor, held by one thread at a time.
 
+    Threads draining the input buffer before writing a request get it before threads waiting for replies,
+    so that stale replies cannot be taken as the reply to the new request.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._draining = 0  # threads waiting to drain
+
+    def acquire(self, blocking: bool = True, timeout: float | None = None, drain: bool = False) -> bool:
+        with self._cond:
+            if drain:
+                self._draining += 1
+            try:
+                if blocking:
+                    self._cond.wait_for(lambda: not self._busy and (drain or not self._draining), timeout)
+                if self._busy or not drain and self._draining:
+                    return False
+                self._busy = True
+                return True
+            finally:
+                if drain:
+                    self._draining -= 1
+
+    def release(self):
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_args):
+        self.release()
+
+
+class _ReplyDemultiplexer:
+    """Matches incoming packets on a handle to the requests outstanding on it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slot_free = threading.Condition(self.lock)
+        self.readers = {}  # file descriptor -> _Reader
+        self.pending = {}
+
+    def reader(self, fd: int) -> _Reader:
+        """The right to read from a file descriptor, threaded handles have one descriptor per thread."""
+        with self.lock:
+            reader = self.readers.get(fd)
+            if reader is None:
+                reader = self.readers[fd] = _Reader()
+            return reader
+
+    def _expire(self) -> list[PendingReply]:
+        """Remove the requests that have timed out, including any whose result is never asked for.
+
+        Must be called with the lock held, the removed requests are to be finished outside of it.
+        """
+        now = time()
+        expired = [p for p in self.pending.values() if now - p.started >= p.timeout]
+        for p in expired:
+            del self.pending[p.key]
+        if expired:
+            self.slot_free.notify_all()
+        return expired
+
+    def register(self, pending: PendingReply, timeout: float) -> bool:
+        """Add a request, first waiting for any outstanding request with the same reply signature."""
+        deadline = time() + timeout
+        expired = []
+        registered = False
+        with self.lock:
+            while True:
+                expired.extend(self._expire())
+                blocking = self.pending.get(pending.key)
+                if blocking is None:
+                    self.pending[pending.key] = pending
+                    pending.sent = pending.started = time()
+                    registered = True
+                    break
+                now = time()
+                if now >= deadline:
+                    break
+                self.slot_free.wait(min(deadline, blocking.started + blocking.timeout) - now)
+        for p in expired:
+            _timed_out(p)
+        return registered
+
+    def unregister(self, pending: PendingReply) -> bool:
+        with self.lock:
+            if self.pending.get(pending.key) is pending:
+                del self.pending[pending.key]
+                self.slot_free.notify_all()
+                return True
+        return False
+
+    def fail_all(self, exception: Exception):
+        with self.lock:
+            pending, self.pending = list(self.pending.values()), {}
+            self.slot_free.notify_all()
+        for p in pending:
+            p._finish(exception=exception)
+
+    def dispatch(self, report_id: int, devnumber: int, data: bytes, notifications_hook=None) -> None:
+        """Hand a packet to the request it answers, or else treat it as a possible notification."""
+        reply_key = codec.reply_key(data)
+        with self.lock:
+            expired = self._expire()
+            pending = self.pending.get((devnumber, reply_key)) or self.pending.get((devnumber ^ 0xFF, reply_key))
+            outcome = pending.match(report_id, data) if pending is not None else None
+            if outcome is not None:
+                del self.pending[pending.key]
+                self.slot_free.notify_all()
+        for p in expired:
+            _timed_out(p)
+        if outcome is not None:
+            error = data[0] if data[0] in codec.ERROR_SUB_IDS and not pending.is_ping else None
+            latency = time() - pending.sent
+            stats.record_reply(pending.handle, pending.devnumber, pending.request_id, latency, error, pending.is_ping)
+            timeouts.record_reply(pending.handle, pending.devnumber, latency)
+            pending._finish(*outcome)  # outside the lock, as callbacks may make new requests
+            return
+        with self.lock:
+            now = time()
+            for p in self.pending.values():
+                if p.devnumber != devnumber and p.devnumber != devnumber ^ 0xFF:  # BT device returning 0x00
+                    # a reply was received, but did not match this request in any way
+                    # reset the timeout starting point
+                    p.started = now
+        if notifications_hook:
+            n = make_notification(report_id, devnumber, data)
+            if n:
+                notifications_hook(n)
 
-def handle_lock(handle):
-    with request_lock:
-        if handles_lock.get(handle) is None:
+
+_demultiplexers_lock = threading.Lock()
+_demultiplexers = {}
+
+
+def _demultiplexer(handle) -> _ReplyDemultiplexer:
+    with _demultiplexers_lock:
+        demux = _demultiplexers.get(handle)
+        if demux is None:
             if logger.isEnabledFor(logging.INFO):
-                logger.info("New lock %s", repr(handle))
-            handles_lock[handle] = threading.Lock()  # Serialize requests on the handle
-    return handles_lock[handle]
+                logger.info("New reply demultiplexer %s", repr(handle))
+            demux = _demultiplexers[handle] = _ReplyDemultiplexer()
+    return demux
 
 
-# context manager for locks with a timeout
-@contextmanager
-def acquire_timeout(lock, handle, timeout):
-    result = lock.acquire(timeout=timeout)
-    try:
-        if not result:
-            logger.error("lock on handle %d not acquired, probably due to timeout", int(handle))
-        yield result
-    finally:
-        if result:
-            lock.release()
+def _forget_demultiplexer(handle):
+    with _demultiplexers_lock:
+        demux = _demultiplexers.pop(handle, None)
+    if demux is not None:
+        demux.fail_all(exceptions.NoReceiver(reason="handle closed"))
+
+
+def _wait_for_reply(pending: PendingReply, timeout: float | None = None) -> None:
+    """Wait until pending is finished or times out.
+
+    One waiting thread at a time reads from the handle and dispatches what it reads,
+    the others sleep until their reply is handed to them or the reading thread is done.
+    """
+    handle = pending.handle
+    demux = _demultiplexer(handle)
+    reader = demux.reader(int(handle))
+    notifications_hook = getattr(handle, "notifications_hook", None)
+    limit = None if timeout is None else time() + timeout
+    while not pending.done():
+        delta = time() - pending.started
+        if delta >= pending.timeout or (limit is not None and time() >= limit):
+            break
+        if reader.acquire(blocking=False):
+            try:
+                if not pending.done():
+                    reply = _read(handle, pending.timeout - delta)
+                    if reply:
+                        demux.dispatch(*reply, notifications_hook)
+            except exceptions.NoReceiver as e:
+                demux.fail_all(e)
+                raise
+            finally:
+                reader.release()
+        else:
+            pending._event.wait(_READER_HANDOFF)
+
+    if not pending.done() and time() - pending.started >= pending.timeout and demux.unregister(pending):
+        _timed_out(pending)
+
+
+def _timed_out(pending: PendingReply) -> None:
+    """Finish a request that got no reply in time, after it has been removed from its demultiplexer."""
+    handle = pending.handle
+    delta = time() - pending.started
+    if pending.is_ping:
+        logger.warning("(%s) timeout (%0.2f/%0.2f) on device %d ping", handle, delta, pending.timeout, pending.devnumber)
+    else:
+        logger.warning(
+            "timeout (%0.2f/%0.2f) on device %d request {%04X} params [%s]",
+            delta,
+            pending.timeout,
+            pending.devnumber,
+            pending.request_id,
+            common.strhex(pending.params),
+        )
+        # raise DeviceUnreachable(number=devnumber, request=request_id)
+    stats.record_timeout(handle, pending.devnumber)
+    timeouts.record_timeout(handle, pending.devnumber)
+    pending._finish(None)
+
+
+_sw_id_lock = threading.Lock()
 
 
 def _get_next_sw_id() -> int:
@@ -487,14 +856,15 @@ def _get_next_sw_id() -> int:
     Cycle the HID++ 2.0 software ID from 0x2 to 0xF to separate
     results and notifications.
     """
-    if not hasattr(_get_next_sw_id, "software_id"):
-        _get_next_sw_id.software_id = 0xF
+    with _sw_id_lock:
+        if not hasattr(_get_next_sw_id, "software_id"):
+            _get_next_sw_id.software_id = 0xF
 
-    if _get_next_sw_id.software_id < 0xF:
-        _get_next_sw_id.software_id += 1
-    else:
-        _get_next_sw_id.software_id = 2
-    return _get_next_sw_id.software_id
+        if _get_next_sw_id.software_id < 0xF:
+            _get_next_sw_id.software_id += 1
+        else:
+            _get_next_sw_id.software_id = 2
+        return _get_next_sw_id.software_id
 
 
 def find_paired_node(receiver_path: str, index: int, timeout: int):
@@ -510,6 +880,78 @@ def find_paired_node_wpid(receiver_path: str, index: int):
     return hidapi.find_paired_node_wpid(receiver_path, index)
 
 
+def _send(
+    handle, devnumber, request_id: int, request_data: bytes, params: bytes, timeout, long_message, return_error, is_ping
+):
+    """Drain the input buffer, register a request with the handle's demultiplexer and write it out.
+
+    The buffer is drained first, so a late reply to an earlier request with the same signature
+    cannot be taken as the reply to this one.
+    """
+    notifications_hook = getattr(handle, "notifications_hook", None)
+    try:
+        _skip_incoming(handle, int(handle), notifications_hook)
+    except exceptions.NoReceiver:
+        logger.warning("device or receiver disconnected")
+        return None
+    pending = PendingReply(handle, devnumber, request_id, request_data, params, timeout, return_error, is_ping)
+    demux = _demultiplexer(handle)
+    if not demux.register(pending, _SLOT_TIMEOUT):
+        logger.error("no free reply slot on handle %d for request {%04X}, probably due to timeout", int(handle), request_id)
+        return None
+    try:
+        write(int(handle), devnumber, request_data, long_message)
+    except exceptions.NoReceiver:
+        demux.unregister(pending)
+        raise
+    pending.sent = pending.started = time()  # we consider timeout from this point
+    return pending
+
+
+def _request_data(devnumber, request_id: int, params, protocol: float):
+    assert isinstance(request_id, int)
+    if (devnumber != 0xFF or protocol >= 2.0) and request_id < 0x8000:
+        # Always set the most significant bit (8) in SoftwareId,
+        # to make notifications easier to distinguish from request replies.
+        # This only applies to peripheral requests, ofc.
+        sw_id = _get_next_sw_id()
+        request_id = (request_id & 0xFFF0) | sw_id  # was 0x08 | getrandbits(3)
+
+    timeout = _RECEIVER_REQUEST_TIMEOUT if devnumber == 0xFF else _DEVICE_REQUEST_TIMEOUT
+    # be extra patient on long register read
+    if request_id & 0xFF00 == 0x8300:
+        timeout *= 2
+
+    params = codec.pack_params(params)
+    return request_id, codec.encode_request(request_id, params), params, timeout
+
+
+def request_future(
+    handle,
+    devnumber,
+    request_id: int,
+    *params,
+    return_error: bool = False,
+    long_message: bool = False,
+    protocol: float = 1.0,
+    callback: Callable[[PendingReply], None] | None = None,
+) -> PendingReply | None:
+    """Sends a feature call to a device without waiting for the reply.
+
+    Up to 14 requests (one per software ID) can be outstanding on a handle at the same time.
+    The reply is read by whichever thread is waiting on the handle, e.g. a later ``result()`` call.
+
+    :param callback: called with the ``PendingReply`` once it is finished.
+    :returns: a ``PendingReply``, or ``None`` if the request could not be sent.
+    """
+    request_id, request_data, params, timeout = _request_data(devnumber, request_id, params, protocol)
+    timeout = timeouts.timeout(handle, devnumber, timeout)
+    pending = _send(handle, devnumber, request_id, request_data, params, timeout, long_message, return_error, False)
+    if pending is not None and callback is not None:
+        pending.add_done_callback(callback)
+    return pending
+
+
 # a very few requests (e.g., host switching) do not expect a reply, but use no_reply=True with extreme caution
 def request(
     handle,
@@ -528,115 +970,59 @@ def request(
     :param params: parameters for the feature call, 3 to 16 bytes.
     :returns: the reply data, or ``None`` if some error occurred. or no reply expected
     """
-    with acquire_timeout(handle_lock(handle), handle, 10.0):
-        assert isinstance(request_id, int)
-        if (devnumber != 0xFF or protocol >= 2.0) and request_id < 0x8000:
-            # Always set the most significant bit (8) in SoftwareId,
-            # to make notifications easier to distinguish from request replies.
-            # This only applies to peripheral requests, ofc.
-            sw_id = _get_next_sw_id()
-            request_id = (request_id & 0xFFF0) | sw_id  # was 0x08 | getrandbits(3)
-
-        timeout = _RECEIVER_REQUEST_TIMEOUT if devnumber == 0xFF else _DEVICE_REQUEST_TIMEOUT
-        # be extra patient on long register read
-        if request_id & 0xFF00 == 0x8300:
-            timeout *= 2
-
-        if params:
-            params = b"".join(struct.pack("B", p) if isinstance(p, int) else p for p in params)
-        else:
-            params = b""
-        request_data = struct.pack("!H", request_id) + params
-
-        ihandle = int(handle)
-        notifications_hook = getattr(handle, "notifications_hook", None)
+    if no_reply:
+        request_id, request_data, params, _timeout = _request_data(devnumber, request_id, params, protocol)
         try:
-            _skip_incoming(handle, ihandle, notifications_hook)
+            _skip_incoming(handle, int(handle), getattr(handle, "notifications_hook", None))
         except exceptions.NoReceiver:
             logger.warning("device or receiver disconnected")
             return None
-        write(ihandle, devnumber, request_data, long_message)
+        write(int(handle), devnumber, request_data, long_message)
+        return None
 
-        if no_reply:
-            return None
+    pending = request_future(
+        handle, devnumber, request_id, *params, return_error=return_error, long_message=long_message, protocol=protocol
+    )
+    return pending.result() if pending is not None else None
 
-        # we consider timeout from this point
-        request_started = time()
-        delta = 0
-
-        while delta < timeout:
-            reply = _read(handle, timeout)
-            if reply:
-                report_id, reply_devnumber, reply_data = reply
-                if reply_devnumber == devnumber or reply_devnumber == devnumber ^ 0xFF:  # BT device returning 0x00
-                    if (
-                        report_id == HIDPP_SHORT_MESSAGE_ID
-                        and reply_data[:1] == b"\x8f"
-                        and reply_data[1:3] == request_data[:2]
-                    ):
-                        error = ord(reply_data[3:4])
-
-                        if logger.isEnabledFor(logging.DEBUG):
-                            logger.debug(
-                                "(%s) device 0x%02X error on request {%04X}: %d = %s",
-                                handle,
-                                devnumber,
-                                request_id,
-                                error,
-                                hidpp10_constants.ERROR[error],
-                            )
-                        return hidpp10_constants.ERROR[error] if return_error else None
-                    if reply_data[:1] == b"\xff" and reply_data[1:3] == request_data[:2]:
-                        # a HID++ 2.0 feature call returned with an error
-                        error = ord(reply_data[3:4])
-                        logger.error(
-                            "(%s) device %d error on feature request {%04X}: %d = %s",
-                            handle,
-                            devnumber,
-                            request_id,
-                            error,
-                            hidpp20_constants.ERROR[error],
-                        )
-                        raise exceptions.FeatureCallError(
-                            number=devnumber,
-                            request=request_id,
-                            error=error,
-                            params=params,
-                        )
-
-                    if reply_data[:2] == request_data[:2]:
-                        if devnumber == 0xFF:
-                            if request_id == 0x83B5 or request_id == 0x81F1:
-                                # these replies have to match the first parameter as well
-                                if reply_data[2:3] == params[:1]:
-                                    return reply_data[2:]
-                                else:
-                                    # hm, not matching my request, and certainly not a notification
-                                    continue
-                            else:
-                                return reply_data[2:]
-                        else:
-                            return reply_data[2:]
-                else:
-                    # a reply was received, but did not match our request in any way
-                    # reset the timeout starting point
-                    request_started = time()
 
-                if notifications_hook:
-                    n = make_notification(report_id, reply_devnumber, reply_data)
-                    if n:
-                        notifications_hook(n)
-            delta = time() - request_started
+def requests(
+    handle,
+    devnumber,
+    calls: typing.Iterable[tuple],
+    long_message: bool = False,
+    protocol: float = 1.0,
+) -> list:
+    """Makes several feature calls to a device, sending each one without waiting for the replies to the previous ones.
 
-        logger.warning(
-            "timeout (%0.2f/%0.2f) on device %d request {%04X} params [%s]",
-            delta,
-            timeout,
-            devnumber,
-            request_id,
-            common.strhex(params),
-        )
-        # raise DeviceUnreachable(number=devnumber, request=request_id)
+    :param calls: tuples of a request ID and its parameters.
+    :returns: the reply data of each request, in order, ``None`` for those that failed.
+    :raises FeatureCallError: if the device replied to one of the requests with a HID++ 2.0 error,
+        after all the replies have been read.
+    """
+    replies = []
+    error = None
+    outstanding = collections.deque()
+
+    def next_reply():
+        nonlocal error
+        pending = outstanding.popleft()
+        try:
+            replies.append(pending.result() if pending is not None else None)
+        except exceptions.FeatureCallError as e:
+            replies.append(None)
+            error = error or e
+
+    for request_id, *params in calls:
+        if len(outstanding) >= _PIPELINE_DEPTH:
+            next_reply()
+        pending = request_future(handle, devnumber, request_id, *params, long_message=long_message, protocol=protocol)
+        outstanding.append(pending)
+    while outstanding:
+        next_reply()
+    if error is not None:
+        raise error
+    return replies
 
 
 def ping(handle, devnumber, long_message: bool = False):
@@ -645,54 +1031,9 @@ def ping(handle, devnumber, long_message: bool = False):
     """
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug("(%s) pinging device %d", handle, devnumber)
-    with acquire_timeout(handle_lock(handle), handle, 10.0):
-        notifications_hook = getattr(handle, "notifications_hook", None)
-        try:
-            _skip_incoming(handle, int(handle), notifications_hook)
-        except exceptions.NoReceiver:
-            logger.warning("device or receiver disconnected")
-            return
-
-        # randomize the mark byte to be able to identify the ping reply
-        sw_id = _get_next_sw_id()
-        request_id = 0x0010 | sw_id  # was 0x0018 | getrandbits(3)
-        request_data = struct.pack("!HBBB", request_id, 0, 0, getrandbits(8))
-        write(int(handle), devnumber, request_data, long_message)
-
-        request_started = time()  # we consider timeout from this point
-        delta = 0
-        while delta < _PING_TIMEOUT:
-            reply = _read(handle, _PING_TIMEOUT)
-            if reply:
-                report_id, reply_devnumber, reply_data = reply
-                if reply_devnumber == devnumber or reply_devnumber == devnumber ^ 0xFF:  # BT device returning 0x00
-                    if reply_data[:2] == request_data[:2] and reply_data[4:5] == request_data[-1:]:
-                        # HID++ 2.0+ device, currently connected
-                        return ord(reply_data[2:3]) + ord(reply_data[3:4]) / 10.0
-
-                    if (
-                        report_id == HIDPP_SHORT_MESSAGE_ID
-                        and reply_data[:1] == b"\x8f"
-                        and reply_data[1:3] == request_data[:2]
-                    ):  # error response
-                        error = ord(reply_data[3:4])
-                        if error == hidpp10_constants.ERROR.invalid_SubID__command:
-                            # a valid reply from a HID++ 1.0 device
-                            return 1.0
-                        if (
-                            error == hidpp10_constants.ERROR.resource_error
-                            or error == hidpp10_constants.ERROR.connection_request_failed
-                        ):
-                            return  # device unreachable
-                        if error == hidpp10_constants.ERROR.unknown_device:  # no paired device with that number
-                            logger.error("(%s) device %d error on ping request: unknown device", handle, devnumber)
-                            raise exceptions.NoSuchDevice(number=devnumber, request=request_id)
-
-                if notifications_hook:
-                    n = make_notification(report_id, reply_devnumber, reply_data)
-                    if n:
-                        notifications_hook(n)
-
-            delta = time() - request_started
-
-        logger.warning("(%s) timeout (%0.2f/%0.2f) on device %d ping", handle, delta, _PING_TIMEOUT, devnumber)
+    # randomize the mark byte to be able to identify the ping reply
+    sw_id = _get_next_sw_id()
+    request_id = 0x0010 | sw_id  # was 0x0018 | getrandbits(3)
+    request_data = codec.encode_ping(request_id, getrandbits(8))
+    pending = _send(handle, devnumber, request_id, request_data, b"", _PING_TIMEOUT, long_message, False, True)
+    return pending.result() if pending is not None else None
@@ -0,0 +1,232 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""asyncio versions of the low-level request functions in base.
+
+An AsyncHandle registers a hidraw file descriptor with the event loop, so one
+loop can talk to many receivers and devices without a thread per handle.
+Only available on Linux, as it needs the file descriptors from hidapi.udev_impl.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import logging
+import os
+
+from random import getrandbits
+from time import time
+from typing import Callable
+
+from . import base
+from . import codec
+from . import common
+from . import exceptions
+from . import stats
+from . import timeouts
+
+logger = logging.getLogger(__name__)
+
+# how often and how long to back off when the kernel refuses a write
+_WRITE_RETRIES = 3
+_WRITE_BACKOFF = 0.02  # in seconds, doubled after each failed attempt
+
+
+class AsyncHandle:
+    """An open receiver or device handle driven by an asyncio event loop.
+
+    Replies are matched to outstanding requests the same way as in base.request(),
+    anything else that looks like a notification is passed to notifications_callback.
+    """
+
+    def __init__(self, fd: int, loop: asyncio.AbstractEventLoop | None = None, notifications_callback: Callable = None):
+        self.fd = fd
+        self.loop = loop or asyncio.get_running_loop()
+        self.notifications_callback = notifications_callback
+        self._pending = {}
+        os.set_blocking(fd, False)
+        self.loop.add_reader(fd, self._on_readable)
+
+    @classmethod
+    def open_path(cls, path: str, loop=None, notifications_callback: Callable = None) -> AsyncHandle:
+        """Open a hidraw device path, as found by base.receivers_and_devices()."""
+        import hidapi.udev_impl as udev_impl
+
+        fd = udev_impl.open_path(path)
+        stats.record_open(fd, path)
+        return cls(fd, loop, notifications_callback)
+
+    def close(self):
+        if self.fd is not None:
+            fd, self.fd = self.fd, None
+            self.loop.remove_reader(fd)
+            timeouts.forget(fd)
+            os.close(fd)
+            self._fail_all(exceptions.NoReceiver(reason="handle closed"))
+
+    def _fail_all(self, exception):
+        pending, self._pending = self._pending, {}
+        for _request, future in pending.values():
+            if not future.done():
+                future.set_exception(exception)
+
+    def _on_readable(self):
+        while self.fd is not None:
+            try:
+                data = os.read(self.fd, base._MAX_READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as reason:
+                logger.warning("read failed, assuming handle %r no longer available", self)
+                self._fail_all(exceptions.NoReceiver(reason=reason))
+                self.close()
+                return
+            if not data:
+                return
+            if base._is_relevant_message(data):
+                stats.record_packet(self)
+                self._dispatch(*codec.decode(data))
+
+    def _dispatch(self, report_id: int, devnumber: int, data: bytes):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "(%s) => r[%02X %02X %s %s]", self, report_id, devnumber, common.strhex(data[:2]), common.strhex(data[2:])
+            )
+        reply_key = codec.reply_key(data)
+        entry = self._pending.get((devnumber, reply_key)) or self._pending.get((devnumber ^ 0xFF, reply_key))
+        if entry is not None:
+            pending, future = entry
+            outcome = pending.match(report_id, data)
+            if outcome is not None:
+                del self._pending[pending.key]
+                error = data[0] if data[0] in codec.ERROR_SUB_IDS and not pending.is_ping else None
+                latency = time() - pending.sent
+                stats.record_reply(self, pending.devnumber, pending.request_id, latency, error, pending.is_ping)
+                timeouts.record_reply(self, pending.devnumber, latency)
+                if not future.done():
+                    reply, exception = outcome
+                    if exception is not None:
+                        future.set_exception(exception)
+                    else:
+                        future.set_result(reply)
+                return
+        if self.notifications_callback:
+            n = base.make_notification(report_id, devnumber, data)
+            if n:
+                stats.record_notification(self, devnumber)
+                if n.sub_id < 0x40:
+                    timeouts.record_activity(self, devnumber)
+                self.notifications_callback(n)
+
+    async def _write(self, devnumber, data: bytes, long_message: bool):
+        wdata = codec.encode_message(devnumber, data, long_message)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "(%s) <= w[%02X %02X %s %s]", self, wdata[0], devnumber, common.strhex(wdata[2:4]), common.strhex(wdata[4:])
+            )
+        delay = _WRITE_BACKOFF
+        for _attempt in range(_WRITE_RETRIES):
+            if self.fd is None:
+                raise exceptions.NoReceiver(reason="handle closed")
+            try:
+                written = os.write(self.fd, wdata)
+            except (BlockingIOError, BrokenPipeError):  # device not ready yet (EAGAIN or EPIPE), try again a bit later
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+            except OSError as reason:
+                logger.error("write failed, assuming handle %r no longer available", self)
+                self.close()
+                raise exceptions.NoReceiver(reason=reason) from reason
+            if written == len(wdata):
+                return
+            break
+        reason = OSError(errno.EIO, f"could not write {len(wdata)} bytes")
+        logger.error("write failed, assuming handle %r no longer available", self)
+        self.close()
+        raise exceptions.NoReceiver(reason=reason)
+
+    async def _send(self, pending: base.PendingReply, long_message: bool):
+        # wait for any outstanding request with the same reply signature
+        while pending.key in self._pending:
+            try:
+                await asyncio.shield(self._pending[pending.key][1])
+            except Exception:
+                pass
+        future = self.loop.create_future()
+        self._pending[pending.key] = (pending, future)
+        try:
+            pending.sent = time()
+            await self._write(pending.devnumber, pending.request_data, long_message)
+            return await asyncio.wait_for(future, pending.timeout)
+        except asyncio.TimeoutError:
+            stats.record_timeout(self, pending.devnumber)
+            timeouts.record_timeout(self, pending.devnumber)
+            if pending.is_ping:
+                logger.warning("(%s) timeout (%0.2f) on device %d ping", self, pending.timeout, pending.devnumber)
+            else:
+                logger.warning(
+                    "timeout (%0.2f) on device %d request {%04X} params [%s]",
+                    pending.timeout,
+                    pending.devnumber,
+                    pending.request_id,
+                    common.strhex(pending.params),
+                )
+            return None
+        finally:
+            if self._pending.get(pending.key, (None,))[0] is pending:
+                del self._pending[pending.key]
+                if not future.done():
+                    future.cancel()
+
+    async def request(
+        self,
+        devnumber,
+        request_id: int,
+        *params,
+        no_reply: bool = False,
+        return_error: bool = False,
+        long_message: bool = False,
+        protocol: float = 1.0,
+    ):
+        """Makes a feature call to a device and waits for a matching reply, see base.request()."""
+        request_id, request_data, params, timeout = base._request_data(devnumber, request_id, params, protocol)
+        timeout = timeouts.timeout(self, devnumber, timeout)
+        if no_reply:
+            await self._write(devnumber, request_data, long_message)
+            return None
+        pending = base.PendingReply(self, devnumber, request_id, request_data, params, timeout, return_error)
+        return await self._send(pending, long_message)
+
+    async def ping(self, devnumber, long_message: bool = False):
+        """Check if a device is connected, see base.ping().
+
+        :returns: The HID protocol supported by the device, or ``None`` if it is not active.
+        """
+        request_id = 0x0010 | base._get_next_sw_id()
+        request_data = codec.encode_ping(request_id, getrandbits(8))
+        pending = base.PendingReply(self, devnumber, request_id, request_data, b"", base._PING_TIMEOUT, is_ping=True)
+        return await self._send(pending, long_message)
+
+    def __int__(self):
+        return -1 if self.fd is None else self.fd
+
+    def __str__(self):
+        return str(self.fd)
+
+    def __repr__(self):
+        return f"<AsyncHandle({self.fd})>"
@@ -27,6 +27,8 @@ USB ids of Logitech wireless receivers.
 Only receivers supporting the HID++ protocol can go in here.
 """
 
+import types
+
 from solaar.i18n import _
 
 # max_devices is only used for receivers that do not support reading from Registers.RECEIVER_INFO offset 0x03, default
@@ -201,6 +203,8 @@ KNOWN_RECEIVERS = (
     EX100_27MHZ_RECEIVER_C517,
 )
 
+KNOWN_RECEIVERS_BY_PRODUCT_ID = types.MappingProxyType({r["product_id"]: r for r in reversed(KNOWN_RECEIVERS)})
+
 
 def get_receiver_info(product_id: int) -> dict:
     """Returns hardcoded information about Logitech receiver.
@@ -216,7 +220,7 @@ def get_receiver_info(product_id: int) -> dict:
         Product info with mandatory vendor_id, product_id,
         usb_interface, name, receiver_kind
     """
-    for receiver in KNOWN_RECEIVERS:
-        if product_id == receiver.get("product_id"):
-            return receiver
-    raise ValueError(f"Unknown product ID '0x{product_id:02X}")
+    receiver = KNOWN_RECEIVERS_BY_PRODUCT_ID.get(product_id)
+    if receiver is None:
+        raise ValueError(f"Unknown product ID '0x{product_id:02X}")
+    return receiver
@@ -0,0 +1,97 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Capabilities of device models read when building settings, cached in model_cache.
+
+Building many settings takes requests for capabilities of the device, e.g. its DPI or report rate choices,
+the keys with per-key lighting or its LED zones and their effects. These only change with the model and
+its firmware, so the replies to the feature requests made while building are recorded in model_cache
+the first time, and later builds for the model are answered from them without requests.
+Replies are recorded rather than what is built from them, so that what is built can change with Solaar.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+
+from typing import Any
+from typing import Callable
+
+from . import model_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _section(name: str) -> str:
+    return f"capabilities/{name}"
+
+
+def _request_key(feature, function: int, params) -> str:
+    params = b"".join(struct.pack("B", p) if isinstance(p, int) else p for p in params)
+    return f"{int(feature):04X}{function:02X}{params.hex().upper()}"
+
+
+class _RecordingDevice:
+    """A device that answers feature requests from recorded replies, and records the replies to others.
+
+    Once closed it only passes requests on, as what is built may keep the device.
+    """
+
+    def __init__(self, device, replies: dict):
+        self._device = device
+        self.replies = replies  # request key -> reply in hex
+        self.recorded = False  # whether replies were added
+        self.failed = False  # whether a request got no reply, so that the replies are not complete
+
+    def feature_request(self, feature, function=0x00, *params, no_reply=False):
+        if self.replies is None or no_reply:
+            return self._device.feature_request(feature, function, *params, no_reply=no_reply)
+        key = _request_key(feature, function, params)
+        reply = self.replies.get(key)
+        if reply is not None:
+            return bytes.fromhex(reply)
+        reply = self._device.feature_request(feature, function, *params)
+        if reply is None:
+            self.failed = True
+        else:
+            self.replies[key] = reply.hex().upper()
+            self.recorded = True
+        return reply
+
+    def close(self):
+        self.replies = None
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+def build(device, name: str, build: Callable[[Any], Any]) -> Any:
+    """The result of build(device), answering its feature requests from the replies cached for the model under name.
+
+    Requests that have no cached reply are sent to the device, and the cache is updated when they all got replies.
+    """
+    model_key = getattr(device.features, "model_key", None) if device.features else None
+    if model_key is None:
+        return build(device)
+    recording = _RecordingDevice(device, dict(model_cache.get(model_key, _section(name)) or {}))
+    try:
+        result = build(recording)
+        if recording.recorded and not recording.failed:
+            model_cache.put(model_key, _section(name), recording.replies)
+        return result
+    finally:
+        recording.close()
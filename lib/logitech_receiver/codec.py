@@ -0,0 +1,168 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Encoding and decoding of HID++ short, long and DJ reports.
+
+All layouts are precompiled ``struct.Struct`` objects, so building or splitting a report
+costs one call into the struct module and no format string parsing.
+"""
+
+from __future__ import annotations
+
+import struct
+
+from typing import Iterator
+
+HIDPP_SHORT_MESSAGE_ID = 0x10
+HIDPP_LONG_MESSAGE_ID = 0x11
+DJ_MESSAGE_ID = 0x20
+DJ_LONG_MESSAGE_ID = 0x21
+
+SHORT_MESSAGE_SIZE = 7
+LONG_MESSAGE_SIZE = 20
+MEDIUM_MESSAGE_SIZE = 15
+MAX_READ_SIZE = 32
+
+# mapping from report_id to message length
+REPORT_LENGTHS = {
+    HIDPP_SHORT_MESSAGE_ID: SHORT_MESSAGE_SIZE,
+    HIDPP_LONG_MESSAGE_ID: LONG_MESSAGE_SIZE,
+    DJ_MESSAGE_ID: MEDIUM_MESSAGE_SIZE,
+    DJ_LONG_MESSAGE_ID: MAX_READ_SIZE,
+}
+
+# report ID, device number, payload padded with zeroes
+SHORT_REPORT = struct.Struct("!BB5s")
+LONG_REPORT = struct.Struct("!BB18s")
+DJ_REPORT = struct.Struct("!BB13s")
+# request ID (feature index or sub ID, function or address, software ID) at the start of a payload
+REQUEST_ID = struct.Struct("!H")
+# request ID, two zero bytes and a mark byte to recognize the reply
+PING = struct.Struct("!HBBB")
+
+ERROR_SUB_IDS = (0x8F, 0xFF)  # HID++ 1.0 and HID++ 2.0 error replies
+
+_BYTE = struct.Struct("B")
+
+
+class Frame:
+    """A decoded HID++ or DJ report: report ID, device number and payload.
+
+    Iterates as ``(report_id, devnumber, data)`` so it can be unpacked like a tuple.
+    """
+
+    __slots__ = ("report_id", "devnumber", "data")
+
+    def __init__(self, report_id: int, devnumber: int, data: bytes):
+        self.report_id = report_id
+        self.devnumber = devnumber
+        self.data = data
+
+    @property
+    def sub_id(self) -> int:
+        """The HID++ 1.0 sub ID or HID++ 2.0 feature index."""
+        return self.data[0]
+
+    @property
+    def address(self) -> int:
+        """The HID++ 1.0 register address or HID++ 2.0 function and software ID."""
+        return self.data[1]
+
+    @property
+    def is_error(self) -> bool:
+        return self.data[0] in ERROR_SUB_IDS
+
+    @property
+    def reply_key(self) -> bytes:
+        return reply_key(self.data)
+
+    def encode(self) -> bytes:
+        return encode(self.report_id, self.devnumber, self.data)
+
+    def __iter__(self) -> Iterator:
+        yield self.report_id
+        yield self.devnumber
+        yield self.data
+
+    def __eq__(self, other):
+        if isinstance(other, Frame):
+            return (self.report_id, self.devnumber, self.data) == (other.report_id, other.devnumber, other.data)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Frame({self.report_id:02X}, {self.devnumber:02X}, {self.data.hex().upper()})"
+
+
+_REPORTS = {
+    HIDPP_SHORT_MESSAGE_ID: SHORT_REPORT,
+    HIDPP_LONG_MESSAGE_ID: LONG_REPORT,
+    DJ_MESSAGE_ID: DJ_REPORT,
+}
+
+
+def encode(report_id: int, devnumber: int, data: bytes) -> bytes:
+    """Build a complete report, padding or truncating the payload to the size of the report."""
+    return _REPORTS[report_id].pack(report_id, devnumber, data)
+
+
+def encode_message(devnumber: int, data: bytes, long_message: bool = False) -> bytes:
+    """Build the HID++ report for data addressed to a device.
+
+    A long report is used when asked for, when the data does not fit into a short report,
+    or for long register (0x82) requests.
+    """
+    if long_message or len(data) > SHORT_MESSAGE_SIZE - 2 or data[:1] == b"\x82":
+        return LONG_REPORT.pack(HIDPP_LONG_MESSAGE_ID, devnumber, data)
+    return SHORT_REPORT.pack(HIDPP_SHORT_MESSAGE_ID, devnumber, data)
+
+
+def pack_params(params) -> bytes:
+    """Join request parameters, given as integers (one byte each) or bytes."""
+    if not params:
+        return b""
+    if len(params) == 1 and isinstance(params[0], bytes):  # already packed by the caller
+        return params[0]
+    try:
+        return bytes(params)  # all integers, the common case
+    except TypeError:
+        return b"".join(_BYTE.pack(p) if isinstance(p, int) else p for p in params)
+
+
+def encode_request(request_id: int, params: bytes = b"") -> bytes:
+    """Build the payload of a request: the 16-bit request ID followed by its parameters."""
+    return REQUEST_ID.pack(request_id) + params
+
+
+def encode_ping(request_id: int, mark: int) -> bytes:
+    return PING.pack(request_id, 0, 0, mark)
+
+
+def is_relevant(data: bytes | memoryview) -> bool:
+    """Check that data has the report ID and size of a HID++ or DJ report."""
+    return REPORT_LENGTHS.get(data[0]) == len(data)
+
+
+def reply_key(data: bytes) -> bytes:
+    """The first two bytes of the request a payload may be a reply to, skipping the sub ID of error replies."""
+    return data[1:3] if data[0] in ERROR_SUB_IDS else data[:2]
+
+
+def decode(data: bytes | memoryview) -> Frame:
+    """Split a report into report ID, device number and a copy of the payload.
+
+    Does not check the report, see ``is_relevant``.
+    """
+    return Frame(data[0], data[1], bytes(data[2:]))
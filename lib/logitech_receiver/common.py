@@ -18,17 +18,56 @@ from __future__ import annotations
 
 import binascii
 import dataclasses
+import threading
 
 from enum import IntEnum
+from typing import Callable
 from typing import Optional
 from typing import Union
 
-import yaml
-
 from solaar.i18n import _
 
 LOGITECH_VENDOR_ID = 0x046D
 
+# yaml takes a while to import and is only needed to read and write files, so it is imported when first used
+_yaml = None
+_yaml_lock = threading.Lock()
+_yaml_registrations = []  # functions adding constructors and representers, called once yaml is imported
+
+
+def on_yaml(register: Callable) -> Callable:
+    """Call register with the yaml module to add constructors and representers, once yaml is imported."""
+    with _yaml_lock:
+        if _yaml is None:
+            _yaml_registrations.append(register)
+            return register
+    register(_yaml)
+    return register
+
+
+def yaml_type(tag: str, cls):
+    """Load and dump instances of cls with its from_yaml and to_yaml methods, under tag."""
+
+    def register(yaml):
+        yaml.SafeLoader.add_constructor(tag, cls.from_yaml)
+        yaml.add_representer(cls, cls.to_yaml)
+
+    on_yaml(register)
+
+
+def yaml_module():
+    """The yaml module, with all constructors and representers added."""
+    global _yaml
+    with _yaml_lock:
+        if _yaml is None:
+            import yaml
+
+            for register in _yaml_registrations:
+                register(yaml)
+            _yaml_registrations.clear()
+            _yaml = yaml
+    return _yaml
+
 
 def crc16(data: bytes):
     """
@@ -350,8 +389,7 @@ class NamedInt(int):
         return dumper.represent_mapping("!NamedInt", {"value": int(data), "name": data.name}, flow_style=True)
 
 
-yaml.SafeLoader.add_constructor("!NamedInt", NamedInt.from_yaml)
-yaml.add_representer(NamedInt, NamedInt.to_yaml)
+yaml_type("!NamedInt", NamedInt)
 
 
 class NamedInts:
@@ -19,12 +19,16 @@
 import importlib
 import logging
 
+from solaar import mainloop
+
 logger = logging.getLogger(__name__)
 
 
 def notifications_available():
     """Checks if notification service is available."""
     notifications_supported = False
+    if mainloop.headless():
+        return notifications_supported
     try:
         import gi
 
@@ -36,7 +40,7 @@ def notifications_available():
         importlib.util.find_spec("gi.repository.Notify")
 
         notifications_supported = True
-    except ValueError as e:
+    except (ImportError, ValueError) as e:
         logger.warning(f"Notification service is not available: {e}")
     return notifications_supported
 
@@ -26,6 +26,7 @@ from typing import Protocol
 
 from solaar import configuration
 
+from . import capability_cache
 from . import descriptors
 from . import exceptions
 from . import hidpp10
@@ -56,6 +57,9 @@ class LowLevelInterface(Protocol):
     def request(self, handle, devnumber, request_id, *params, **kwargs):
         ...
 
+    def requests(self, handle, devnumber, calls, **kwargs) -> list:
+        ...
+
     def close(self, handle, *args, **kwargs) -> bool:
         ...
 
@@ -140,6 +144,7 @@ class Device:
         self.battery_info = None
         self.link_encrypted = None
         self._active = None  # lags self.online - is used to help determine when to setup devices
+        self.settings_shadow = settings.SettingsShadow()  # setting values known to be on the device
 
         self._feature_settings_checked = False
         self._gestures_lock = threading.Lock()
@@ -193,9 +198,9 @@ class Device:
             self.registers = self.descriptor.registers if self.descriptor.registers else []
 
         if self._protocol is not None:
-            self.features = None if self._protocol < 2.0 else hidpp20.FeaturesArray(self)
+            self.features = None if self._protocol < 2.0 else hidpp20.FeaturesArray(self, cached=True)
         else:
-            self.features = hidpp20.FeaturesArray(self)  # may be a 2.0 device; if not, it will fix itself later
+            self.features = hidpp20.FeaturesArray(self, cached=True)  # may be a 2.0 device; if not, it will fix itself later
 
         Device.instances.append(self)
 
@@ -296,9 +301,9 @@ class Device:
     def led_effects(self):
         if not self._led_effects and self.online and self.protocol >= 2.0:
             if hidpp20_constants.FEATURE.COLOR_LED_EFFECTS in self.features:
-                self._led_effects = hidpp20.LEDEffectsInfo(self)
+                self._led_effects = capability_cache.build(self, "led_effects", hidpp20.LEDEffectsInfo)
             elif hidpp20_constants.FEATURE.RGB_EFFECTS in self.features:
-                self._led_effects = hidpp20.RGBEffectsInfo(self)
+                self._led_effects = capability_cache.build(self, "rgb_effects", hidpp20.RGBEffectsInfo)
         return self._led_effects
 
     @property
@@ -355,6 +360,21 @@ class Device:
 
     @property
     def settings(self):
+        return self.detect_settings()
+
+    @property
+    def settings_detected(self) -> bool:
+        return self._settings is not None and self._feature_settings_checked
+
+    @property
+    def detected_settings(self) -> list:
+        """The settings detected so far, without waiting for or starting their detection."""
+        return list(self._settings or ())
+
+    def detect_settings(self, found: Optional[Callable] = None) -> list:
+        """The settings of the device, detected if need be, calling found with each one as it is detected.
+
+        Settings detected by an earlier or a concurrent call are not passed to found."""
         if not self._settings:
             with self._settings_lock:
                 if not self._settings:
@@ -369,11 +389,13 @@ class Device:
                                     raise e
                             if setting is not None:
                                 settings.append(setting)
+                                if found:
+                                    found(setting)
                     self._settings = settings
         if not self._feature_settings_checked:
             with self._settings_lock:
                 if not self._feature_settings_checked:
-                    self._feature_settings_checked = settings_templates.check_feature_settings(self, self._settings)
+                    self._feature_settings_checked = settings_templates.check_feature_settings(self, self._settings, found)
         return self._settings
 
     def battery(self):  # None  or  level, next, status, voltage
@@ -429,14 +451,17 @@ class Device:
             self.online = active
             was_active, self._active = self._active, active
             if active:
-                # Push settings for new devices when devices request software reconfiguration
-                # and when devices become active if they don't have wireless device status feature,
+                # Devices may have lost their settings when they are new or Solaar resumes, when they request
+                # software reconfiguration, and when they become active if they don't have wireless device status feature
                 if (
                     was_active is None
-                    or not was_active
                     or push
+                    or not was_active
                     and (not self.features or hidpp20_constants.FEATURE.WIRELESS_DEVICE_STATUS not in self.features)
                 ):
+                    self.settings_shadow.new_epoch()
+                # Push settings when devices become active or may have lost them, only writing what they don't have
+                if was_active is None or not was_active or push:
                     if logger.isEnabledFor(logging.INFO):
                         logger.info("%s pushing device settings %s", self, self.settings)
                     settings.apply_all_settings(self)
@@ -521,10 +546,34 @@ class Device:
                 protocol=self.protocol,
             )
 
+    def requests(self, calls):
+        """Makes several requests, without waiting for each reply before sending the next request.
+
+        :param calls: tuples of a request ID and its parameters.
+        :returns: the replies, in order, ``None`` for those that failed.
+        """
+        if self:
+            long = self.hidpp_long is True or (
+                self.hidpp_long is None and (self.bluetooth or self._protocol is not None and self._protocol >= 2.0)
+            )
+            return self.low_level.requests(
+                self.handle or self.receiver.handle, self.number, calls, long_message=long, protocol=self.protocol
+            )
+        return [None for _call in calls]
+
     def feature_request(self, feature, function=0x00, *params, no_reply=False):
         if self.protocol >= 2.0:
             return hidpp20.feature_request(self, feature, function, *params, no_reply=no_reply)
 
+    def feature_requests(self, feature, calls):
+        """Makes several requests to a feature, pipelined, see requests.
+
+        :param calls: tuples of a function and its parameters.
+        """
+        if self.protocol >= 2.0:
+            return hidpp20.feature_requests(self, feature, calls)
+        return [None for _call in calls]
+
     def ping(self):
         """Checks if the device is online, returns True of False"""
         long = self.hidpp_long is True or (
@@ -33,9 +33,7 @@ from typing import Any
 from typing import Dict
 from typing import Tuple
 
-import gi
 import psutil
-import yaml
 
 from keysyms import keysymdef
 
@@ -46,12 +44,20 @@ if platform.system() in ("Darwin", "Windows"):
 else:
     import evdev
 
+from solaar import mainloop
+
 from .common import NamedInt
+from .common import yaml_module
 from .hidpp20 import FEATURE
 from .special_keys import CONTROL
 
-gi.require_version("Gdk", "3.0")  # isort:skip
-from gi.repository import Gdk, GLib  # NOQA: E402 # isort:skip
+if mainloop.headless():  # no GDK, and so no keymap
+    Gdk = None
+else:
+    import gi
+
+    gi.require_version("Gdk", "3.0")
+    from gi.repository import Gdk
 
 if typing.TYPE_CHECKING:
     from .base import HIDPPNotification
@@ -62,7 +68,8 @@ logger = logging.getLogger(__name__)
 # See docs/rules.md for documentation
 #
 # Several capabilities of rules depend on aspects of GDK, X11, or XKB
-# As the Solaar GUI uses GTK, Glib and GDK are always available and are obtained from gi.repository
+# As the Solaar GUI uses GTK, Glib and GDK are available and are obtained from gi.repository,
+#   except when Solaar runs headless, where there is no GDK and a plain main loop stands in for GLib
 #
 # Process condition depends on X11 from python-xlib, and is probably not possible at all in Wayland
 # MouseProcess condition depends on X11 from python-xlib, and is probably not possible at all in Wayland
@@ -83,7 +90,7 @@ logger = logging.getLogger(__name__)
 # because there does not seem to be a non-X11 file for this set of key names
 
 # Setting up is complex because there are several systems that each provide partial facilities:
-# GDK - always available (when running with a window system) but only provides access to keymap
+# GDK - available when running with a window system and not headless, but only provides access to keymap
 # X11 - provides access to active process and process with window under mouse and current modifier keys
 # Xtest extension to X11 - provides input simulation, partly works under Wayland
 # Wayland - provides input simulation
@@ -98,7 +105,7 @@ _BUTTON_PRESS = 3
 
 CLICK, DEPRESS, RELEASE = "click", "depress", "release"
 
-gdisplay = Gdk.Display.get_default()  # can be None if Solaar is run without a full window system
+gdisplay = Gdk.Display.get_default() if Gdk else None  # can be None if Solaar is run without a full window system
 gkeymap = Gdk.Keymap.get_for_display(gdisplay) if gdisplay else None
 if logger.isEnabledFor(logging.INFO):
     logger.info("GDK Keymap %sset up", "" if gkeymap else "not ")
@@ -817,11 +824,11 @@ class Setting(Condition):
         return {"Setting": self.args[:]}
 
 
-MODIFIERS = {
-    "Shift": int(Gdk.ModifierType.SHIFT_MASK),
-    "Control": int(Gdk.ModifierType.CONTROL_MASK),
-    "Alt": int(Gdk.ModifierType.MOD1_MASK),
-    "Super": int(Gdk.ModifierType.MOD4_MASK),
+MODIFIERS = {  # masks of Gdk.ModifierType
+    "Shift": 1 << 0,  # SHIFT_MASK
+    "Control": 1 << 2,  # CONTROL_MASK
+    "Alt": 1 << 3,  # MOD1_MASK
+    "Super": 1 << 6,  # MOD4_MASK
 }
 MODIFIER_MASK = MODIFIERS["Shift"] + MODIFIERS["Control"] + MODIFIERS["Alt"] + MODIFIERS["Super"]
 
@@ -1426,10 +1433,11 @@ class Later(Action):
 
     def evaluate(self, feature, notification: HIDPPNotification, device, last_result):
         if self.delay and self.rule:
+            glib = mainloop.glib()
             if self.delay >= 1:
-                GLib.timeout_add_seconds(int(self.delay), Rule.once, self.rule, feature, notification, device, last_result)
+                glib.timeout_add_seconds(int(self.delay), Rule.once, self.rule, feature, notification, device, last_result)
             else:
-                GLib.timeout_add(int(self.delay * 1000), Rule.once, self.rule, feature, notification, device, last_result)
+                glib.timeout_add(int(self.delay * 1000), Rule.once, self.rule, feature, notification, device, last_result)
         return None
 
     def data(self):
@@ -1541,7 +1549,7 @@ def process_notification(device, notification: HIDPPNotification, feature):
             thumb_wheel_displacement = 0
         thumb_wheel_displacement += signed(notification.data[0:2])
 
-    GLib.idle_add(evaluate_rules, feature, notification, device)
+    mainloop.glib().idle_add(evaluate_rules, feature, notification, device)
 
 
 _XDG_CONFIG_HOME = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser(os.path.join("~", ".config"))
@@ -1558,6 +1566,7 @@ def _save_config_rule_file(file_name: str = _file_path):
     def blockseq_rep(dumper, data):
         return dumper.represent_sequence("tag:yaml.org,2002:seq", data, flow_style=True)
 
+    yaml = yaml_module()
     yaml.add_representer(inline_list, blockseq_rep)
 
     def convert(elem):
@@ -1611,7 +1620,7 @@ def _load_rule_config(file_path: str) -> Rule:
     try:
         with open(file_path) as config_file:
             loaded_rules = []
-            for loaded_rule in yaml.safe_load_all(config_file):
+            for loaded_rule in yaml_module().safe_load_all(config_file):
                 rule = Rule(loaded_rule, source=file_path)
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug("load rule: %s", rule)
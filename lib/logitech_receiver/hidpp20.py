@@ -15,6 +15,7 @@
 ## with this program; if not, write to the Free Software Foundation, Inc.,
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import abc
 import logging
 import socket
 import struct
@@ -26,14 +27,13 @@ from typing import List
 from typing import Optional
 from typing import Tuple
 
-import yaml
-
 from solaar.i18n import _
 from typing_extensions import Protocol
 
 from . import common
 from . import exceptions
 from . import hidpp10_constants
+from . import model_cache
 from . import special_keys
 from .common import Battery
 from .common import BatteryLevelApproximation
@@ -77,13 +77,24 @@ class Device(Protocol):
 
 
 class FeaturesArray(dict):
-    def __init__(self, device):
+    """The HID++ 2.0 features of a device, their indices and versions, looked up when first needed.
+
+    discover() reads the whole table at once, with pipelined requests.
+    With cached, the whole table is filled in at once from model_cache, or else read from the device
+    and stored there, using the model id and firmware of the device as key (model_key).
+    A cached table is only used if the number of features and the index of FEATURE_SET match.
+    """
+
+    def __init__(self, device, cached=False):
         assert device is not None
         self.supported = True  # Actually don't know whether it is supported yet
         self.device = device
         self.inverse = {}
         self.version = {}
         self.count = 0
+        self.cached = cached
+        self.model_key = None  # the key of the device in model_cache, once known
+        self.complete = False  # whether all features of the device are known
 
     def _check(self) -> bool:
         if not self.device.online:
@@ -107,11 +118,50 @@ class FeaturesArray(dict):
                     self.count = count[0] + 1  # ROOT feature not included in count
                     self[FEATURE.ROOT] = 0
                     self[FEATURE.FEATURE_SET] = fs_index
+                    if self.cached:
+                        self._fill(fs_index)
                     return True
             else:
                 self.supported = False
         return False
 
+    def _fill(self, fs_index: int):
+        key = self.model_key = model_cache.model_key(self.device.modelId, self.device.firmware)
+        if key is None:
+            return
+        table = model_cache.get(key, "features")
+        rows = table["features"] if table and table["count"] == self.count else ()
+        if [FEATURE.FEATURE_SET, fs_index] in (row[:2] for row in rows):
+            for feature, index, version in rows:
+                feature = FEATURE[feature]
+                self[feature] = index
+                self.version[feature] = version
+            self.complete = True
+        elif self._read_table():
+            features = [[int(f), i, self.version.get(f, 0)] for i, f in sorted(self.inverse.items())]
+            model_cache.put(key, "features", {"count": self.count, "features": features})
+
+    def _read_table(self) -> bool:
+        fs_index = super().get(FEATURE.FEATURE_SET)
+        missing = [index for index in range(self.count) if index not in self.inverse]
+        replies = self.device.requests([((fs_index << 8) + 0x10, index) for index in missing])
+        for index, response in zip(missing, replies):
+            if response:
+                feature = FEATURE[struct.unpack("!H", response[:2])[0]]
+                self[feature] = index
+                self.version[feature] = response[3]
+        self.complete = all(index in self.inverse for index in range(self.count))
+        return self.complete
+
+    def discover(self) -> bool:
+        """Find out all the features of the device at once, sending all the requests before waiting for their replies.
+
+        :returns: whether all the features are known.
+        """
+        if not self._check():
+            return False
+        return self.complete or self._read_table()
+
     def get_feature(self, index: int) -> Optional[NamedInt]:
         feature = self.inverse.get(index)
         if feature is not None:
@@ -129,6 +179,7 @@ class FeaturesArray(dict):
 
     def enumerate(self):  # return all features and their index, ordered by index
         if self._check():
+            self.discover()
             for index in range(self.count):
                 feature = self.get_feature(index)
                 yield feature, index
@@ -152,6 +203,9 @@ class FeaturesArray(dict):
             index = super().get(feature)
             if index is not None:
                 return index
+            if self.complete:
+                self[feature] = False
+                return False
             response = self.device.request(0x0000, struct.pack("!H", feature))
             if response:
                 index = response[0]
@@ -330,6 +384,12 @@ class ReprogrammableKeyV4(ReprogrammableKey):
         remap
             Which control ID to remap to; or 0 to keep current mapping.
         """
+        pkt = self._cid_reporting_params(flags, remap)
+        ret = self._device.feature_request(FEATURE.REPROG_CONTROLS_V4, 0x30, *pkt)
+        self._check_cid_reporting_reply(pkt, ret)
+
+    def _cid_reporting_params(self, flags: Dict[NamedInt, bool] = None, remap: int = 0) -> tuple:
+        """The parameters of a `setCidReporting` request, see _setCidReporting, updating the known mapping."""
         flags = flags if flags else {}  # See flake8 B006
 
         # if special_keys.MAPPING_FLAG.raw_XY_diverted in flags and flags[special_keys.MAPPING_FLAG.raw_XY_diverted]:
@@ -370,10 +430,11 @@ class ReprogrammableKeyV4(ReprogrammableKey):
         if remap != 0:  # update mapping if changing (even if not already read)
             self._mapped_to = remap
 
-        pkt = tuple(struct.pack("!HBH", self._cid, bfield & 0xFF, remap))
         # TODO: to fully support version 4 of REPROG_CONTROLS_V4, append `(bfield >> 8) & 0xff` here.
         # But older devices might behave oddly given that byte, so we don't send it.
-        ret = self._device.feature_request(FEATURE.REPROG_CONTROLS_V4, 0x30, *pkt)
+        return tuple(struct.pack("!HBH", self._cid, bfield & 0xFF, remap))
+
+    def _check_cid_reporting_reply(self, pkt: tuple, ret):
         if ret is None or struct.unpack("!BBBBB", ret[:5]) != pkt and logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"REPROG_CONTROLS_v4 setCidReporting on device {self._device} didn't echo request packet.")
 
@@ -444,8 +505,14 @@ class PersistentRemappableAction:
             return True
 
 
-class KeysArray:
-    """A sequence of key mappings supported by a HID++ 2.0 device."""
+class KeysArray(abc.ABC):
+    """A sequence of key mappings supported by a HID++ 2.0 device.
+
+    The static part of each key, e.g. its control id, is read once per model and firmware
+    and then taken from model_cache, only the mapping and reporting state is read from the device.
+    """
+
+    _section = None  # the section of model_cache with the static part of the keys
 
     def __init__(self, device, count, version):
         assert device is not None
@@ -460,14 +527,45 @@ class KeysArray:
                 logger.error(f"Trying to read keys on device {device} which has no REPROG_CONTROLS(_VX) support.")
             self.keyversion = None
         self.keys = [None] * count
+        self._cid_index = {}  # control id -> index in keys
+        self._complete = False  # whether all keys have been queried
+        self._model_key = self.device.features.model_key
+        rows = model_cache.get(self._model_key, self._section) if self._model_key else None
+        self._cached = bool(rows) and len(rows) == count
+        self._rows = rows if self._cached else [None] * count  # the static part of each key
 
     def _ensure_all_keys_queried(self):
         """The retrieval of key information is lazy, but for certain functionality
         we need to know all keys. This function makes sure that's the case."""
+        if self._complete:
+            return
         with self.lock:  # don't want two threads doing this
             for i, k in enumerate(self.keys):
                 if k is None:
                     self._query_key(i)
+            self._complete = all(k is not None for k in self.keys)
+            if self._complete and not self._cached and self._model_key:
+                model_cache.put(self._model_key, self._section, self._rows)
+                self._cached = True
+
+    def _query_key(self, index: int):
+        if index < 0 or index >= len(self.keys):
+            raise IndexError(index)
+        row = self._rows[index] or self._read_row(index)
+        if row:
+            self._rows[index] = row
+            self.keys[index] = self._make_key(index, row)
+            self._cid_index[row[0]] = index
+        elif logger.isEnabledFor(logging.WARNING):
+            logger.warning(f"Key with index {index} was expected to exist but device doesn't report it.")
+
+    @abc.abstractmethod
+    def _read_row(self, index: int) -> Optional[list]:
+        """The static part of a key as read from the device, starting with its control id."""
+
+    @abc.abstractmethod
+    def _make_key(self, index: int, row: list):
+        """The key at index, from the static part of it."""
 
     def __getitem__(self, index):
         if isinstance(index, int):
@@ -484,10 +582,11 @@ class KeysArray:
             return [self.__getitem__(i) for i in range(*indices)]
 
     def index(self, value):
-        self._ensure_all_keys_queried()
-        for index, k in enumerate(self.keys):
-            if k is not None and int(value) == int(k.key):
-                return index
+        index = self._cid_index.get(int(value))
+        if index is None and not self._complete:
+            self._ensure_all_keys_queried()
+            index = self._cid_index.get(int(value))
+        return index
 
     def __iter__(self):
         for k in range(0, len(self.keys)):
@@ -498,6 +597,8 @@ class KeysArray:
 
 
 class KeysArrayV2(KeysArray):
+    _section = "REPROG_CONTROLS"
+
     def __init__(self, device: Device, count, version=1):
         super().__init__(device, count, version)
         """The mapping from Control IDs to their native Task IDs.
@@ -512,39 +613,68 @@ class KeysArrayV2(KeysArray):
         A key k can only be remapped to targets in groups within k.group_mask."""
         self.group_cids = {g: [] for g in special_keys.CID_GROUP}
 
-    def _query_key(self, index: int):
-        if index < 0 or index >= len(self.keys):
-            raise IndexError(index)
+    def _read_row(self, index: int) -> Optional[list]:
         keydata = self.device.feature_request(FEATURE.REPROG_CONTROLS, 0x10, index)
         if keydata:
-            cid, tid, flags = struct.unpack("!HHB", keydata[:5])
-            self.keys[index] = ReprogrammableKey(self.device, index, cid, tid, flags)
-            self.cid_to_tid[cid] = tid
-        elif logger.isEnabledFor(logging.WARNING):
-            logger.warning(f"Key with index {index} was expected to exist but device doesn't report it.")
+            return list(struct.unpack("!HHB", keydata[:5]))
+
+    def _make_key(self, index: int, row: list):
+        cid, tid, flags = row
+        self.cid_to_tid[cid] = tid
+        return ReprogrammableKey(self.device, index, cid, tid, flags)
 
 
 class KeysArrayV4(KeysArrayV2):
+    _section = "REPROG_CONTROLS_V4"
+
     def __init__(self, device, count):
         super().__init__(device, count, 4)
 
-    def _query_key(self, index: int):
-        if index < 0 or index >= len(self.keys):
-            raise IndexError(index)
+    def _read_row(self, index: int) -> Optional[list]:
         keydata = self.device.feature_request(FEATURE.REPROG_CONTROLS_V4, 0x10, index)
         if keydata:
             cid, tid, flags1, pos, group, gmask, flags2 = struct.unpack("!HHBBBBB", keydata[:9])
-            flags = flags1 | (flags2 << 8)
-            self.keys[index] = ReprogrammableKeyV4(self.device, index, cid, tid, flags, pos, group, gmask)
-            self.cid_to_tid[cid] = tid
-            if group != 0:  # 0 = does not belong to a group
-                self.group_cids[special_keys.CID_GROUP[group]].append(cid)
-        elif logger.isEnabledFor(logging.WARNING):
-            logger.warning(f"Key with index {index} was expected to exist but device doesn't report it.")
+            return [cid, tid, flags1 | (flags2 << 8), pos, group, gmask]
+
+    def _make_key(self, index: int, row: list):
+        cid, tid, flags, pos, group, gmask = row
+        self.cid_to_tid[cid] = tid
+        if group != 0:  # 0 = does not belong to a group
+            self.group_cids[special_keys.CID_GROUP[group]].append(cid)
+        return ReprogrammableKeyV4(self.device, index, cid, tid, flags, pos, group, gmask)
+
+    def set_cid_reporting(self, changes) -> list:
+        """Sends `setCidReporting` requests for several controls, pipelined as each request is for one control.
+
+        :param changes: tuples of a control, a dictionary of mapping flags to set/unset and a control ID to remap to (or 0).
+        :returns: the replies, in order, ``None`` for those that failed or had invalid parameters.
+        """
+        keys, pkts = [], []
+        for cid, flags, remap in changes:
+            key = self[self.index(cid)]
+            try:
+                pkt = key._cid_reporting_params(flags, remap)
+            except exceptions.FeatureNotSupported as e:
+                pkt = None
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning("%s", e)
+            keys.append(key)
+            pkts.append(pkt)
+        calls = [(0x30, *pkt) for pkt in pkts if pkt is not None]
+        replies = iter(self.device.feature_requests(FEATURE.REPROG_CONTROLS_V4, calls))
+        results = []
+        for key, pkt in zip(keys, pkts):
+            ret = next(replies) if pkt is not None else None
+            if pkt is not None:
+                key._check_cid_reporting_reply(pkt, ret)
+            results.append(ret)
+        return results
 
 
 # we are only interested in the current host, so use 0xFF for the host throughout
 class KeysArrayPersistent(KeysArray):
+    _section = "PERSISTENT_REMAPPABLE_ACTION"
+
     def __init__(self, device, count):
         super().__init__(device, count, 5)
         self._capabilities = None
@@ -557,45 +687,44 @@ class KeysArrayPersistent(KeysArray):
             self._capabilities = struct.unpack("!H", capabilities[:2])[0]  # flags saying what the mappings are possible
         return self._capabilities
 
-    def _query_key(self, index: int):
-        if index < 0 or index >= len(self.keys):
-            raise IndexError(index)
+    def _read_row(self, index: int) -> Optional[list]:
         keydata = self.device.feature_request(FEATURE.PERSISTENT_REMAPPABLE_ACTION, 0x20, index, 0xFF)
         if keydata:
-            key = struct.unpack("!H", keydata[:2])[0]
-            mapped_data = self.device.feature_request(
-                FEATURE.PERSISTENT_REMAPPABLE_ACTION,
-                0x30,
-                key >> 8,
-                key & 0xFF,
-                0xFF,
-            )
-            if mapped_data:
-                _ignore, _ignore, actionId, remapped, modifiers, status = struct.unpack("!HBBHBB", mapped_data[:8])
-            else:
-                actionId = remapped = modifiers = status = 0
-            actionId = special_keys.ACTIONID[actionId]
-            if actionId == special_keys.ACTIONID.Key:
-                remapped = special_keys.USB_HID_KEYCODES[remapped]
-            elif actionId == special_keys.ACTIONID.Mouse:
-                remapped = special_keys.MOUSE_BUTTONS[remapped]
-            elif actionId == special_keys.ACTIONID.Hscroll:
-                remapped = special_keys.HORIZONTAL_SCROLL[remapped]
-            elif actionId == special_keys.ACTIONID.Consumer:
-                remapped = special_keys.HID_CONSUMERCODES[remapped]
-            elif actionId == special_keys.ACTIONID.Empty:  # purge data from empty value
-                remapped = modifiers = 0
-            self.keys[index] = PersistentRemappableAction(
-                self.device,
-                index,
-                key,
-                actionId,
-                remapped,
-                modifiers,
-                status,
-            )
-        elif logger.isEnabledFor(logging.WARNING):
-            logger.warning(f"Key with index {index} was expected to exist but device doesn't report it.")
+            return list(struct.unpack("!H", keydata[:2]))
+
+    def _make_key(self, index: int, row: list):
+        (key,) = row
+        mapped_data = self.device.feature_request(
+            FEATURE.PERSISTENT_REMAPPABLE_ACTION,
+            0x30,
+            key >> 8,
+            key & 0xFF,
+            0xFF,
+        )
+        if mapped_data:
+            _ignore, _ignore, actionId, remapped, modifiers, status = struct.unpack("!HBBHBB", mapped_data[:8])
+        else:
+            actionId = remapped = modifiers = status = 0
+        actionId = special_keys.ACTIONID[actionId]
+        if actionId == special_keys.ACTIONID.Key:
+            remapped = special_keys.USB_HID_KEYCODES[remapped]
+        elif actionId == special_keys.ACTIONID.Mouse:
+            remapped = special_keys.MOUSE_BUTTONS[remapped]
+        elif actionId == special_keys.ACTIONID.Hscroll:
+            remapped = special_keys.HORIZONTAL_SCROLL[remapped]
+        elif actionId == special_keys.ACTIONID.Consumer:
+            remapped = special_keys.HID_CONSUMERCODES[remapped]
+        elif actionId == special_keys.ACTIONID.Empty:  # purge data from empty value
+            remapped = modifiers = 0
+        return PersistentRemappableAction(
+            self.device,
+            index,
+            key,
+            actionId,
+            remapped,
+            modifiers,
+            status,
+        )
 
 
 # Param Ids for feature GESTURE_2
@@ -1012,11 +1141,10 @@ class LEDEffectSetting:  # an effect plus its parameters
         return isinstance(other, self.__class__) and self.to_bytes() == other.to_bytes()
 
     def __str__(self):
-        return yaml.dump(self, width=float("inf")).rstrip("\n")
+        return common.yaml_module().dump(self, width=float("inf")).rstrip("\n")
 
 
-yaml.SafeLoader.add_constructor("!LEDEffectSetting", LEDEffectSetting.from_yaml)
-yaml.add_representer(LEDEffectSetting, LEDEffectSetting.to_yaml)
+common.yaml_type("!LEDEffectSetting", LEDEffectSetting)
 
 
 class LEDEffectInfo:  # an effect that a zone can do
@@ -1196,8 +1324,7 @@ class Button:
         )
 
 
-yaml.SafeLoader.add_constructor("!Button", Button.from_yaml)
-yaml.add_representer(Button, Button.to_yaml)
+common.yaml_type("!Button", Button)
 
 
 class OnboardProfile:
@@ -1283,8 +1410,7 @@ class OnboardProfile:
                 print("       G-BUTTON", i + 1, self.gbuttons[i])
 
 
-yaml.SafeLoader.add_constructor("!OnboardProfile", OnboardProfile.from_yaml)
-yaml.add_representer(OnboardProfile, OnboardProfile.to_yaml)
+common.yaml_type("!OnboardProfile", OnboardProfile)
 
 OnboardProfilesVersion = 3
 
@@ -1410,11 +1536,10 @@ class OnboardProfiles:
         return written
 
     def show(self):
-        print(yaml.dump(self))
+        print(common.yaml_module().dump(self))
 
 
-yaml.SafeLoader.add_constructor("!OnboardProfiles", OnboardProfiles.from_yaml)
-yaml.add_representer(OnboardProfiles, OnboardProfiles.to_yaml)
+common.yaml_type("!OnboardProfiles", OnboardProfiles)
 
 
 def feature_request(device, feature, function=0x00, *params, no_reply=False):
@@ -1424,6 +1549,18 @@ def feature_request(device, feature, function=0x00, *params, no_reply=False):
             return device.request((feature_index << 8) + (function & 0xFF), *params, no_reply=no_reply)
 
 
+def feature_requests(device, feature, calls) -> list:
+    """Makes several requests to a feature, without waiting for each reply before sending the next request.
+
+    :param calls: tuples of a function and its parameters.
+    :returns: the replies, in order, ``None`` for those that failed.
+    """
+    if device.online and device.features and feature in device.features:
+        feature_index = device.features[feature]
+        return device.requests([((feature_index << 8) + (function & 0xFF), *params) for function, *params in calls])
+    return [None for _call in calls]
+
+
 # voltage to remaining charge from Logitech
 battery_voltage_remaining = (
     (4186, 100),
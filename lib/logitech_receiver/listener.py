@@ -17,10 +17,15 @@
 
 import logging
 import queue
+import select
 import threading
 
 from . import base
 from . import exceptions
+from . import notification_ring
+from . import stats
+from . import timeouts
+from .hidpp20_constants import FEATURE
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +50,11 @@ class _ThreadedHandle:
         self._local.handle = handle
         self._handles = [handle]
 
+    def _attach(self, handle):
+        """Use a handle opened on another thread on the current thread too."""
+        if self._local:
+            self._local.handle = handle
+
     def _open(self):
         handle = base.open_path(self.path)
         if handle is None:
@@ -68,8 +78,7 @@ class _ThreadedHandle:
     @property
     def notifications_hook(self):
         if self._listener:
-            assert isinstance(self._listener, threading.Thread)
-            if threading.current_thread() == self._listener:
+            if threading.current_thread() == self._listener.thread:
                 return self._listener._notifications_hook
 
     def __del__(self):
@@ -101,31 +110,155 @@ class _ThreadedHandle:
 
 
 # How long to wait during a read for the next packet, in seconds.
+# Only used when a listener's handle cannot be waited on with epoll.
 # Ideally this should be rather long (10s ?), but the read is blocking and this means that when the thread
 # is signalled to stop, it would take a while for it to acknowledge it.
 # Forcibly closing the file handle on another thread does _not_ interrupt the read on Linux systems.
 _EVENT_READ_TIMEOUT = 1.0  # in seconds
 
+# How many notifications can be queued while a notification is being handled, see notification_ring
+QUEUE_CAPACITY = 64
+
+# How many threads deliver the notifications of listeners whose handles are waited on with epoll
+_WORKERS = 4
 
-class EventsListener(threading.Thread):
-    """Listener thread for notifications from the Unifying Receiver.
+_KEY_FEATURES = (FEATURE.REPROG_CONTROLS_V4, FEATURE.GKEY, FEATURE.MKEYS, FEATURE.MR)
+_BATTERY_FEATURES = (FEATURE.BATTERY_STATUS, FEATURE.BATTERY_VOLTAGE, FEATURE.UNIFIED_BATTERY, FEATURE.ADC_MEASUREMENT)
+
+
+class _EventsLoop(threading.Thread):
+    """One thread that waits on all open listener handles with epoll, and a few workers that deliver their notifications.
+
+    The thread sleeps in epoll until a handle has data, so an idle loop does not wake up at all.
+    A handle with data is handed to a worker, which reads and delivers everything available on it.
+    Handles are registered one-shot and only re-armed once their worker is done, so each listener
+    is handled by one worker at a time and its notifications are delivered in order.
+    There are at most _WORKERS workers however many receivers are attached,
+    so a slow callback holds up its own receiver but not the others while a worker is free.
+    """
+
+    def __init__(self):
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self._epoll = select.epoll()
+        self._lock = threading.Lock()
+        self._listeners = {}  # file descriptor -> listener
+        self._jobs = queue.SimpleQueue()
+        self._workers = []
+
+    def add(self, listener):
+        with self._lock:
+            if len(self._workers) < _WORKERS:
+                worker = threading.Thread(target=self._work, name=f"EventsWorker-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._submit(listener, listener._setup)
+
+    def stop(self, listener):
+        with self._lock:
+            if not listener._busy and self._listeners.get(listener._fd) is listener:
+                self._submit(listener, listener._handle_events, 0)  # torn down once done
+            # else its running job, if any, tears it down when done
+
+    def _submit(self, listener, function, *args):
+        listener._busy = True
+        self._jobs.put((listener, function, args))
+
+    def run(self):
+        while True:
+            for fd, mask in self._epoll.poll():
+                with self._lock:
+                    listener = self._listeners.get(fd)
+                    if listener is not None and not listener._busy:
+                        self._submit(listener, listener._handle_events, mask)
+
+    def _work(self):
+        while True:
+            listener, function, args = self._jobs.get()
+            listener._attach()
+            try:
+                function(*args)
+            except Exception:
+                logger.exception("%s: handling events", listener.name)
+                listener._active = False
+            fd = listener._fd
+            with self._lock:
+                listener._busy = False
+                if listener._active:
+                    try:
+                        if self._listeners.get(fd) is listener:
+                            self._epoll.modify(fd, select.EPOLLIN | select.EPOLLONESHOT)
+                        else:
+                            self._listeners[fd] = listener
+                            self._epoll.register(fd, select.EPOLLIN | select.EPOLLONESHOT)
+                        continue
+                    except (OSError, ValueError):  # the handle has been closed
+                        logger.warning("%s: handle closed", listener.name)
+                        listener._active = False
+                if self._listeners.get(fd) is listener:
+                    del self._listeners[fd]
+                    try:
+                        self._epoll.unregister(fd)
+                    except (OSError, ValueError):  # the handle may already be closed
+                        pass
+            listener._teardown()
+
+
+_events_loop = None
+_events_loop_lock = threading.Lock()
+
+
+def _get_events_loop():
+    global _events_loop
+    with _events_loop_lock:
+        if _events_loop is None:
+            _events_loop = _EventsLoop()
+            _events_loop.start()
+    return _events_loop
+
+
+class EventsListener:
+    """Listener for notifications from a Unifying Receiver or a directly connected device.
     Incoming packets will be passed to the callback function in sequence.
+
+    Listeners with file descriptor handles (Linux) share one epoll-driven thread and a few workers
+    that deliver their notifications, other listeners each run their own thread that polls the handle.
     """
 
-    def __init__(self, receiver, notifications_callback):
+    def __init__(self, receiver, notifications_callback, queue_capacity=QUEUE_CAPACITY):
         try:
             path_name = receiver.path.split("/")[2]
         except IndexError:
             path_name = receiver.path
-        super().__init__(name=self.__class__.__name__ + ":" + path_name)
-        self.daemon = True
+        self.name = self.__class__.__name__ + ":" + path_name
+        self.thread = None  # the thread delivering notifications
         self._active = False
+        self._stopped = threading.Event()
+        self._fd = None  # the file descriptor waited on by the events loop, if any
+        self._busy = False  # whether a worker of the events loop is handling this listener
         self.receiver = receiver
-        self._queued_notifications = queue.Queue(16)
+        self._queued_notifications = notification_ring.NotificationRing(
+            queue_capacity, self._notification_kind, self._notification_dropped, self._notification_coalesced
+        )
         self._notifications_callback = notifications_callback
 
-    def run(self):
+    def start(self):
         self._active = True
+        if isinstance(self.receiver.handle, int) and hasattr(select, "epoll"):
+            self._fd = self.receiver.handle
+            _get_events_loop().add(self)
+        else:
+            self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def _attach(self):
+        """Deliver on the current thread, a worker of the events loop, reading from the handle the loop waits on."""
+        self.thread = threading.current_thread()
+        handle = self.receiver.handle
+        if isinstance(handle, _ThreadedHandle):
+            handle._attach(self._fd)
+
+    def _setup(self):
+        self.thread = threading.current_thread()
         # replace the handle with a threaded one
         self.receiver.handle = _ThreadedHandle(self, self.receiver.path, self.receiver.handle)
         if logger.isEnabledFor(logging.INFO):
@@ -136,49 +269,124 @@ class EventsListener(threading.Thread):
             if self.receiver.ping():
                 self.receiver.changed(active=True, reason="initialization")
 
+    def _teardown(self):
+        self._active = False
+        self._queued_notifications = None
+        try:
+            self.has_stopped()
+        except Exception:
+            logger.exception("%s: stopping", self.name)
+        finally:
+            self._stopped.set()
+
+    def run(self):
+        """Deliver notifications on a thread of this listener's own."""
+        self._setup()
         while self._active:
             if self._queued_notifications.empty():
                 try:
                     n = base.read(self.receiver.handle, _EVENT_READ_TIMEOUT)
                 except exceptions.NoReceiver:
-                    logger.warning("%s disconnected", self.receiver.name)
-                    self.receiver.close()
+                    self._disconnected()
                     break
                 if n:
-                    n = base.make_notification(*n)
+                    self._deliver(base.make_notification(*n))
             else:
-                n = self._queued_notifications.get()  # deliver any queued notifications
-            if n:
-                try:
-                    self._notifications_callback(n)
-                except Exception:
-                    logger.exception("processing %s", n)
+                self._deliver(self._queued_notifications.get())  # deliver any queued notifications
+        self._teardown()
 
-        del self._queued_notifications
-        self.has_stopped()
+    def _handle_events(self, mask):
+        if mask & (select.EPOLLERR | select.EPOLLHUP):
+            self._disconnected()
+        elif mask & select.EPOLLIN:
+            self._read_available()
+
+    def _read_available(self):
+        """Deliver everything waiting in the handle, and any notifications queued while doing so."""
+        while self._active:
+            try:
+                n = base.read(self.receiver.handle, 0)
+            except exceptions.NoReceiver:
+                self._disconnected()
+                return
+            if not n:
+                return
+            self._deliver(base.make_notification(*n))
+            while self._active and not self._queued_notifications.empty():
+                self._deliver(self._queued_notifications.get())
+
+    def _deliver(self, n):
+        if n:
+            stats.record_notification(self.receiver.handle, n.devnumber)
+            if n.sub_id != 0x41:  # any other notification from or about the device shows that it is awake
+                timeouts.record_activity(self.receiver.handle, n.devnumber)
+            elif n.address == 0x02 or not (n.data[:1] and n.data[0] & 0x40):  # connection with link established
+                timeouts.record_activity(self.receiver.handle, n.devnumber, connected=True)
+            try:
+                self._notifications_callback(n)
+            except Exception:
+                logger.exception("processing %s", n)
+
+    def _disconnected(self):
+        logger.warning("%s disconnected", self.receiver.name)
+        self._active = False
+        self.receiver.close()
 
     def stop(self):
         """Tells the listener to stop as soon as possible."""
         self._active = False
+        if self._fd is not None:
+            _get_events_loop().stop(self)
+        elif self.thread is None:  # stopped before it was ever started
+            self._stopped.set()
+
+    def join(self, timeout=None):
+        """Wait until the listener has stopped."""
+        if self.thread is not threading.current_thread():
+            self._stopped.wait(timeout)
+
+    def is_alive(self):
+        return (self.thread is not None or self._fd is not None) and not self._stopped.is_set()
 
     def has_started(self):
-        """Called right after the thread has started, and before it starts
+        """Called right after the listener has started, and before it starts
         reading notification packets."""
         pass
 
     def has_stopped(self):
-        """Called right before the thread stops."""
+        """Called right before the listener stops."""
         pass
 
     def _notifications_hook(self, n):
         # Only consider unhandled notifications that were sent from this thread,
         # i.e. triggered by a callback handling a previous notification.
-        assert threading.current_thread() == self
-        if self._active:  # and threading.current_thread() == self:
+        assert threading.current_thread() == self.thread
+        if self._active:  # and threading.current_thread() == self.thread:
             # if logger.isEnabledFor(logging.DEBUG):
             #     logger.debug("queueing unhandled %s", n)
-            if not self._queued_notifications.full():
-                self._queued_notifications.put(n)
+            self._queued_notifications.put(n)
+
+    def _notification_kind(self, n) -> int:
+        """Classify a notification for the queue, from what is already known about the features of its device."""
+        if n.sub_id >= 0x40:  # HID++ 1.0 or DJ notifications, e.g. connection changes
+            return notification_ring.KEEP
+        dev = self.receiver if self.receiver.isDevice else getattr(self.receiver, "_devices", {}).get(n.devnumber)
+        features = getattr(dev, "features", None)  # not its truth value, that may ask the device
+        feature = features.inverse.get(n.sub_id) if features is not None else None
+        if feature is None or (feature in _KEY_FEATURES and n.address == 0x00):
+            return notification_ring.KEEP  # key presses and releases, or not known not to be
+        if feature == FEATURE.REPROG_CONTROLS_V4 and n.address == 0x10:
+            return notification_ring.MOTION
+        if feature in _BATTERY_FEATURES and n.address == 0x00:
+            return notification_ring.LATEST
+        return notification_ring.OTHER
+
+    def _notification_dropped(self, n):
+        logger.warning("%s: notification queue full, dropped %s", self.name, n)
+        stats.record_notification_dropped(self.receiver.handle, n.devnumber)
+
+    def _notification_coalesced(self, n):
+        stats.record_notification_coalesced(self.receiver.handle, n.devnumber)
 
     def __bool__(self):
         return bool(self._active and self.receiver)
@@ -0,0 +1,99 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Tables of device models, cached in a file.
+
+Finding out which features a device has, and e.g. which controls, takes a request per entry,
+but these tables only change with the model and its firmware, so they are kept by model id
+and firmware versions in ``$XDG_CACHE_HOME/solaar/models.json``, each in a section of the entry
+for the model. Users of a table check that it still matches the device, e.g. by the number of entries.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from typing import Any
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+_XDG_CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+_file_path = os.path.join(_XDG_CACHE_HOME, "solaar", "models.json")
+
+_VERSION = 1  # change when what is cached changes
+_MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_cache = None  # model key -> section -> table
+
+
+def model_key(model_id: str | None, firmware: Iterable) -> str | None:
+    """The cache key of a device from its model id and firmware, None if either is not known."""
+    versions = ";".join(f"{int(fw.kind)}:{fw.name}:{fw.version}" for fw in firmware)
+    if model_id and versions:
+        return f"{model_id}/{versions}"
+
+
+def _load() -> dict:
+    try:
+        with open(_file_path) as cache_file:
+            loaded = json.load(cache_file)
+        if loaded.get("version") == _VERSION:
+            return loaded["models"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.info("ignoring model cache %s: %s", _file_path, e)
+    return {}
+
+
+def _save(cache: dict):
+    try:
+        directory = os.path.dirname(_file_path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".models.", delete=False) as cache_file:
+            json.dump({"version": _VERSION, "models": cache}, cache_file)
+        os.replace(cache_file.name, _file_path)
+    except Exception as e:
+        logger.info("could not save model cache %s: %s", _file_path, e)
+
+
+def get(key: str, section: str) -> Any:
+    """The table cached in section for the model with key, None if there is none."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = _load()
+        return _cache.get(key, {}).get(section)
+
+
+def put(key: str, section: str, table: Any):
+    """Cache a table, which has to be JSON serializable, in section for the model with key."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = _load()
+        entry = _cache.pop(key, {})  # so that the least recently stored entries are dropped first
+        entry[section] = table
+        _cache[key] = entry
+        while len(_cache) > _MAX_ENTRIES:
+            del _cache[next(iter(_cache))]
+        _save(_cache)
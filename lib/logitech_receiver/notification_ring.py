@@ -0,0 +1,135 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""A bounded queue of notifications that drops and merges redundant ones instead of important ones.
+
+Each notification is classified when queued:
+ - KEEP notifications, e.g. key presses and releases or connection changes, are never dropped;
+ - MOTION notifications are raw XY movements, successive ones from the same device are merged
+   by adding up their deltas;
+ - LATEST notifications, e.g. battery reports, replace any earlier queued one of the same kind,
+   as only the latest one matters;
+ - OTHER notifications can be dropped.
+
+When the queue is full the oldest MOTION or LATEST notification makes room, or else the oldest OTHER one.
+If there is none, a new KEEP notification is queued past the capacity and any other new one is dropped.
+"""
+
+from __future__ import annotations
+
+import collections
+import struct
+
+from typing import Callable
+
+from .base import HIDPPNotification
+
+KEEP = 0
+MOTION = 1
+LATEST = 2
+OTHER = 3
+
+_DELTAS = struct.Struct("!hh")
+
+
+def _clamp(value: int) -> int:
+    return max(-0x8000, min(0x7FFF, value))
+
+
+def merge_motion(first: HIDPPNotification, second: HIDPPNotification) -> HIDPPNotification:
+    """A raw XY notification with the movement of both, and everything else from the second one."""
+    dx1, dy1 = _DELTAS.unpack_from(first.data)
+    dx2, dy2 = _DELTAS.unpack_from(second.data)
+    data = _DELTAS.pack(_clamp(dx1 + dx2), _clamp(dy1 + dy2)) + second.data[_DELTAS.size :]
+    return HIDPPNotification(second.report_id, second.devnumber, second.sub_id, second.address, data)
+
+
+def _same_kind(a: HIDPPNotification, b: HIDPPNotification) -> bool:
+    return a.devnumber == b.devnumber and a.sub_id == b.sub_id and a.address == b.address
+
+
+class NotificationRing:
+    """Notifications waiting to be delivered, only to be used from one thread.
+
+    :param classify: gives the kind (KEEP, MOTION, LATEST or OTHER) of a notification.
+    :param on_dropped: called with each notification that is dropped.
+    :param on_coalesced: called with each notification that is merged into or replaced by another one.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        classify: Callable[[HIDPPNotification], int],
+        on_dropped: Callable[[HIDPPNotification], None] | None = None,
+        on_coalesced: Callable[[HIDPPNotification], None] | None = None,
+    ):
+        assert capacity > 0
+        self.capacity = capacity
+        self.dropped = 0
+        self.coalesced = 0
+        self._classify = classify
+        self._on_dropped = on_dropped
+        self._on_coalesced = on_coalesced
+        self._entries = collections.deque()  # (kind, notification)
+
+    def put(self, n: HIDPPNotification):
+        kind = self._classify(n)
+        entries = self._entries
+        if kind == MOTION and entries:
+            last_kind, last = entries[-1]
+            if last_kind == MOTION and _same_kind(last, n):
+                entries[-1] = (MOTION, merge_motion(last, n))
+                self._coalesce(last)
+                return
+        elif kind == LATEST:
+            for index, (queued_kind, queued) in enumerate(entries):
+                if queued_kind == LATEST and _same_kind(queued, n):
+                    del entries[index]
+                    self._coalesce(queued)
+                    break
+        if len(entries) >= self.capacity and not self._evict((MOTION, LATEST)):
+            evicted = kind in (KEEP, OTHER) and self._evict((OTHER,))
+            if not evicted and kind != KEEP:
+                self._drop(n)
+                return
+        entries.append((kind, n))
+
+    def get(self) -> HIDPPNotification | None:
+        return self._entries.popleft()[1] if self._entries else None
+
+    def empty(self) -> bool:
+        return not self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, kinds) -> bool:
+        for index, (kind, n) in enumerate(self._entries):
+            if kind in kinds:
+                del self._entries[index]
+                self._drop(n)
+                return True
+        return False
+
+    def _drop(self, n):
+        self.dropped += 1
+        if self._on_dropped:
+            self._on_dropped(n)
+
+    def _coalesce(self, n):
+        self.coalesced += 1
+        if self._on_coalesced:
+            self._on_coalesced(n)
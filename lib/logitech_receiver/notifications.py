@@ -25,7 +25,6 @@ from solaar.i18n import _
 
 from . import base
 from . import common
-from . import diversion
 from . import hidpp10
 from . import hidpp10_constants
 from . import hidpp20
@@ -67,7 +66,7 @@ def _process_receiver_notification(receiver, n):
         receiver.pairing.error = None
         if receiver.pairing.lock_open:
             receiver.pairing.new_device = None
-        pair_error = ord(n.data[:1])
+        pair_error = n.data[0]
         if pair_error:
             receiver.pairing.error = error_string = hidpp10_constants.PAIRING_ERRORS[pair_error]
             receiver.pairing.new_device = None
@@ -86,7 +85,7 @@ def _process_receiver_notification(receiver, n):
                 receiver.pairing.counter = receiver.pairing.device_address = None
                 receiver.pairing.device_authentication = receiver.pairing.device_name = None
             receiver.pairing.device_passkey = None
-            discover_error = ord(n.data[:1])
+            discover_error = n.data[0]
             if discover_error:
                 receiver.pairing.error = discover_string = hidpp10_constants.BOLT_PAIRING_ERRORS[discover_error]
                 logger.warning("bolt discovering error %d: %s", discover_error, discover_string)
@@ -240,7 +239,7 @@ def _process_hidpp10_notification(device, n):
         return True
 
     if n.sub_id == Notification.DJ_PAIRING:  # device connection (and disconnection)
-        flags = ord(n.data[:1]) & 0xF0
+        flags = n.data[0] & 0xF0
         if n.address == 0x02:  # very old 27 MHz protocol
             wpid = "00" + common.strhex(n.data[2:3])
             link_established = True
@@ -369,7 +368,7 @@ def _process_feature_notification(device, n, feature):
             if logger.isEnabledFor(logging.INFO):
                 logger.info("%s: TOUCH MOUSE points %s", device, n)
         elif n.address == 0x10:
-            touch = ord(n.data[:1])
+            touch = n.data[0]
             button_down = bool(touch & 0x02)
             mouse_lifted = bool(touch & 0x01)
             if logger.isEnabledFor(logging.INFO):
@@ -458,5 +457,7 @@ def _process_feature_notification(device, n, feature):
                     brightness = struct.unpack("!H", device.feature_request(_F.BRIGHTNESS_CONTROL, 0x10)[:2])[0]
                 device.setting_callback(device, settings_templates.BrightnessControl, [brightness])
 
+    from . import diversion  # rules are only loaded once they are needed
+
     diversion.process_notification(device, n, feature)
     return True
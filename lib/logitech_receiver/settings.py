@@ -15,6 +15,7 @@
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 from __future__ import annotations
 
+import copy
 import logging
 import math
 import struct
@@ -22,6 +23,7 @@ import time
 
 from solaar.i18n import _
 
+from . import capability_cache
 from . import common
 from . import hidpp20_constants
 from .common import NamedInt
@@ -71,6 +73,7 @@ class Setting:
     rw_options = {}
     validator_class = None
     validator_options = {}
+    cache_capabilities = False  # whether what validator_class.build reads only depends on the model and firmware
 
     def __init__(self, device, rw, validator):
         self._device = device
@@ -90,7 +93,14 @@ class Setting:
         elif p >= 2.0:  # HID++ 2.0 devices do not support registers
             assert rw.kind == FeatureRW.kind
         validator_class = cls.validator_class
-        validator = validator_class.build(cls, device, **cls.validator_options)
+
+        def build_validator(device):
+            return validator_class.build(cls, device, **cls.validator_options)
+
+        if cls.cache_capabilities:
+            validator = capability_cache.build(device, cls.name, build_validator)
+        else:
+            validator = build_validator(device)
         if validator:
             assert cls.kind is None or cls.kind & validator.kind != 0
             return cls(device, rw, validator)
@@ -152,6 +162,9 @@ class Setting:
         # the last value we've tried to write is remembered in the configuration.
         if self._device.persister and save:
             self._device.persister[self.name] = self._value if self.persist else None
+        shadow = getattr(self._device, "settings_shadow", None)
+        if shadow is not None:  # the value on the device is not known until a write of the new value is confirmed
+            shadow.forget(self.name)
 
     def update(self, value, save=True):
         self._value = value
@@ -194,7 +207,11 @@ class Setting:
     def compare(self, args, current):
         return self._validator.compare(args, current) if self._validator else None
 
-    def apply(self):
+    def apply(self, verify=False):
+        """Write the persisted value to the device, unless the device is known to have it already.
+
+        What the device has is known from the settings shadow of the device or, with verify, by reading it.
+        """
         assert hasattr(self, "_value")
         assert hasattr(self, "_device")
         if logger.isEnabledFor(logging.DEBUG):
@@ -202,11 +219,38 @@ class Setting:
         try:
             value = self.read(self.persist)  # Don't use persisted value if setting doesn't persist
             if self.persist and value is not None:  # If setting doesn't persist no need to write value just read
-                self.write(value, save=False)
+                self._apply(value, verify)
         except Exception as e:
             if logger.isEnabledFor(logging.WARNING):
                 logger.warning("%s: error applying %s so ignore it (%s): %s", self.name, self._value, self._device, repr(e))
 
+    def _apply(self, value, verify):
+        shadow = getattr(self._device, "settings_shadow", None)
+        known = None
+        if shadow is not None:
+            known = self._read_device() if verify else shadow.get(self.name)
+        if known is not None and known == value:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: %r already on %s", self.name, value, self._device)
+            if verify:
+                shadow.record(self.name, value)
+            return
+        written = self._write_changes(value, known)
+        if shadow is not None:
+            if written is None:
+                shadow.forget(self.name)
+            else:
+                shadow.record(self.name, value)
+
+    def _write_changes(self, value, known):
+        """Write value to the device, which has the known value (or None), and return None if the write fails."""
+        return self.write(value, save=False)
+
+    def _read_device(self):
+        """The value on the device, read without changing the value of the setting."""
+        reply = self._rw.read(self._device)
+        return self._validator.validate_read(reply) if reply else None
+
     def __str__(self):
         if hasattr(self, "_value"):
             assert hasattr(self, "_device")
@@ -238,18 +282,21 @@ class Settings(Setting):
             return self._value
 
         if self._device.online:
-            reply_map = {}
-            for key in self._validator.choices:
-                reply = self._rw.read(self._device, key)
-                if reply:
-                    reply_map[int(key)] = self._validator.validate_read(reply, key)
-            self._value = reply_map
+            self._value = self._read_device()
             if getattr(self._device, "persister", None) and self.name not in self._device.persister:
                 # Don't update the persister if it already has a value,
                 # otherwise the first read might overwrite the value we wanted.
                 self._device.persister[self.name] = self._value if self.persist else None
             return self._value
 
+    def _read_device(self):
+        reply_map = {}
+        for key in self._validator.choices:
+            reply = self._rw.read(self._device, key)
+            if reply:
+                reply_map[int(key)] = self._validator.validate_read(reply, key)
+        return reply_map
+
     def read_key(self, key, cached=True):
         assert hasattr(self, "_value")
         assert hasattr(self, "_device")
@@ -279,15 +326,24 @@ class Settings(Setting):
 
         if self._device.online:
             self.update(map, save)
-            for key, value in map.items():
-                data_bytes = self._validator.prepare_write(int(key), value)
-                if data_bytes is not None:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug("%s: settings prepare map write(%s,%s) => %r", self.name, key, value, data_bytes)
-                    reply = self._rw.write(self._device, int(key), data_bytes)
-                    if not reply:
-                        return None
-            return map
+            return map if self._write_map(map) else None
+
+    def _write_map(self, map):
+        """Write the values of the keys in map to the device, in as few round trips as the rw allows."""
+        writes = []
+        for key, value in map.items():
+            data_bytes = self._validator.prepare_write(int(key), value)
+            if data_bytes is not None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s: settings prepare map write(%s,%s) => %r", self.name, key, value, data_bytes)
+                writes.append((int(key), data_bytes))
+        return all(self._rw.write_many(self._device, writes)) if writes else True
+
+    def _write_changes(self, map, known):
+        if self._device.online:
+            # only write the keys that are not known to have their value
+            changes = {key: value for key, value in map.items() if not known or known.get(int(key)) != value}
+            return map if self._write_map(changes) else None
 
     def update_key_value(self, key, value, save=True):
         self._value[int(key)] = value
@@ -338,20 +394,23 @@ class LongSettings(Setting):
             return self._value
 
         if self._device.online:
-            reply_map = {}
-            # Reading one item at a time. This can probably be optimised
-            for item in self._validator.items:
-                r = self._validator.prepare_read_item(item)
-                reply = self._rw.read(self._device, r)
-                if reply:
-                    reply_map[int(item)] = self._validator.validate_read_item(reply, item)
-            self._value = reply_map
+            self._value = self._read_device()
             if getattr(self._device, "persister", None) and self.name not in self._device.persister:
                 # Don't update the persister if it already has a value,
                 # otherwise the first read might overwrite the value we wanted.
                 self._device.persister[self.name] = self._value if self.persist else None
             return self._value
 
+    def _read_device(self):
+        reply_map = {}
+        # Reading one item at a time. This can probably be optimised
+        for item in self._validator.items:
+            r = self._validator.prepare_read_item(item)
+            reply = self._rw.read(self._device, r)
+            if reply:
+                reply_map[int(item)] = self._validator.validate_read_item(reply, item)
+        return reply_map
+
     def read_item(self, item, cached=True):
         assert hasattr(self, "_value")
         assert hasattr(self, "_device")
@@ -436,17 +495,17 @@ class BitFieldSetting(Setting):
             return self._value
 
         if self._device.online:
-            reply_map = {}
-            reply = self._do_read()
-            if reply:
-                reply_map = self._validator.validate_read(reply)
-            self._value = reply_map
+            self._value = self._read_device()
             if getattr(self._device, "persister", None) and self.name not in self._device.persister:
                 # Don't update the persister if it already has a value,
                 # otherwise the first read might overwrite the value we wanted.
                 self._device.persister[self.name] = self._value if self.persist else None
             return self._value
 
+    def _read_device(self):
+        reply = self._do_read()
+        return self._validator.validate_read(reply) if reply else {}
+
     def _do_read(self):
         return self._rw.read(self._device)
 
@@ -486,14 +545,16 @@ class BitFieldSetting(Setting):
             if data_bytes is not None:
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug("%s: settings prepare map write(%s) => %r", self.name, self._value, data_bytes)
-                # if prepare_write returns a list, write one item at a time
-                seq = data_bytes if isinstance(data_bytes, list) else [data_bytes]
-                for b in seq:
-                    reply = self._rw.write(self._device, b)
-                    if not reply:
-                        return None
+                # if prepare_write returns a list, write all the items at once
+                if not self._write_all(data_bytes if isinstance(data_bytes, list) else [data_bytes]):
+                    return None
             return map
 
+    def _write_all(self, data_bytes_list):
+        if len(data_bytes_list) == 1:
+            return self._rw.write(self._device, data_bytes_list[0])
+        return all(self._rw.write_many(self._device, data_bytes_list))
+
     def update_key_value(self, key, value, save=True):
         self._value[int(key)] = value
         self._pre_write(save)
@@ -517,12 +578,9 @@ class BitFieldSetting(Setting):
             if data_bytes is not None:
                 if logger.isEnabledFor(logging.DEBUG):
                     logger.debug("%s: settings prepare key value write(%s,%s) => %r", self.name, key, str(value), data_bytes)
-                # if prepare_write returns a list, write one item at a time
-                seq = data_bytes if isinstance(data_bytes, list) else [data_bytes]
-                for b in seq:
-                    reply = self._rw.write(self._device, b)
-                    if not reply:
-                        return None
+                # if prepare_write returns a list, write all the items at once
+                if not self._write_all(data_bytes if isinstance(data_bytes, list) else [data_bytes]):
+                    return None
 
             return value
 
@@ -553,17 +611,17 @@ class RangeFieldSetting(Setting):
         if cached and self._value is not None:
             return self._value
         if self._device.online:
-            reply_map = {}
-            reply = self._do_read()
-            if reply:
-                reply_map = self._validator.validate_read(reply)
-            self._value = reply_map
+            self._value = self._read_device()
             if getattr(self._device, "persister", None) and self.name not in self._device.persister:
                 # Don't update the persister if it already has a value,
                 # otherwise the first read might overwrite the value we wanted.
                 self._device.persister[self.name] = self._value if self.persist else None
             return self._value
 
+    def _read_device(self):
+        reply = self._do_read()
+        return self._validator.validate_read(reply) if reply else {}
+
     def _do_read(self):
         return self._rw.read(self._device)
 
@@ -649,6 +707,17 @@ class FeatureRW:
         reply = device.feature_request(self.feature, self.write_fnid, write_bytes, no_reply=self.no_reply)
         return reply if not self.no_reply else True
 
+    def write_many(self, device, data_bytes_list):
+        """Write each of the data bytes, pipelining the requests, and return the replies."""
+        assert self.feature is not None
+        if self.no_reply:  # nothing to wait for anyway
+            return [self.write(device, data_bytes) for data_bytes in data_bytes_list]
+        calls = []
+        for data_bytes in data_bytes_list:
+            write_bytes = self.prefix + (data_bytes.to_bytes(1) if isinstance(data_bytes, int) else data_bytes) + self.suffix
+            calls.append((self.write_fnid, write_bytes))
+        return device.feature_requests(self.feature, calls)
+
 
 class FeatureRWMap(FeatureRW):
     kind = NamedInt(0x02, _("feature"))
@@ -682,6 +751,17 @@ class FeatureRWMap(FeatureRW):
         reply = device.feature_request(self.feature, self.write_fnid, key_bytes, data_bytes, no_reply=self.no_reply)
         return reply if not self.no_reply else True
 
+    def write_many(self, device, writes):
+        """Write the data bytes of several keys, pipelining the requests as each one is for one key, and return the replies.
+
+        :param writes: tuples of a key and its data bytes.
+        """
+        assert self.feature is not None
+        if self.no_reply:  # nothing to wait for anyway
+            return [self.write(device, key, data_bytes) for key, data_bytes in writes]
+        calls = [(self.write_fnid, common.int2bytes(key, self.key_byte_count), data_bytes) for key, data_bytes in writes]
+        return device.feature_requests(self.feature, calls)
+
 
 class Validator:
     @classmethod
@@ -1555,15 +1635,41 @@ class RawXYProcessing:
         pass
 
 
+class SettingsShadow:
+    """The values of settings last confirmed written to a device, since the device last lost its state.
+
+    Devices keep their settings when they reconnect after sleeping but forget them when they are switched off.
+    Each time that a device may have forgotten its settings a new epoch starts, with no values known.
+    """
+
+    def __init__(self):
+        self.epoch = 0
+        self._values = {}  # setting name -> value
+
+    def new_epoch(self):
+        self.epoch += 1
+        self._values.clear()
+
+    def get(self, name):
+        return self._values.get(name)
+
+    def record(self, name, value):
+        self._values[name] = copy.deepcopy(value)  # values of map settings are changed in place
+
+    def forget(self, name):
+        self._values.pop(name, None)
+
+
 def apply_all_settings(device):
     if device.features and hidpp20_constants.FEATURE.HIRES_WHEEL in device.features:
         time.sleep(0.2)  # delay to try to get out of race condition with Linux HID++ driver
     persister = getattr(device, "persister", None)
     sensitives = persister.get("_sensitive", {}) if persister else {}
+    verify = persister.get("_verify", False) if persister else False  # for devices that lose settings unannounced
     for s in device.settings:
         ignore = sensitives.get(s.name, False)
         if ignore != SENSITIVITY_IGNORE:
-            s.apply()
+            s.apply(verify)
 
 
 Setting.validator_class = BooleanValidator
@@ -0,0 +1,94 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Detection of the settings of devices as jobs on a pool of worker threads.
+
+Detecting the settings of a HID++ 2.0 device takes requests for many of its features, which can take
+seconds for a wireless device, so user interfaces schedule it instead of waiting for it.
+Jobs for devices on the same handle run one after the other, as their requests would only wait
+for each other, while devices on different handles are detected in parallel.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_MAX_WORKERS = 4
+
+_lock = threading.Lock()
+_pool = None
+_queued = {}  # handle -> jobs waiting for the one running for the handle, as (device, found, future)
+
+
+def _key(device):
+    # devices paired with a receiver have no handle of their own, their requests go through the receiver's
+    handle = device.handle or getattr(device.receiver, "handle", None)
+    return handle if handle else id(device)
+
+
+def schedule(device, found: Callable | None = None) -> Future:
+    """Detect the settings of a device on a worker thread.
+
+    found is called on the worker thread with each setting as it is detected.
+    The future is done with the list of settings of the device when they are all detected.
+    """
+    global _pool
+    future = Future()
+    key = _key(device)
+    with _lock:
+        if key in _queued:
+            _queued[key].append((device, found, future))
+            return future
+        if _pool is None:
+            _pool = ThreadPoolExecutor(_MAX_WORKERS, thread_name_prefix="SettingsDetection")
+        _queued[key] = collections.deque()
+        _pool.submit(_run, key, device, found, future)
+    return future
+
+
+def _run(key, device, found, future):
+    while True:
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(device.detect_settings(found))
+            except Exception as e:
+                logger.warning("%s: error detecting settings: %s", device, e)
+                future.set_exception(e)
+        with _lock:
+            if not _queued[key]:
+                del _queued[key]
+                return
+            device, found, future = _queued[key].popleft()
+
+
+def shutdown():
+    """Stop the workers, cancelling the jobs that have not started yet."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+        for jobs in _queued.values():
+            for _device, _found, future in jobs:
+                future.cancel()
+    if pool:
+        pool.shutdown(wait=False)
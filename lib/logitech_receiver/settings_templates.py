@@ -27,8 +27,6 @@ from solaar.i18n import _
 from . import base
 from . import common
 from . import descriptors
-from . import desktop_notifications
-from . import diversion
 from . import hidpp10_constants
 from . import hidpp20
 from . import hidpp20_constants
@@ -52,6 +50,16 @@ class State(enum.Enum):
     MOVED = "moved"
 
 
+class _SpecialKeys:
+    """A class variable for a table of special_keys that is only built when it is first used."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __get__(self, instance, owner):
+        return getattr(special_keys, self._name)
+
+
 # Setting classes are used to control the settings that the Solaar GUI shows and manipulates.
 # Each setting class has to several class variables:
 # name, which is used as a key when storing information about the setting,
@@ -87,6 +95,8 @@ class State(enum.Enum):
 #   prefix - a prefix to add to the data being written and the read request (default b''), used for features
 #     that provide and set multiple settings (e.g., to read and write function key inversion for current host)
 #   no_reply - whether to wait for a reply (default false) (USE WITH EXTREME CAUTION).
+# The reader/writer of a Settings class also has write_many to write several keys in as few round trips as
+# its feature allows, e.g., pipelining the requests when each request can only write one key.
 #
 # There are three simple validator classes - BooleanV, RangeValidator, and ChoicesValidator
 # BooleanV is for boolean values and is the default.  It takes
@@ -303,6 +313,7 @@ class Backlight2Level(settings.Setting):
     label = _("Backlight Level")
     description = _("Illumination level on keyboard when in Manual mode.")
     feature = _F.BACKLIGHT2
+    cache_capabilities = True
     min_version = 3
 
     class rw_class:
@@ -543,6 +554,7 @@ class ReportRate(settings.Setting):
         _("Frequency of device movement reports") + "\n" + _("May need Onboard Profiles set to Disable to be effective.")
     )
     feature = _F.REPORT_RATE
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x10, "write_fnid": 0x20}
     choices_universe = common.NamedInts()
     choices_universe[1] = "1ms"
@@ -576,6 +588,7 @@ class ExtendedReportRate(settings.Setting):
         _("Frequency of device movement reports") + "\n" + _("May need Onboard Profiles set to Disable to be effective.")
     )
     feature = _F.EXTENDED_ADJUSTABLE_REPORT_RATE
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x20, "write_fnid": 0x30}
     choices_universe = common.NamedInts()
     choices_universe[0] = "8ms"
@@ -723,6 +736,11 @@ class ReprogrammableKeys(settings.Settings):
             key_struct.remap(special_keys.CONTROL[common.bytes2int(data_bytes)])
             return True
 
+        def write_many(self, device, writes):  # setCidReporting is for one key, so pipeline the requests
+            changes = [(key, None, int(special_keys.CONTROL[common.bytes2int(data_bytes)])) for key, data_bytes in writes]
+            device.keys.set_cid_reporting(changes)
+            return [True for _write in writes]  # as for write
+
     class validator_class(settings.ChoicesMapValidator):
         @classmethod
         def build(cls, setting_class, device):
@@ -834,6 +852,8 @@ class MouseGesturesXY(settings.RawXYProcessing):
                 logger.info("mouse gesture notification %s", self.data)
             payload = struct.pack("!" + (len(self.data) * "h"), *self.data)
             notification = base.HIDPPNotification(0, 0, 0, 0, payload)
+            from . import diversion  # rules are only loaded once they are needed
+
             diversion.process_notification(self.device, notification, _F.MOUSE_GESTURE)
             self.fsmState = State.IDLE
 
@@ -900,6 +920,12 @@ class DivertKeys(settings.Settings):
             key_struct.set_diverted(common.bytes2int(data_bytes) != 0)  # not regular
             return True
 
+        def write_many(self, device, writes):  # setCidReporting is for one key, so pipeline the requests
+            diverted = special_keys.MAPPING_FLAG.diverted
+            changes = [(key, {diverted: common.bytes2int(data_bytes) != 0}, 0) for key, data_bytes in writes]
+            device.keys.set_cid_reporting(changes)
+            return [True for _write in writes]  # as for write
+
     class validator_class(settings.ChoicesMapValidator):
         def __init__(self, choices, key_byte_count=2, byte_count=1, mask=0x01):
             super().__init__(choices, key_byte_count, byte_count, mask)
@@ -929,6 +955,8 @@ class DivertKeys(settings.Settings):
                             if _F.ADJUSTABLE_DPI in device.features:
                                 choices[k.key] = setting_class.choices_universe
                                 if sliding is None:
+                                    from . import desktop_notifications
+
                                     sliding = DpiSlidingXY(
                                         device, name="DpiSliding", show_notification=desktop_notifications.show
                                     )
@@ -973,6 +1001,7 @@ class AdjustableDpi(settings.Setting):
     label = _("Sensitivity (DPI)")
     description = _("Mouse movement sensitivity")
     feature = _F.ADJUSTABLE_DPI
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x20, "write_fnid": 0x30}
     choices_universe = common.NamedInts.range(100, 4000, str, 50)
 
@@ -1001,6 +1030,7 @@ class ExtendedAdjustableDpi(settings.Setting):
     label = _("Sensitivity (DPI)")
     description = _("Mouse movement sensitivity") + "\n" + _("May need Onboard Profiles set to Disable to be effective.")
     feature = _F.EXTENDED_ADJUSTABLE_DPI
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x50, "write_fnid": 0x60}
     keys_universe = common.NamedInts(X=0, Y=1, LOD=2)
     choices_universe = common.NamedInts.range(100, 4000, str, 50)
@@ -1115,6 +1145,7 @@ class DisableKeyboardKeys(settings.BitFieldSetting):
     label = _("Disable keys")
     description = _("Disable specific keyboard keys.")
     feature = _F.KEYBOARD_DISABLE_KEYS
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x10, "write_fnid": 0x20}
     _labels = {k: (None, _("Disables the %s key.") % k) for k in special_keys.DISABLE}
     choices_universe = special_keys.DISABLE
@@ -1132,6 +1163,7 @@ class Multiplatform(settings.Setting):
     label = _("Set OS")
     description = _("Change keys to match OS.")
     feature = _F.MULTIPLATFORM
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x00, "write_fnid": 0x30}
     choices_universe = common.NamedInts(**{"OS " + str(i + 1): i for i in range(8)})
 
@@ -1378,6 +1410,7 @@ class MKeyLEDs(settings.BitFieldSetting):
         + _("May need G Keys diverted to be effective.")
     )
     feature = _F.MKEYS
+    cache_capabilities = True
     choices_universe = common.NamedInts()
     for i in range(8):
         choices_universe[1 << i] = "M" + str(i + 1)
@@ -1432,7 +1465,7 @@ class PersistentRemappableAction(settings.Settings):
     persist = False  # This setting is persistent in the device so no need to persist it here
     feature = _F.PERSISTENT_REMAPPABLE_ACTION
     keys_universe = special_keys.CONTROL
-    choices_universe = special_keys.KEYS
+    choices_universe = _SpecialKeys("KEYS")
 
     class rw_class:
         def __init__(self, feature):
@@ -1448,6 +1481,9 @@ class PersistentRemappableAction(settings.Settings):
             v = ks.remap(data_bytes)
             return v
 
+        def write_many(self, device, writes):  # remapping to the default reads the key back, so one at a time
+            return [self.write(device, key, data_bytes) for key, data_bytes in writes]
+
     class validator_class(settings.ChoicesMapValidator):
         @classmethod
         def build(cls, setting_class, device):
@@ -1497,6 +1533,7 @@ class Equalizer(settings.RangeFieldSetting):
     label = _("Equalizer")
     description = _("Set equalizer levels.")
     feature = _F.EQUALIZER
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x20, "write_fnid": 0x30, "read_prefix": b"\x00"}
     keys_universe = []
 
@@ -1538,6 +1575,7 @@ class BrightnessControl(settings.Setting):
     label = _("Brightness Control")
     description = _("Control overall brightness")
     feature = _F.BRIGHTNESS_CONTROL
+    cache_capabilities = True
     rw_options = {"read_fnid": 0x10, "write_fnid": 0x20}
     validator_class = settings.RangeValidator
 
@@ -1658,6 +1696,7 @@ class PerKeyLighting(settings.Settings):
     label = _("Per-key Lighting")
     description = _("Control per-key lighting.")
     feature = _F.PER_KEY_LIGHTING_V2
+    cache_capabilities = True
     keys_universe = special_keys.KEYCODES
     choices_universe = special_keys.COLORSPLUS
 
@@ -1665,45 +1704,51 @@ class PerKeyLighting(settings.Settings):
         self._pre_read(cached)
         if cached and self._value is not None:
             return self._value
-        reply_map = {}
-        for key in self._validator.choices:
-            reply_map[int(key)] = special_keys.COLORSPLUS["No change"]  # this signals no change
-        self._value = reply_map
-        return reply_map
+        self._value = self._read_device()
+        return self._value
+
+    def _read_device(self):  # the colors can't be read
+        return {int(key): special_keys.COLORSPLUS["No change"] for key in self._validator.choices}  # this signals no change
 
     def write(self, map, save=True):
         if self._device.online:
             self.update(map, save)
-            table = {}
-            for key, value in map.items():
-                if value in table:
-                    table[value].append(key)  # keys will be in order from small to large
-                else:
-                    table[value] = [key]
-            if len(table) == 1:  # use range update
-                for value, keys in table.items():  # only one, of course
-                    if value != special_keys.COLORSPLUS["No change"]:  # this signals no change, so don't update at all
-                        data_bytes = keys[0].to_bytes(1, "big") + keys[-1].to_bytes(1, "big") + value.to_bytes(3, "big")
-                        self._device.feature_request(self.feature, 0x50, data_bytes)  # range update command to update all keys
-                        self._device.feature_request(self.feature, 0x70, 0x00)  # signal device to make the changes
-            else:
-                data_bytes = b""
-                for value, keys in table.items():  # only one, of course
-                    if value != special_keys.COLORSPLUS["No change"]:  # this signals no change, so ignore it
-                        while len(keys) > 3:  # use an optimized update command that can update up to 13 keys
-                            data = value.to_bytes(3, "big") + b"".join([key.to_bytes(1, "big") for key in keys[0:13]])
-                            self._device.feature_request(self.feature, 0x60, data)  # single-value multiple-keys update
-                            keys = keys[13:]
-                        for key in keys:
-                            data_bytes += key.to_bytes(1, "big") + value.to_bytes(3, "big")
-                            if len(data_bytes) >= 16:  # up to four values are packed into a regular update
-                                self._device.feature_request(self.feature, 0x10, data_bytes)
-                                data_bytes = b""
-                if len(data_bytes) > 0:  # update any remaining keys
-                    self._device.feature_request(self.feature, 0x10, data_bytes)
-                self._device.feature_request(self.feature, 0x70, 0x00)  # signal device to make the changes
+            self._write_map(map)
         return map
 
+    def _write_map(self, map):
+        table = {}
+        for key, value in map.items():
+            if value in table:
+                table[value].append(key)  # keys will be in order from small to large
+            else:
+                table[value] = [key]
+        if len(table) == 1 and len(map) == len(self._validator.choices):  # use range update
+            for value, keys in table.items():  # only one, of course
+                if value != special_keys.COLORSPLUS["No change"]:  # this signals no change, so don't update at all
+                    data_bytes = keys[0].to_bytes(1, "big") + keys[-1].to_bytes(1, "big") + value.to_bytes(3, "big")
+                    self._device.feature_request(self.feature, 0x50, data_bytes)  # range update command to update all keys
+                    self._device.feature_request(self.feature, 0x70, 0x00)  # signal device to make the changes
+        else:
+            calls = []
+            data_bytes = b""
+            for value, keys in table.items():
+                if value != special_keys.COLORSPLUS["No change"]:  # this signals no change, so ignore it
+                    while len(keys) > 3:  # use an optimized update command that can update up to 13 keys
+                        data = value.to_bytes(3, "big") + b"".join([key.to_bytes(1, "big") for key in keys[0:13]])
+                        calls.append((0x60, data))  # single-value multiple-keys update
+                        keys = keys[13:]
+                    for key in keys:
+                        data_bytes += key.to_bytes(1, "big") + value.to_bytes(3, "big")
+                        if len(data_bytes) >= 16:  # up to four values are packed into a regular update
+                            calls.append((0x10, data_bytes))
+                            data_bytes = b""
+            if len(data_bytes) > 0:  # update any remaining keys
+                calls.append((0x10, data_bytes))
+            self._device.feature_requests(self.feature, calls)  # the updates don't depend on each other, so pipeline them
+            self._device.feature_request(self.feature, 0x70, 0x00)  # signal device to make the changes
+        return True
+
     def write_key_value(self, key, value, save=True):
         if value != special_keys.COLORSPLUS["No change"]:  # this signals no change
             result = super().write_key_value(int(key), value, save)
@@ -1795,6 +1840,28 @@ SETTINGS = [
 ]
 
 
+def _index_settings(classes):
+    """The setting classes with a feature by feature and by name, each in the order of classes."""
+    by_feature, by_name = {}, {}
+    for sclass in classes:
+        if sclass.feature:
+            by_feature.setdefault(sclass.feature, []).append(sclass)
+            by_name.setdefault(sclass.name, []).append(sclass)
+    return by_feature, by_name
+
+
+_SETTINGS_BY_FEATURE, _SETTINGS_BY_NAME = _index_settings(SETTINGS)
+_SETTINGS_ORDER = {sclass: position for position, sclass in enumerate(SETTINGS)}
+
+
+def _feature_setting_classes(device, all_features_known):
+    """The setting classes for the features of the device, in the order of SETTINGS."""
+    if not all_features_known:  # look up each feature that has settings
+        return [sclass for sclass in SETTINGS if sclass.feature]
+    classes = [sclass for feature, _index in device.features.enumerate() for sclass in _SETTINGS_BY_FEATURE.get(feature, ())]
+    return sorted(classes, key=_SETTINGS_ORDER.__getitem__)
+
+
 def check_feature(device, sclass):
     if sclass.feature not in device.features:
         return
@@ -1811,31 +1878,36 @@ def check_feature(device, sclass):
 
 
 # Returns True if device was queried to find features, False otherwise
-def check_feature_settings(device, already_known):
-    """Auto-detect device settings by the HID++ 2.0 features they have."""
+def check_feature_settings(device, already_known, found=None):
+    """Auto-detect device settings by the HID++ 2.0 features they have, calling found with each new one."""
     if not device.features or not device.online:
         return False
     if device.protocol and device.protocol < 2.0:
         return False
+    all_features_known = device.features.discover()  # so that looking up the features of settings needs no requests
     absent = device.persister.get("_absent", []) if device.persister else []
-    newAbsent = []
-    for sclass in SETTINGS:
-        if sclass.feature:
-            known_present = device.persister and sclass.name in device.persister
-            if not any(s.name == sclass.name for s in already_known) and (known_present or sclass.name not in absent):
-                setting = check_feature(device, sclass)
-                if isinstance(setting, list):
-                    for s in setting:
-                        already_known.append(s)
-                    if sclass.name in newAbsent:
-                        newAbsent.remove(sclass.name)
-                elif setting:
-                    already_known.append(setting)
-                    if sclass.name in newAbsent:
-                        newAbsent.remove(sclass.name)
-                elif setting is None:
-                    if sclass.name not in newAbsent and sclass.name not in absent and sclass.name not in device.persister:
-                        newAbsent.append(sclass.name)
+    absent_names = set(absent)
+    known = {s.name for s in already_known}
+    newAbsent = {}  # as an ordered set
+    for sclass in _feature_setting_classes(device, all_features_known):
+        known_present = device.persister and sclass.name in device.persister
+        if sclass.name not in known and (known_present or sclass.name not in absent_names):
+            setting = check_feature(device, sclass)
+            if isinstance(setting, list):
+                for s in setting:
+                    already_known.append(s)
+                    known.add(s.name)
+                    if found:
+                        found(s)
+                newAbsent.pop(sclass.name, None)
+            elif setting:
+                already_known.append(setting)
+                known.add(setting.name)
+                if found:
+                    found(setting)
+                newAbsent.pop(sclass.name, None)
+            elif setting is None and sclass.name not in absent_names and sclass.name not in device.persister:
+                newAbsent[sclass.name] = None
     if device.persister and newAbsent:
         absent.extend(newAbsent)
         device.persister["_absent"] = absent
@@ -1843,8 +1915,8 @@ def check_feature_settings(device, already_known):
 
 
 def check_feature_setting(device, setting_name):
-    for sclass in SETTINGS:
-        if sclass.feature and sclass.name == setting_name and device.features:
+    for sclass in _SETTINGS_BY_NAME.get(setting_name, ()):
+        if device.features:
             setting = check_feature(device, sclass)
             if setting:
                 return setting
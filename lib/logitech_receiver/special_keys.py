@@ -19,10 +19,9 @@
 
 import os
 
-import yaml
-
 from .common import NamedInts
 from .common import UnsortedNamedInts
+from .common import yaml_module
 
 _XDG_CONFIG_HOME = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser(os.path.join("~", ".config"))
 _keys_file_path = os.path.join(_XDG_CONFIG_HOME, "solaar", "keys.yaml")
@@ -1208,11 +1207,7 @@ HORIZONTAL_SCROLL = NamedInts(
 )
 HORIZONTAL_SCROLL._fallback = lambda x: f"unknown horizontal scroll:{x:04X}"
 
-# Construct universe for Persistent Remappable Keys setting (only for supported values)
-KEYS = UnsortedNamedInts()
 KEYS_Default = 0x7FFFFFFF  # Special value to reset key to default - has to be different from all others
-KEYS[KEYS_Default] = "Default"  # Value to reset to default
-KEYS[0] = "None"  # Value for no output
 
 # Add HID keys plus modifiers
 modifiers = {
@@ -1228,21 +1223,31 @@ modifiers = {
     0x0A: "Meta+Shift+",
     0x0C: "Meta+Alt+",
 }
-for val, name in modifiers.items():
-    for key in USB_HID_KEYCODES:
-        KEYS[(ACTIONID.Key << 24) + (int(key) << 8) + val] = name + str(key)
 
-# Add HID Consumer Codes
-for code in HID_CONSUMERCODES:
-    KEYS[(ACTIONID.Consumer << 24) + (int(code) << 8)] = str(code)
 
-# Add Mouse Buttons
-for code in MOUSE_BUTTONS:
-    KEYS[(ACTIONID.Mouse << 24) + (int(code) << 8)] = str(code)
+# Construct universe for Persistent Remappable Keys setting (only for supported values)
+def _keys():
+    keys = UnsortedNamedInts()
+    keys[KEYS_Default] = "Default"  # Value to reset to default
+    keys[0] = "None"  # Value for no output
+
+    # Add HID keys plus modifiers
+    for val, name in modifiers.items():
+        for key in USB_HID_KEYCODES:
+            keys[(ACTIONID.Key << 24) + (int(key) << 8) + val] = name + str(key)
+
+    # Add HID Consumer Codes
+    for code in HID_CONSUMERCODES:
+        keys[(ACTIONID.Consumer << 24) + (int(code) << 8)] = str(code)
 
-# Add Horizontal Scroll
-for code in HORIZONTAL_SCROLL:
-    KEYS[(ACTIONID.Hscroll << 24) + (int(code) << 8)] = str(code)
+    # Add Mouse Buttons
+    for code in MOUSE_BUTTONS:
+        keys[(ACTIONID.Mouse << 24) + (int(code) << 8)] = str(code)
+
+    # Add Horizontal Scroll
+    for code in HORIZONTAL_SCROLL:
+        keys[(ACTIONID.Hscroll << 24) + (int(code) << 8)] = str(code)
+    return keys
 
 
 # Construct subsets for known devices
@@ -1250,14 +1255,33 @@ def persistent_keys(action_ids):
     keys = UnsortedNamedInts()
     keys[KEYS_Default] = "Default"  # Value to reset to default
     keys[0] = "No Output (only as default)"
-    for key in KEYS:
+    for key in _table("KEYS"):
         if (int(key) >> 24) in action_ids:
             keys[int(key)] = str(key)
     return keys
 
 
-KEYS_KEYS_CONSUMER = persistent_keys([ACTIONID.Key, ACTIONID.Consumer])
-KEYS_KEYS_MOUSE_HSCROLL = persistent_keys([ACTIONID.Key, ACTIONID.Mouse, ACTIONID.Hscroll])
+# KEYS and its subsets are large and only needed for the Persistent Remappable Keys setting,
+# so they are built when first used instead of when the module is imported
+_LAZY = {
+    "KEYS": _keys,
+    "KEYS_KEYS_CONSUMER": lambda: persistent_keys([ACTIONID.Key, ACTIONID.Consumer]),
+    "KEYS_KEYS_MOUSE_HSCROLL": lambda: persistent_keys([ACTIONID.Key, ACTIONID.Mouse, ACTIONID.Hscroll]),
+}
+
+
+def _table(name):
+    table = globals().get(name)
+    if table is None:
+        table = globals().setdefault(name, _LAZY[name]())
+    return table
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return _table(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 COLORS = UnsortedNamedInts(
     {
@@ -1531,7 +1555,7 @@ KEYCODES = NamedInts(
 try:
     if os.path.isfile(_keys_file_path):
         with open(_keys_file_path) as keys_file:
-            keys = yaml.safe_load(keys_file)
+            keys = yaml_module().safe_load(keys_file)
             if isinstance(keys, dict):
                 keys = NamedInts(**keys)
                 for k in KEYCODES:
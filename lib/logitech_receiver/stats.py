@@ -0,0 +1,244 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Request latency, timeout, error and notification statistics of HID++ handles.
+
+The low-level functions in base record each finished request here, keyed by handle,
+device number and feature (or register), so slow or flaky devices can be spotted.
+Recording is a few dictionary lookups and additions under a lock.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+
+from bisect import bisect_left
+from time import time
+from typing import Any
+
+# latency histogram buckets, from 0.1 ms up to 30 s, each 20% wider than the one before
+_BUCKET_RATIO = 1.2
+_BUCKET_EDGES = tuple(0.0001 * _BUCKET_RATIO**i for i in range(int(math.log(300000) / math.log(_BUCKET_RATIO)) + 2))
+
+_lock = threading.Lock()
+_handle_names = {}  # int handle -> device path
+_devices = {}  # (handle name, devnumber) -> _DeviceStats
+_packets = {}  # handle name -> number of packets read
+_since = time()
+
+
+class LatencyHistogram:
+    """Counts latencies in logarithmic buckets, percentiles are accurate to the width of a bucket."""
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, latency: float):
+        self.counts[bisect_left(_BUCKET_EDGES, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if self.minimum is None or latency < self.minimum:
+            self.minimum = latency
+        if self.maximum is None or latency > self.maximum:
+            self.maximum = latency
+
+    def percentile(self, fraction: float) -> float | None:
+        """The upper edge of the bucket holding the given fraction of latencies, capped at the maximum."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                edge = _BUCKET_EDGES[index] if index < len(_BUCKET_EDGES) else self.maximum
+                return min(edge, self.maximum)
+        return self.maximum
+
+    def summary(self) -> dict[str, Any]:
+        result = {"count": self.count}
+        if self.count:
+            result.update(
+                min_ms=_ms(self.minimum),
+                mean_ms=_ms(self.total / self.count),
+                p50_ms=_ms(self.percentile(0.50)),
+                p95_ms=_ms(self.percentile(0.95)),
+                p99_ms=_ms(self.percentile(0.99)),
+                max_ms=_ms(self.maximum),
+            )
+        return result
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class _DeviceStats:
+    __slots__ = (
+        "requests",
+        "pings",
+        "features",
+        "timeouts",
+        "errors",
+        "notifications",
+        "dropped",
+        "coalesced",
+        "first_notification",
+        "last_notification",
+    )
+
+    def __init__(self):
+        self.requests = LatencyHistogram()
+        self.pings = LatencyHistogram()
+        self.features = {}  # feature or register label -> LatencyHistogram
+        self.timeouts = 0
+        self.errors = {}  # error report sub ID (0x8F or 0xFF) -> count
+        self.notifications = 0
+        self.dropped = 0  # notifications dropped from a full queue
+        self.coalesced = 0  # notifications merged into or replaced by a later one while queued
+        self.first_notification = None
+        self.last_notification = None
+
+    def snapshot(self) -> dict[str, Any]:
+        rate = None
+        if self.notifications > 1 and self.last_notification > self.first_notification:
+            rate = round((self.notifications - 1) / (self.last_notification - self.first_notification), 3)
+        return {
+            "requests": self.requests.summary(),
+            "pings": self.pings.summary(),
+            "timeouts": self.timeouts,
+            "errors": {f"{sub_id:02X}": count for sub_id, count in sorted(self.errors.items())},
+            "notifications": {
+                "count": self.notifications,
+                "per_second": rate,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+            },
+            "features": {label: histogram.summary() for label, histogram in sorted(self.features.items())},
+        }
+
+
+def _handle_name(handle) -> str:
+    path = getattr(handle, "path", None)
+    if path is None:
+        path = _handle_names.get(int(handle))
+    return path if path is not None else str(int(handle))
+
+
+def _feature_label(request_id: int) -> str:
+    if request_id < 0x8000:
+        return f"feature {request_id >> 8:02X}"  # HID++ 2.0 feature index, function and software ID ignored
+    return f"register {request_id:04X}"
+
+
+def _device(handle, devnumber) -> _DeviceStats:
+    key = (_handle_name(handle), devnumber)
+    device = _devices.get(key)
+    if device is None:
+        device = _devices[key] = _DeviceStats()
+    return device
+
+
+def record_open(handle, path: str):
+    """Remember the device path of a newly opened handle, so its statistics can be reported under the path."""
+    if handle is not None:
+        with _lock:
+            _handle_names[int(handle)] = path
+
+
+def record_reply(handle, devnumber: int, request_id: int, latency: float, error: int | None = None, ping: bool = False):
+    """Record a reply to a request or a ping.
+
+    :param error: the sub ID of an error reply, 0x8F for HID++ 1.0 or 0xFF for HID++ 2.0.
+    """
+    with _lock:
+        device = _device(handle, devnumber)
+        if ping:
+            device.pings.add(latency)
+            return
+        device.requests.add(latency)
+        label = _feature_label(request_id)
+        histogram = device.features.get(label)
+        if histogram is None:
+            histogram = device.features[label] = LatencyHistogram()
+        histogram.add(latency)
+        if error is not None:
+            device.errors[error] = device.errors.get(error, 0) + 1
+
+
+def record_timeout(handle, devnumber: int):
+    with _lock:
+        _device(handle, devnumber).timeouts += 1
+
+
+def record_packet(handle):
+    with _lock:
+        name = _handle_name(handle)
+        _packets[name] = _packets.get(name, 0) + 1
+
+
+def record_notification(handle, devnumber: int):
+    now = time()
+    with _lock:
+        device = _device(handle, devnumber)
+        device.notifications += 1
+        if device.first_notification is None:
+            device.first_notification = now
+        device.last_notification = now
+
+
+def record_notification_dropped(handle, devnumber: int):
+    with _lock:
+        _device(handle, devnumber).dropped += 1
+
+
+def record_notification_coalesced(handle, devnumber: int):
+    with _lock:
+        _device(handle, devnumber).coalesced += 1
+
+
+def snapshot() -> dict[str, Any]:
+    """All statistics recorded so far, as a dictionary of plain values."""
+    with _lock:
+        handles = {}
+        for (name, devnumber), device in sorted(_devices.items()):
+            entry = handles.setdefault(name, {"packets": _packets.get(name, 0), "devices": {}})
+            entry["devices"][str(devnumber)] = device.snapshot()
+        for name, packets in _packets.items():
+            handles.setdefault(name, {"packets": packets, "devices": {}})
+        return {"since": _since, "duration": round(time() - _since, 3), "handles": handles}
+
+
+def dump(path: str):
+    """Write the statistics to a JSON file."""
+    with open(path, "w") as stats_file:
+        json.dump(snapshot(), stats_file, indent=2)
+
+
+def reset():
+    global _since
+    with _lock:
+        _devices.clear()
+        _packets.clear()
+        _since = time()
@@ -0,0 +1,149 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Request timeouts adapted to the round trip times seen for each device.
+
+The round trip time of a device is estimated as in TCP (RFC 6298), from a smoothed
+average of the latencies of its replies and their smoothed deviation.
+Requests wait for four deviations above the average, at least a quarter of the fixed timeout
+of the request and at most all of it. After a timeout requests wait the full fixed timeout again,
+and after several timeouts in a row the device is taken to be asleep and requests are only
+given a short time to succeed, until the device replies or sends a notification.
+After a connection notification the next request waits the full fixed timeout,
+as a device that is just waking up can be slow to answer.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_ALPHA = 1 / 8  # weight of a new latency in the smoothed round trip time
+_BETA = 1 / 4  # weight of a new deviation in the smoothed round trip time deviation
+_DEVIATIONS = 4  # how many deviations above the smoothed round trip time to wait
+_FLOOR = 1 / 4  # the shortest timeout, as a fraction of the fixed timeout of the request
+_MIN_SAMPLES = 4  # replies needed before the estimate is used
+_ASLEEP_AFTER = 3  # consecutive timeouts after which a device is taken to be asleep
+ASLEEP_TIMEOUT = 0.25  # how long to wait for a reply from an asleep device, in seconds
+
+_lock = threading.Lock()
+_estimates = {}  # (handle path or handle, devnumber) -> _Estimate
+
+
+class _Estimate:
+    __slots__ = ("samples", "srtt", "rttvar", "timeouts", "connected")
+
+    def __init__(self):
+        self.samples = 0
+        self.srtt = 0.0
+        self.rttvar = 0.0
+        self.timeouts = 0  # consecutive timeouts
+        self.connected = False  # whether the device connected since its last reply or timeout
+
+    def add(self, latency: float):
+        if self.samples:
+            self.rttvar += _BETA * (abs(self.srtt - latency) - self.rttvar)
+            self.srtt += _ALPHA * (latency - self.srtt)
+        else:
+            self.srtt = latency
+            self.rttvar = latency / 2
+        self.samples += 1
+        self.timeouts = 0
+        self.connected = False
+
+    @property
+    def asleep(self) -> bool:
+        return self.timeouts >= _ASLEEP_AFTER
+
+    def timeout(self, ceiling: float) -> float:
+        if self.asleep:
+            return min(ASLEEP_TIMEOUT, ceiling)
+        if self.timeouts or self.connected or self.samples < _MIN_SAMPLES:
+            return ceiling
+        return min(ceiling, max(ceiling * _FLOOR, self.srtt + _DEVIATIONS * self.rttvar))
+
+
+def _handle_key(handle):
+    # threaded handles have a different file descriptor on each thread, so they are known by their path
+    path = getattr(handle, "path", None)
+    return handle if path is None else path
+
+
+def _key(handle, devnumber: int):
+    return _handle_key(handle), devnumber
+
+
+def timeout(handle, devnumber: int, ceiling: float) -> float:
+    """How long to wait for the reply to a request to the device, at most ceiling seconds."""
+    estimate = _estimates.get(_key(handle, devnumber))
+    return ceiling if estimate is None else estimate.timeout(ceiling)
+
+
+def record_reply(handle, devnumber: int, latency: float):
+    key = _key(handle, devnumber)
+    with _lock:
+        estimate = _estimates.get(key)
+        if estimate is None:
+            estimate = _estimates[key] = _Estimate()
+        elif estimate.asleep and logger.isEnabledFor(logging.INFO):
+            logger.info("(%s) device %d replied, no longer asleep", handle, devnumber)
+        estimate.add(latency)
+
+
+def record_timeout(handle, devnumber: int):
+    key = _key(handle, devnumber)
+    with _lock:
+        estimate = _estimates.get(key)
+        if estimate is None:
+            estimate = _estimates[key] = _Estimate()
+        estimate.timeouts += 1
+        estimate.connected = False
+        if estimate.timeouts == _ASLEEP_AFTER and logger.isEnabledFor(logging.INFO):
+            logger.info("(%s) device %d timed out %d times in a row, taking it to be asleep", handle, devnumber, _ASLEEP_AFTER)
+
+
+def record_activity(handle, devnumber: int, connected: bool = False):
+    """A notification from or about the device shows that it is awake.
+
+    :param connected: whether it is a notification of the device connecting.
+    """
+    estimate = _estimates.get(_key(handle, devnumber))
+    if estimate is not None and (estimate.timeouts or connected):
+        with _lock:
+            if estimate.asleep and logger.isEnabledFor(logging.INFO):
+                logger.info("(%s) device %d is active, no longer asleep", handle, devnumber)
+            estimate.timeouts = 0
+            estimate.connected = estimate.connected or connected
+
+
+def asleep(handle, devnumber: int) -> bool:
+    estimate = _estimates.get(_key(handle, devnumber))
+    return estimate is not None and estimate.asleep
+
+
+def forget(handle):
+    """Drop the estimates for the devices on a handle that is being closed, as its number may be reused."""
+    handle = _handle_key(handle)
+    with _lock:
+        for key in [key for key in _estimates if key[0] == handle]:
+            del _estimates[key]
+
+
+def reset():
+    with _lock:
+        _estimates.clear()
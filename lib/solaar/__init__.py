@@ -14,28 +14,39 @@
 ## with this program; if not, write to the Free Software Foundation, Inc.,
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-import pkgutil
-import subprocess
 import sys
 
 NAME = "Solaar"
 
-try:
-    __version__ = (
-        subprocess.check_output(
-            [
-                "git",
-                "describe",
-                "--always",
-            ],
-            cwd=sys.path[0],
-            stderr=subprocess.DEVNULL,
-        )
-        .strip()
-        .decode()
-    )
-except Exception:
+
+def _version() -> str:
+    import pkgutil
+    import subprocess
+
     try:
-        __version__ = pkgutil.get_data("solaar", "commit").strip().decode()
+        return (
+            subprocess.check_output(
+                [
+                    "git",
+                    "describe",
+                    "--always",
+                ],
+                cwd=sys.path[0],
+                stderr=subprocess.DEVNULL,
+            )
+            .strip()
+            .decode()
+        )
     except Exception:
-        __version__ = pkgutil.get_data("solaar", "version").strip().decode()
+        try:
+            return pkgutil.get_data("solaar", "commit").strip().decode()
+        except Exception:
+            return pkgutil.get_data("solaar", "version").strip().decode()
+
+
+def __getattr__(name):
+    # finding out the version runs git, so only do it when the version is asked for
+    if name == "__version__":
+        version = globals()["__version__"] = _version()
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -23,8 +23,6 @@ from traceback import extract_tb
 from traceback import format_exc
 
 from logitech_receiver import base
-from logitech_receiver import device
-from logitech_receiver import receiver
 
 from solaar import NAME
 
@@ -103,6 +101,27 @@ def _create_parser():
     )
     sp.set_defaults(action="unpair")
 
+    sp = subparsers.add_parser(
+        "stats",
+        help="report request latency, timeouts and errors of devices",
+        epilog="Asks the running Solaar for its statistics and reports them, per device and feature. "
+        "If Solaar is not running, or with --measure, pings each device and reports the latency of the requests made.",
+    )
+    sp.add_argument(
+        "device",
+        nargs="?",
+        default="all",
+        help="device to measure; may be a device number (1..6), a serial number, "
+        'a substring of a device\'s name, or "all" (the default)',
+    )
+    sp.add_argument(
+        "-m", "--measure", action="store_true", help="ping the devices instead of reporting the running Solaar's statistics"
+    )
+    sp.add_argument("-c", "--count", type=int, default=10, help="number of pings per device (default 10)")
+    sp.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    sp.add_argument("-o", "--output", help="also write the statistics as JSON to this file")
+    sp.set_defaults(action="stats")
+
     return parser, subparsers.choices
 
 
@@ -111,6 +130,8 @@ print_help = _cli_parser.print_help
 
 
 def _receivers(dev_path=None):
+    from logitech_receiver import receiver  # not imported with the module, so that solaar --headless does not need GTK
+
     for dev_info in base.receivers():
         if dev_path is not None and dev_path != dev_info.path:
             continue
@@ -126,6 +147,9 @@ def _receivers(dev_path=None):
 
 
 def _receivers_and_devices(dev_path=None):
+    from logitech_receiver import device
+    from logitech_receiver import receiver
+
     for dev_info in base.receivers_and_devices():
         if dev_path is not None and dev_path != dev_info.path:
             continue
@@ -209,7 +233,7 @@ def run(cli_args=None, hidraw_path=None):
     assert action in actions
 
     try:
-        if action == "show" or action == "probe" or action == "config" or action == "profiles":
+        if action == "show" or action == "probe" or action == "config" or action == "profiles" or action == "stats":
             c = list(_receivers_and_devices(hidraw_path))
         else:
             c = list(_receivers(hidraw_path))
@@ -16,8 +16,7 @@
 
 import traceback
 
-import yaml
-
+from logitech_receiver.common import yaml_module
 from logitech_receiver.hidpp20 import OnboardProfiles
 from logitech_receiver.hidpp20 import OnboardProfilesVersion
 
@@ -42,12 +41,12 @@ def run(receivers, args, find_receiver, find_device):
         print(f"Device {dev.name} is either offline or has no onboard profiles")
     elif not profiles_file:
         print(f"#Dumping profiles from {dev.name}")
-        print(yaml.dump(dev.profiles))
+        print(yaml_module().dump(dev.profiles))
     else:
         try:
             with open(profiles_file, "r") as f:
                 print(f"Reading profiles from {profiles_file}")
-                profiles = yaml.safe_load(f)
+                profiles = yaml_module().safe_load(f)
                 if not isinstance(profiles, OnboardProfiles):
                     print("Profiles file does not contain current onboard profiles")
                 elif getattr(profiles, "version", None) != OnboardProfilesVersion:
@@ -25,8 +25,9 @@ from logitech_receiver.common import LOGITECH_VENDOR_ID
 from logitech_receiver.common import NamedInt
 from logitech_receiver.common import strhex
 
+import solaar
+
 from solaar import NAME
-from solaar import __version__
 
 _hidpp10 = hidpp10.Hidpp10()
 _hidpp20 = hidpp20.Hidpp20()
@@ -305,7 +306,7 @@ def run(devices, args, find_receiver, find_device):
     assert devices
     assert args.device
 
-    print(f"{NAME.lower()} version {__version__}")
+    print(f"{NAME.lower()} version {solaar.__version__}")
     print("")
 
     device_name = args.device.lower()
@@ -0,0 +1,120 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import json
+
+from logitech_receiver import stats
+
+from solaar import stats_export
+
+
+def _select_devices(devices, device_name, find_device):
+    if device_name != "all":
+        dev = next(find_device(devices, device_name), None)
+        if not dev:
+            raise Exception(f"no device found matching '{device_name}'")
+        return [dev]
+    selected = []
+    for d in devices:
+        if d.isDevice:
+            selected.append(d)
+        else:
+            count = d.count()
+            for dev in d:
+                if not count:
+                    break
+                selected.append(dev)
+                count -= 1
+    return selected
+
+
+def _device_names(devices):
+    names = {}
+    for dev in devices:
+        path = dev.receiver.path if dev.receiver else dev.path
+        names[(path, str(dev.number))] = dev.name
+    return names
+
+
+def _print_latency(label, summary):
+    if summary["count"]:
+        print(
+            f"      {label:20} {summary['count']:6d}  p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  "
+            f"p99 {summary['p99_ms']:8.1f}  max {summary['max_ms']:8.1f} ms"
+        )
+
+
+def _only(snapshot, names):
+    """The statistics of the named devices only."""
+    handles = {}
+    for path, handle in snapshot["handles"].items():
+        devices = {number: device for number, device in handle["devices"].items() if (path, number) in names}
+        if devices:
+            handles[path] = dict(handle, devices=devices)
+    return dict(snapshot, handles=handles)
+
+
+def _print_stats(snapshot, names):
+    print(f"Statistics over {snapshot['duration']:.1f} seconds")
+    for path, handle in snapshot["handles"].items():
+        print("")
+        print(f"  {path}: {handle['packets']} packets read")
+        for number, device in handle["devices"].items():
+            print(f"    Device {number}: {names.get((path, number), '')}")
+            _print_latency("pings", device["pings"])
+            _print_latency("requests", device["requests"])
+            for label, summary in device["features"].items():
+                _print_latency(label, summary)
+            errors = ", ".join(f"{count} x {sub_id}" for sub_id, count in device["errors"].items()) or "none"
+            print(f"      timeouts {device['timeouts']}, error replies {errors}")
+            notifications = device["notifications"]
+            if notifications["count"] or notifications["dropped"]:
+                rate = notifications["per_second"]
+                print(
+                    f"      notifications {notifications['count']}"
+                    + (f", {rate} per second" if rate else "")
+                    + f", {notifications['coalesced']} coalesced, {notifications['dropped']} dropped"
+                )
+
+
+def run(devices, args, _find_receiver, find_device):
+    assert devices
+    assert args.device
+
+    selected = _select_devices(devices, args.device.lower(), find_device)
+    names = _device_names(selected)
+    snapshot = None if args.measure else stats_export.request()
+    if snapshot is not None:
+        if not args.json:
+            print("Statistics of the running Solaar")
+        if args.device.lower() != "all":
+            snapshot = _only(snapshot, names)
+    else:
+        if not args.json and not args.measure:
+            print("No running Solaar reported its statistics, measuring by pinging the devices")
+        for dev in selected:
+            for _i in range(args.count):
+                if not dev.ping():
+                    break
+        snapshot = stats.snapshot()
+
+    if args.output:
+        with open(args.output, "w") as stats_file:
+            json.dump(snapshot, stats_file, indent=2)
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        _print_stats(snapshot, names)
@@ -20,11 +20,11 @@ import logging
 import os
 import threading
 
-import yaml
-
 from logitech_receiver.common import NamedInt
+from logitech_receiver.common import on_yaml
+from logitech_receiver.common import yaml_module
 
-from solaar import __version__
+import solaar
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +49,7 @@ def _load():
         path = _yaml_file_path
         try:
             with open(_yaml_file_path) as config_file:
-                loaded_config = yaml.safe_load(config_file)
+                loaded_config = yaml_module().safe_load(config_file)
         except Exception as e:
             logger.error("failed to load from %s: %s", _yaml_file_path, e)
     elif os.path.isfile(_json_file_path):
@@ -69,7 +69,7 @@ def _load():
 
 
 def _parse_config(loaded_config, config_path):
-    current_version = __version__
+    current_version = solaar.__version__
     parsed_config = [current_version]
     try:
         if not loaded_config:
@@ -153,7 +153,7 @@ def do_save():
             save_timer = None
         try:
             with open(_yaml_file_path, "w") as config_file:
-                yaml.dump(_config, config_file, default_flow_style=None, width=150)
+                yaml_module().dump(_config, config_file, default_flow_style=None, width=150)
             if logger.isEnabledFor(logging.INFO):
                 logger.info("saved %s to %s", _config, _yaml_file_path)
         except Exception as e:
@@ -216,14 +216,14 @@ def device_representer(dumper, data):
     return dumper.represent_mapping("tag:yaml.org,2002:map", data)
 
 
-yaml.add_representer(_DeviceEntry, device_representer)
+on_yaml(lambda yaml: yaml.add_representer(_DeviceEntry, device_representer))
 
 
 def named_int_representer(dumper, data):
     return dumper.represent_scalar("tag:yaml.org,2002:int", str(int(data)))
 
 
-yaml.add_representer(NamedInt, named_int_representer)
+on_yaml(lambda yaml: yaml.add_representer(NamedInt, named_int_representer))
 
 
 # A device can be identified by a combination of WPID and serial number (for receiver-connected devices)
@@ -29,13 +29,16 @@ import tempfile
 
 from traceback import format_exc
 
+from hidapi import trace
+from logitech_receiver import base
+
+import solaar
+
 from solaar import NAME
-from solaar import __version__
 from solaar import cli
 from solaar import configuration
-from solaar import dbus
-from solaar import listener
-from solaar import ui
+from solaar import headless
+from solaar import mainloop
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +52,17 @@ def _require(module, os_package, gi=None, gi_package=None, gi_version=None):
         sys.exit(f"{NAME.lower()}: missing required system package {os_package}")
 
 
+class _VersionAction(argparse.Action):
+    """Like the version action, but only finds out the version when asked for it."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(f"{parser.prog} {solaar.__version__}")
+        parser.exit()
+
+
 battery_icons_style = "regular"
 tray_icon_size = None
 temp = tempfile.NamedTemporaryFile(prefix="Solaar_", mode="w", delete=True)
@@ -91,7 +105,20 @@ def _parse_arguments():
         help="prefer regular battery / symbolic battery / solaar icons",
     )
     arg_parser.add_argument("--tray-icon-size", type=int, help="explicit size for tray icons")
-    arg_parser.add_argument("-V", "--version", action="version", version="%(prog)s " + __version__)
+    arg_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without GTK: listen to devices, apply settings, and evaluate rules, with no window or tray icon",
+    )
+    arg_parser.add_argument("--record", metavar="FILE", help="record all HID++ traffic to a trace file (for debugging)")
+    arg_parser.add_argument("--replay", metavar="FILE", help="replay a recorded trace file instead of using devices")
+    arg_parser.add_argument(
+        "--replay-mode",
+        choices=("realtime", "fast"),
+        default="realtime",
+        help="replay replies with their recorded delays (the default) or as fast as possible",
+    )
+    arg_parser.add_argument("-V", "--version", action=_VersionAction, help="show program's version number and exit")
     arg_parser.add_argument("--help-actions", action="store_true", help="describe the command-line actions")
     arg_parser.add_argument(
         "action",
@@ -130,7 +157,7 @@ def _parse_arguments():
     if not args.action:
         if logger.isEnabledFor(logging.INFO):
             language, encoding = locale.getlocale()
-            logger.info("version %s, language %s (%s)", __version__, language, encoding)
+            logger.info("version %s, language %s (%s)", solaar.__version__, language, encoding)
 
     return args
 
@@ -155,12 +182,19 @@ def main():
     args = _parse_arguments()
     if not args:
         return
+    if args.record:
+        base.hidapi = trace.Recorder(base.hidapi, args.record)
+    elif args.replay:
+        base.hidapi = trace.Replay(args.replay, realtime=args.replay_mode == "realtime")
     if args.action:
         # if any argument, run comandline and exit
         return cli.run(args.action, args.hidraw_path)
 
-    gi = _require("gi", "python3-gi (in Ubuntu) or python3-gobject (in Fedora)")
-    _require("gi.repository.Gtk", "gir1.2-gtk-3.0", gi, "Gtk", "3.0")
+    if args.headless:
+        mainloop.use_plain_loop()  # before anything that uses the main loop is imported
+    else:
+        gi = _require("gi", "python3-gi (in Ubuntu) or python3-gobject (in Fedora)")
+        _require("gi.repository.Gtk", "gir1.2-gtk-3.0", gi, "Gtk", "3.0")
 
     # handle ^C in console
     signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -176,6 +210,19 @@ def main():
     ):
         logger.warning("Solaar udev file not found in expected location")
         logger.warning("See https://pwr-solaar.github.io/Solaar/installation for more information")
+    if args.headless:
+        configuration.defer_saves = True
+        try:
+            headless.run()
+        except Exception:
+            sys.exit(f"{NAME.lower()}: error: {format_exc()}")
+        temp.close()
+        return
+
+    from solaar import dbus
+    from solaar import listener
+    from solaar import ui
+
     try:
         listener.setup_scanner(ui.status_changed, ui.setting_changed, ui.common.error_dialog)
 
@@ -0,0 +1,73 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Running Solaar without GTK or GDK, e.g., as a service on a server or a kiosk.
+
+Devices are listened to, their settings are applied, and rules are evaluated, from a plain main loop.
+Rule actions that need GDK, like KeyPress, are not available.
+"""
+
+import logging
+
+from solaar import mainloop
+
+logger = logging.getLogger(__name__)
+
+
+def _status_changed(device, alert=None, reason=None, refresh=False):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("status of %s changed: %s", device, reason or "")
+
+
+def _setting_changed(device, setting_class, values):
+    mainloop.glib().idle_add(_record_setting, device, setting_class, values)
+
+
+def _record_setting(device, setting_class, values):
+    """Record a change to a setting made elsewhere, e.g., on the device, like the GUI does but without showing it."""
+    setting = next((s for s in device.settings if s.name == setting_class.name), None)
+    if setting is None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("no setting for %s found on %s to record a change made elsewhere", setting_class.name, device)
+        return
+    if len(values) > 1:
+        setting.update_key_value(values[0], values[-1])
+    else:
+        setting.update(values[-1])
+
+
+def _error(reason, object_):
+    if reason == "permissions":
+        logger.error("no permission to open %s, see https://pwr-solaar.github.io/Solaar/installation", object_)
+    elif reason == "nodevice":
+        logger.error("cannot open %s, the device may have been unplugged", object_)
+    else:
+        logger.error("%s: %s", reason, object_)
+
+
+def run():
+    """Listen to devices until the process is stopped. mainloop.use_plain_loop() must have been called first."""
+    loop = mainloop.glib()
+    assert isinstance(loop, mainloop.PlainLoop)
+
+    from solaar import listener
+
+    listener.setup_scanner(_status_changed, _setting_changed, _error)
+    loop.idle_add(listener.start_all)
+    try:
+        loop.run()
+    finally:
+        listener.stop_all()
@@ -23,7 +23,6 @@ import time
 from collections import namedtuple
 from functools import partial
 
-import gi
 import logitech_receiver
 
 from logitech_receiver import base
@@ -35,9 +34,8 @@ from logitech_receiver import notifications
 from . import configuration
 from . import dbus
 from . import i18n
-
-gi.require_version("Gtk", "3.0")  # NOQA: E402
-from gi.repository import GLib  # NOQA: E402 # isort:skip
+from . import mainloop
+from . import stats_export
 
 logger = logging.getLogger(__name__)
 
@@ -342,7 +340,8 @@ def setup_scanner(status_changed_callback, setting_changed_callback, error_callb
     _status_callback = status_changed_callback
     _setting_callback = setting_changed_callback
     _error_callback = error_callback
-    base.notify_on_receivers_glib(GLib, _process_receiver_event)
+    base.notify_on_receivers_glib(mainloop.glib(), _process_receiver_event)
+    stats_export.start()
 
 
 def _process_add(device_info, retry):
@@ -357,7 +356,7 @@ def _process_add(device_info, retry):
             except Exception:
                 pass
             if retry:
-                GLib.timeout_add(2000.0, _process_add, device_info, retry - 1)
+                mainloop.glib().timeout_add(2000.0, _process_add, device_info, retry - 1)
             else:
                 _error_callback("permissions", device_info.path)
         else:
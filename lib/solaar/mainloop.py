@@ -0,0 +1,181 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""The main loop that device events and rule actions are run from.
+
+This is GLib, unless Solaar runs headless, without GTK. Then it is a plain loop
+with the part of the GLib API that the listeners and rules use.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+
+from select import select
+
+logger = logging.getLogger(__name__)
+
+_plain_loop = None
+_glib = None
+
+
+def use_plain_loop() -> PlainLoop:
+    """Run without GLib. Must be done before importing modules that use the main loop."""
+    global _plain_loop
+    if _plain_loop is None:
+        _plain_loop = PlainLoop()
+    return _plain_loop
+
+
+def headless() -> bool:
+    return _plain_loop is not None
+
+
+def glib():
+    """GLib, or the plain loop that stands in for it when running headless."""
+    global _glib
+    if _plain_loop is not None:
+        return _plain_loop
+    if _glib is None:
+        import gi
+
+        gi.require_version("GLib", "2.0")
+        from gi.repository import GLib
+
+        _glib = GLib
+    return _glib
+
+
+class PlainLoop:
+    """A main loop with the GLib functions for idle and timeout callbacks and for watching
+    for input, which can be added from any thread.
+
+    As in GLib, callbacks are called again as long as they return True.
+    """
+
+    IO_IN = 1
+    PRIORITY_DEFAULT = 0
+    PRIORITY_LOW = 300
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._timeouts = []  # heap of (when, source id, interval in seconds, function, arguments)
+        self._watches = {}  # source id -> (channel, function, arguments)
+        self._pending = set()  # source ids of the timeouts that have not been removed
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_write, False)
+        self._running = False
+
+    def _wakeup(self):
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except BlockingIOError:  # already woken up
+            pass
+
+    def _add_timeout(self, interval: float, function, args) -> int:
+        with self._lock:
+            source_id = next(self._ids)
+            heapq.heappush(self._timeouts, (time.monotonic() + interval, source_id, interval, function, args))
+            self._pending.add(source_id)
+        self._wakeup()
+        return source_id
+
+    def idle_add(self, function, *args, priority=None) -> int:
+        return self._add_timeout(0, function, args)
+
+    def timeout_add(self, interval, function, *args, priority=None) -> int:
+        return self._add_timeout(interval / 1000, function, args)
+
+    def timeout_add_seconds(self, interval, function, *args, priority=None) -> int:
+        return self._add_timeout(interval, function, args)
+
+    def io_add_watch(self, channel, priority, condition, function, *args) -> int:
+        """Call function(channel, condition, *args) when the channel, with a fileno(), has input."""
+        assert condition == self.IO_IN
+        with self._lock:
+            source_id = next(self._ids)
+            self._watches[source_id] = (channel, function, args)
+        self._wakeup()
+        return source_id
+
+    def unix_signal_add(self, priority, signum, function, *args) -> int:
+        """Call function(*args) from the loop when the process receives the signal. Must be called from the main thread."""
+        with self._lock:
+            source_id = next(self._ids)
+        signal.signal(signum, lambda _signum, _frame: self.idle_add(lambda: function(*args) and False))
+        return source_id
+
+    def source_remove(self, source_id: int) -> bool:
+        with self._lock:
+            if self._watches.pop(source_id, None) is not None:
+                return True
+            if source_id in self._pending:
+                self._pending.discard(source_id)
+                return True
+        return False
+
+    @staticmethod
+    def _call(function, args) -> bool:
+        try:
+            return bool(function(*args))
+        except Exception:
+            logger.exception("error in main loop callback %s", function)
+            return False
+
+    def iteration(self, timeout: float | None = None):
+        """Wait up to timeout seconds (None for no limit) for input or a timeout, then run the callbacks that are due."""
+        with self._lock:
+            if self._timeouts:
+                due = max(0.0, self._timeouts[0][0] - time.monotonic())
+                timeout = due if timeout is None else min(timeout, due)
+            watches = list(self._watches.items())
+        readable = select([self._wakeup_read] + [channel for _i, (channel, _f, _a) in watches], [], [], timeout)[0]
+        if self._wakeup_read in readable:
+            os.read(self._wakeup_read, 4096)
+        for source_id, (channel, function, args) in watches:
+            if channel in readable and not self._call(function, (channel, self.IO_IN) + args):
+                with self._lock:
+                    self._watches.pop(source_id, None)
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._timeouts and self._timeouts[0][0] <= now:
+                due.append(heapq.heappop(self._timeouts))
+        for _when, source_id, interval, function, args in due:
+            if source_id not in self._pending:  # removed
+                continue
+            again = self._call(function, args)
+            with self._lock:
+                if again and source_id in self._pending:
+                    heapq.heappush(self._timeouts, (time.monotonic() + interval, source_id, interval, function, args))
+                else:
+                    self._pending.discard(source_id)
+
+    def run(self):
+        self._running = True
+        while self._running:
+            self.iteration()
+
+    def quit(self):
+        self._running = False
+        self._wakeup()
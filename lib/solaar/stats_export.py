@@ -0,0 +1,126 @@
+## Copyright (C) 2024  Solaar Contributors https://pwr-solaar.github.io/Solaar/
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Export of the request statistics of the running Solaar, for ``solaar stats`` to read.
+
+The statistics are kept per process, so ``solaar stats`` asks the running Solaar for them
+with SIGUSR1, and the running Solaar then writes them to a file in the user's runtime directory.
+Nothing is written unless they are asked for.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import signal
+import time
+
+from typing import Any
+
+from logitech_receiver import stats
+
+from solaar import mainloop
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TIMEOUT = 2.0  # how long to wait for the running Solaar to export its statistics, in seconds
+
+_XDG_RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR")
+_XDG_CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+_file_path = os.path.join(_XDG_RUNTIME_DIR or _XDG_CACHE_HOME, "solaar", "stats.json")
+_pid_path = os.path.join(_XDG_RUNTIME_DIR or _XDG_CACHE_HOME, "solaar", "stats.pid")
+
+_source_id = None
+
+
+def export() -> bool:
+    """Write the statistics of this process to the export file."""
+    try:
+        os.makedirs(os.path.dirname(_file_path), exist_ok=True)
+        stats.dump(_file_path + ".tmp")
+        os.replace(_file_path + ".tmp", _file_path)  # so that it is never read half written
+    except OSError as e:
+        logger.warning("failed to export statistics to %s: %s", _file_path, e)
+    return True  # keep on exporting when asked to
+
+
+def start():
+    """Export the statistics from the main loop whenever they are asked for. Must be called from the main thread."""
+    global _source_id
+    if _source_id is not None:
+        return
+    glib = mainloop.glib()
+    _source_id = glib.unix_signal_add(glib.PRIORITY_DEFAULT, signal.SIGUSR1, export)
+    try:
+        os.makedirs(os.path.dirname(_pid_path), exist_ok=True)
+        with open(_pid_path, "w") as pid_file:
+            pid_file.write(str(os.getpid()))
+        atexit.register(_remove_pid_file)
+    except OSError as e:
+        logger.warning("failed to write %s: %s", _pid_path, e)
+
+
+def _remove_pid_file():
+    try:
+        if _running_pid() == os.getpid():
+            os.remove(_pid_path)
+    except OSError:
+        pass
+
+
+def _running_pid() -> int | None:
+    """The process ID of the running Solaar, if there is one."""
+    try:
+        with open(_pid_path) as pid_file:
+            pid = int(pid_file.read())
+        if os.path.isdir("/proc"):  # make sure the process ID has not been reused by another program
+            with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+                return pid if b"solaar" in cmdline.read().lower() else None
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+def _modified() -> int | None:
+    try:
+        return os.stat(_file_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def request(timeout: float = EXPORT_TIMEOUT) -> dict[str, Any] | None:
+    """Ask the running Solaar to export its statistics and read them, None if no Solaar is running or it does not answer."""
+    pid = _running_pid()
+    if pid is None:
+        return None
+    modified = _modified()
+    try:
+        os.kill(pid, signal.SIGUSR1)
+    except OSError:
+        return None
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if _modified() != modified:
+            try:
+                with open(_file_path) as stats_file:
+                    return json.load(stats_file)
+            except (OSError, ValueError):
+                return None
+        time.sleep(0.02)
+    return None
@@ -20,9 +20,10 @@ import logging
 from typing import Callable
 
 import gi
-import yaml
 
+from logitech_receiver import settings_detection
 from logitech_receiver.common import Alert
+from logitech_receiver.common import yaml_module
 
 from solaar.i18n import _
 from solaar.ui.config_panel import change_setting
@@ -70,7 +71,7 @@ def _activate(app):
 
 def _command_line(app, command_line):
     args = command_line.get_arguments()
-    args = yaml.safe_load("".join(args)) if args else args
+    args = yaml_module().safe_load("".join(args)) if args else args
     if not args:
         _activate(app)
     elif args[0] == "config":  # config call from remote instance
@@ -89,6 +90,7 @@ def _shutdown(_app, shutdown_hook):
         logger.debug("shutdown")
     shutdown_hook()
     common.stop_async()
+    settings_detection.shutdown()
     tray.destroy()
     desktop_notifications.uninit()
 
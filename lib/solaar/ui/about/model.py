@@ -20,7 +20,8 @@ from datetime import datetime
 from typing import List
 from typing import Tuple
 
-from solaar import __version__
+import solaar
+
 from solaar.i18n import _
 
 
@@ -30,7 +31,7 @@ def _get_current_year() -> int:
 
 class AboutModel:
     def get_version(self) -> str:
-        return __version__
+        return solaar.__version__
 
     def get_description(self) -> str:
         return _("Manages Logitech receivers,\nkeyboards, mice, and tablets.")
@@ -24,6 +24,7 @@ import gi
 
 from logitech_receiver import hidpp20
 from logitech_receiver import settings
+from logitech_receiver import settings_detection
 
 from solaar.i18n import _
 from solaar.i18n import ngettext
@@ -720,6 +721,7 @@ def _disable_listbox_highlight_bg(lb):
 # config panel
 _box = None
 _items = {}
+_detecting = {}  # device id -> future of the detection of its settings
 
 
 def create():
@@ -754,22 +756,50 @@ def update(device, is_online=None):
         sbox = _items[k]
         sbox.set_visible(k[0:2] == device_id)
 
-    for s in device.settings:
-        k = (device_id[0], device_id[1], s.name)
-        if k in _items:
-            sbox = _items[k]
-        else:
-            sbox = _create_sbox(s, device)
-            if sbox is None:
-                continue
-            _items[k] = sbox
-            _box.pack_start(sbox, False, False, 0)
-        sensitive = device.persister.get_sensitivity(s.name) if device.persister else True
-        _read_async(s, False, sbox, is_online, sensitive)
+    # show the settings detected so far and the others as they are detected, instead of waiting for all of them
+    detected = device.settings_detected
+    for s in device.settings if detected else device.detected_settings:
+        _show_setting(device, device_id, s, is_online)
+    if not detected and device_id not in _detecting:
+        _detecting[device_id] = settings_detection.schedule(
+            device, lambda s: GLib.idle_add(_setting_detected, device, device_id, s, is_online, priority=99)
+        )
+        _detecting[device_id].add_done_callback(
+            lambda future: GLib.idle_add(_detection_done, device, device_id, is_online, priority=99)
+        )
 
     _box.set_visible(True)
 
 
+def _show_setting(device, device_id, s, is_online, read=True):
+    k = (device_id[0], device_id[1], s.name)
+    if k in _items:
+        if not read:
+            return
+        sbox = _items[k]
+    else:
+        sbox = _create_sbox(s, device)
+        if sbox is None:
+            return
+        _items[k] = sbox
+        _box.pack_start(sbox, False, False, 0)
+    sensitive = device.persister.get_sensitivity(s.name) if device.persister else True
+    _read_async(s, False, sbox, is_online, sensitive)
+
+
+def _setting_detected(device, device_id, s, is_online):
+    if _box is not None and _box._last_device == device_id:
+        _show_setting(device, device_id, s, is_online, read=False)
+
+
+def _detection_done(device, device_id, is_online):
+    _detecting.pop(device_id, None)
+    # settings detected by a concurrent detection, e.g. when the listener applies them, are not passed on as found
+    if _box is not None and _box._last_device == device_id:
+        for s in device.detected_settings:
+            _show_setting(device, device_id, s, is_online, read=False)
+
+
 def clean(device):
     """Remove the controls for a given device serial.
     Needed after the device has been unpaired.
@@ -786,6 +816,7 @@ def destroy():
     global _box
     _box = None
     _items.clear()
+    _detecting.clear()
 
 
 def change_setting(device, setting, values):
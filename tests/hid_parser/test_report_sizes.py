@@ -0,0 +1,77 @@
+import hid_parser
+import pytest
+
+# the HID++ collections of a Unifying receiver
+RECEIVER = bytes.fromhex(
+    "0600FF0901A101851075089506150026FF000901810009019100C0"
+    "0600FF0902A101851175089513150026FF000902810009029100C0"
+    "0600FF0904A10185207508950E150026FF000941810009419100"
+    "8521951F150026FF000942810009429100C0"
+)
+# a boot keyboard, without report IDs
+KEYBOARD = bytes.fromhex(
+    "05010906A101050719E029E71500250175019508810295017508810395057501050819012905910295017503910395067508"
+    "150026FF00050719002AFF008100C0"
+)
+# a consumer control collection with a large usage range
+CONSUMER = bytes.fromhex("050C0901A101850375109502150126FF0219012AFF028100C0")
+MOUSE = bytes.fromhex("05010902A1010901A100050919012903150025019503750181029505750181010501093009311581257F750895028106C0C0")
+
+
+@pytest.mark.filterwarnings("ignore::hid_parser.HIDWarning")
+@pytest.mark.parametrize(
+    "descriptor",
+    [RECEIVER, KEYBOARD, CONSUMER, MOUSE, RECEIVER + CONSUMER],
+    ids=["receiver", "keyboard", "consumer", "mouse", "receiver and consumer"],
+)
+def test_report_sizes_match_report_descriptor(descriptor):
+    rd = hid_parser.ReportDescriptor(descriptor)
+
+    for tag, report_ids, report_size in (
+        (hid_parser.TagMain.INPUT, rd.input_report_ids, rd.get_input_report_size),
+        (hid_parser.TagMain.OUTPUT, rd.output_report_ids, rd.get_output_report_size),
+        (hid_parser.TagMain.FEATURE, rd.feature_report_ids, rd.get_feature_report_size),
+    ):
+        expected = {report_id: int(report_size(report_id)) for report_id in report_ids}
+
+        assert hid_parser.report_sizes(descriptor, tag) == expected
+
+
+def test_report_sizes_of_receiver():
+    sizes = hid_parser.report_sizes(RECEIVER)
+
+    assert sizes == {0x10: 6 * 8, 0x11: 19 * 8, 0x20: 14 * 8, 0x21: 31 * 8}
+
+
+@pytest.mark.parametrize(
+    "descriptor",
+    [
+        RECEIVER[:-2],  # truncated item
+        bytes.fromhex("0600FF0901A1018110C0"),  # input item without report size and count
+        KEYBOARD[:-1] + bytes.fromhex("8510") + KEYBOARD[-1:],  # report ID after unnumbered items
+    ],
+    ids=["truncated", "no report size", "late report ID"],
+)
+def test_report_sizes_invalid(descriptor):
+    with pytest.raises(hid_parser.InvalidReportDescriptor):
+        hid_parser.report_sizes(descriptor)
+
+
+def test_report_descriptor_is_parsed_lazily(mocker):
+    parse = mocker.spy(hid_parser.ReportDescriptor, "_parse")
+
+    rd = hid_parser.ReportDescriptor(RECEIVER)
+
+    assert parse.call_count == 0
+    assert rd.input_report_ids == [0x10, 0x11, 0x20, 0x21]
+    assert int(rd.get_input_report_size(0x11)) == 19 * 8
+    assert parse.call_count == 1
+
+
+def test_report_descriptor_errors_when_items_are_needed():
+    rd = hid_parser.ReportDescriptor(bytes.fromhex("0600FF0901A1018110C0"))
+
+    with pytest.raises(hid_parser.InvalidReportDescriptor):
+        rd.parse_input_report(bytes.fromhex("10010203040506"))
+    with pytest.raises(hid_parser.InvalidReportDescriptor):
+        rd.get_input_items(0x10)
@@ -0,0 +1,67 @@
+import json
+
+from unittest import mock
+
+import pytest
+
+from hidapi import descriptor_cache
+
+# vendor collections with the HID++ short (0x10, 6 bytes) and long (0x11, 19 bytes) reports of a receiver
+HIDPP_DESCRIPTOR = bytes.fromhex(
+    "0600FF0901A1018510750895061500 26FF00 0901 8100 0901 9100 C0"
+    "0600FF0902A1018511750895131500 26FF00 0902 8100 0902 9100 C0".replace(" ", "")
+)
+# a mouse with no HID++ reports
+MOUSE_DESCRIPTOR = bytes.fromhex(
+    "05010902A1010901A100050919012903150025019503750181029505750181010501093009311581257F750895028106C0C0"
+)
+
+
+@pytest.fixture
+def cache_file(mocker, tmp_path):
+    path = tmp_path / "solaar" / "report_descriptors.json"
+    mocker.patch.object(descriptor_cache, "_file_path", str(path))
+    mocker.patch.object(descriptor_cache, "_cache", None)
+    return path
+
+
+def test_parses_once(cache_file):
+    parse = mock.Mock(return_value=(True, True))
+
+    assert descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, parse) == (True, True)
+    assert descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, parse) == (True, True)
+    assert parse.call_count == 1
+
+
+def test_persists(cache_file):
+    descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, lambda d: (True, False))
+    assert json.loads(cache_file.read_text())["descriptors"]
+    descriptor_cache._cache = None  # as in a new process
+    parse = mock.Mock()
+
+    assert descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, parse) == (True, False)
+    parse.assert_not_called()
+
+
+def test_keyed_by_descriptor(cache_file):
+    descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, lambda d: (True, True))
+
+    assert descriptor_cache.hidpp_capabilities(MOUSE_DESCRIPTOR, lambda d: (False, False)) == (False, False)
+
+
+def test_parse_errors_are_not_cached(cache_file):
+    parse = mock.Mock(side_effect=ValueError("bad descriptor"))
+
+    for _i in range(2):
+        with pytest.raises(ValueError):
+            descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, parse)
+    assert parse.call_count == 2
+
+
+@pytest.mark.parametrize("content", ["not json", '{"version": 0, "descriptors": {"x": [true, true]}}'])
+def test_ignores_bad_or_old_file(cache_file, content):
+    cache_file.parent.mkdir()
+    cache_file.write_text(content)
+
+    assert descriptor_cache.hidpp_capabilities(HIDPP_DESCRIPTOR, lambda d: (False, True)) == (False, True)
+    assert json.loads(cache_file.read_text())["version"] == descriptor_cache._VERSION
@@ -0,0 +1,52 @@
+import os
+import platform
+
+import pytest
+
+from hidapi import hidraw_watch
+
+pytestmark = pytest.mark.skipif(platform.system() != "Linux", reason="inotify is only available on Linux")
+
+
+@pytest.fixture
+def watcher(tmp_path, mocker):
+    mocker.patch.object(hidraw_watch, "SETTLE_DELAY", 0.05)
+    watcher = hidraw_watch.HidrawWatcher(str(tmp_path))
+    yield watcher
+    watcher.close()
+
+
+def test_wait_times_out(watcher):
+    assert watcher.wait(0.01) == set()
+
+
+def test_wait_for_created_and_removed_nodes(watcher, tmp_path):
+    (tmp_path / "hidraw3").touch()
+    (tmp_path / "hidraw4").touch()
+    (tmp_path / "input1").touch()
+
+    assert watcher.wait(1) == {str(tmp_path / "hidraw3"), str(tmp_path / "hidraw4")}
+
+    os.remove(tmp_path / "hidraw3")
+
+    assert watcher.wait(1) == {str(tmp_path / "hidraw3")}
+
+
+def test_wait_for_permission_changes(watcher, tmp_path):
+    (tmp_path / "hidraw3").touch()
+    watcher.wait(1)
+
+    os.chmod(tmp_path / "hidraw3", 0o660)
+
+    assert watcher.wait(1) == {str(tmp_path / "hidraw3")}
+
+
+def test_wait_ignores_other_nodes(watcher, tmp_path):
+    (tmp_path / "input1").touch()
+
+    assert watcher.wait(0.1) == set()
+
+
+def test_watch_missing_directory(tmp_path):
+    with pytest.raises(OSError):
+        hidraw_watch.HidrawWatcher(str(tmp_path / "missing"))
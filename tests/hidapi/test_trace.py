@@ -0,0 +1,146 @@
+import queue
+import time
+
+import pytest
+
+from hidapi import trace
+from hidapi.common import DeviceInfo
+from logitech_receiver import base
+
+DEVICE_INFO = DeviceInfo(
+    path="/dev/hidraw4",
+    bus_id=3,
+    vendor_id="046d",
+    product_id="c52b",
+    interface=2,
+    driver="logitech-djreceiver",
+    manufacturer=None,
+    product=None,
+    serial=None,
+    release=None,
+    isDevice=False,
+    hidpp_short=True,
+    hidpp_long=True,
+)
+REQUEST = b"\x11\x01\x05\x12" + bytes(16)
+REPLY = b"\x11\x01\x05\x12\xaa\xbb" + bytes(14)
+NOTIFICATION = b"\x10\x01\x41\x04\x72\x01\x02"
+
+
+class FakeBackend:
+    def __init__(self):
+        self.replies = queue.Queue()
+
+    def enumerate(self, filter_func):
+        yield DEVICE_INFO
+
+    def find_paired_node(self, receiver_path, index, timeout):
+        return f"{receiver_path}.{index}"
+
+    def open_path(self, path):
+        return 7
+
+    def close(self, handle):
+        pass
+
+    def write(self, handle, data):
+        self.replies.put(REPLY)
+        self.replies.put(NOTIFICATION)
+
+    def read_into(self, handle, buffer, timeout_ms):
+        try:
+            data = self.replies.get_nowait()
+        except queue.Empty:
+            return 0
+        buffer[: len(data)] = data
+        return len(data)
+
+    def get_serial(self, handle):
+        return "1234"
+
+
+def _read(replay, handle, timeout_ms=0):
+    buffer = bytearray(32)
+    count = replay.read_into(handle, buffer, timeout_ms)
+    return bytes(buffer[:count])
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    path = str(tmp_path / "session.trace")
+    recorder = trace.Recorder(FakeBackend(), path)
+    assert list(recorder.enumerate(None)) == [DEVICE_INFO]
+    assert recorder.find_paired_node("/dev/hidraw4", 1, 1) == "/dev/hidraw4.1"
+    handle = recorder.open_path("/dev/hidraw4")
+    recorder.write(handle, REQUEST)
+    buffer = bytearray(32)
+    assert recorder.read_into(handle, buffer, 0) == len(REPLY)
+    assert recorder.read_into(handle, buffer, 0) == len(NOTIFICATION)
+    assert recorder.read_into(handle, buffer, 0) == 0
+    assert recorder.get_serial(handle) == "1234"
+    recorder.close(handle)
+    recorder.close_trace()
+    return path
+
+
+def test_record(recorded):
+    records = trace.load(recorded)
+
+    assert [r.kind for r in records] == [trace.CALL, trace.CALL, trace.OPEN, trace.WRITE, trace.READ, trace.READ, trace.CLOSE]
+    assert records[3].payload == REQUEST
+    assert records[4].payload == REPLY
+    assert all(a.timestamp <= b.timestamp for a, b in zip(records, records[1:]))
+
+
+def test_replay(recorded):
+    replay = trace.Replay(recorded)
+
+    assert list(replay.enumerate(None)) == [DEVICE_INFO]
+    assert replay.find_paired_node("/dev/hidraw4", 1, 1) == "/dev/hidraw4.1"
+    handle = replay.open_path("/dev/hidraw4")
+    assert _read(replay, handle) == b""  # nothing before the request
+    replay.write(handle, REQUEST)
+    assert _read(replay, handle) == REPLY
+    assert replay.read(handle, 32, 0) == NOTIFICATION
+    replay.close(handle)
+
+
+def test_replay_unknown_path(recorded):
+    replay = trace.Replay(recorded)
+
+    with pytest.raises(OSError):
+        replay.open_path("/dev/hidraw9")
+
+
+def test_replay_other_software_id(recorded):
+    replay = trace.Replay(recorded)
+    handle = replay.open_path("/dev/hidraw4")
+
+    replay.write(handle, b"\x11\x01\x05\x1c" + bytes(16))
+
+    assert _read(replay, handle) == b"\x11\x01\x05\x1c\xaa\xbb" + bytes(14)
+
+
+def test_replay_realtime(tmp_path):
+    path = tmp_path / "session.trace"
+    records = [(0.0, trace.OPEN, 0, b"/dev/hidraw4"), (1.0, trace.WRITE, 0, REQUEST), (1.1, trace.READ, 0, REPLY)]
+    path.write_bytes(trace.MAGIC + b"".join(trace._RECORD.pack(t, k, s, len(p)) + p for t, k, s, p in records))
+    replay = trace.Replay(str(path), realtime=True)
+    handle = replay.open_path("/dev/hidraw4")
+
+    replay.write(handle, REQUEST)
+    start = time.monotonic()
+    assert _read(replay, handle) == b""
+    assert _read(replay, handle, 1000) == REPLY
+    assert 0.05 < time.monotonic() - start < 0.5
+
+
+def test_request_from_replay(recorded, mocker):
+    replay = trace.Replay(recorded)
+    mocker.patch.object(base, "hidapi", replay)
+    mocker.patch.object(base, "_get_next_sw_id", return_value=0xC)  # not the software ID in the trace
+    handle = base.open_path("/dev/hidraw4")
+
+    reply = base.request(handle, 1, 0x0510, long_message=True)
+
+    assert reply[:2] == b"\xaa\xbb"
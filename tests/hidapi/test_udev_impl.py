@@ -0,0 +1,96 @@
+import threading
+import time
+
+from dataclasses import dataclass
+from dataclasses import field
+
+import pytest
+
+udev_impl = pytest.importorskip("hidapi.udev_impl")
+
+
+@dataclass
+class FakeUdevDevice:
+    device_node: str
+    hid: dict = field(default_factory=dict)
+
+    def find_parent(self, subsystem):
+        assert subsystem == "hid"
+        return self.hid
+
+
+RECEIVER = FakeUdevDevice("/dev/hidraw0", {"HID_PHYS": "usb-0000:00:14.0-1/input2", "HID_ID": "0003:0000046D:0000C52B"})
+PAIRED = FakeUdevDevice("/dev/hidraw5", {"HID_PHYS": "usb-0000:00:14.0-1/input2:1", "HID_ID": "0003:0000046D:00004082"})
+
+
+@pytest.fixture
+def udev(mocker):
+    devices = [RECEIVER]
+    context = mocker.patch("pyudev.Context")
+    context.return_value.list_devices.side_effect = lambda subsystem: list(devices)
+    mocker.patch.object(udev_impl, "_phys_index", udev_impl._PhysIndex())
+    mocker.patch.object(udev_impl, "_RESCAN_INTERVAL", 0.05)
+    return devices
+
+
+def test_find_paired_node(udev):
+    udev.append(PAIRED)
+
+    assert udev_impl.find_paired_node("/dev/hidraw0", 1, 1) == "/dev/hidraw5"
+    assert udev_impl.find_paired_node_wpid("/dev/hidraw0", 1) == "4082"
+
+
+def test_find_paired_node_timeout(udev):
+    start = time.time()
+
+    assert udev_impl.find_paired_node("/dev/hidraw0", 2, 0.2) is None
+    assert 0.2 <= time.time() - start < 1
+
+
+def test_find_paired_node_waits_for_udev_event(udev):
+    udev_impl._phys_index.start_monitoring()
+    udev_impl._phys_index.find("none")  # initial scan
+    udev_impl._RESCAN_INTERVAL = 10  # only an event can end the wait
+    threading.Timer(0.1, udev_impl._phys_index.update, (udev_impl.ACTION_ADD, PAIRED)).start()
+    start = time.time()
+
+    assert udev_impl.find_paired_node("/dev/hidraw0", 1, 5) == "/dev/hidraw5"
+    assert time.time() - start < 1
+
+
+def test_find_paired_node_rescans_for_missed_device(udev):
+    udev_impl._phys_index.start_monitoring()
+    threading.Timer(0.1, udev.append, (PAIRED,)).start()
+
+    assert udev_impl.find_paired_node("/dev/hidraw0", 1, 2) == "/dev/hidraw5"
+
+
+def test_removed_node(udev):
+    udev_impl._phys_index.start_monitoring()
+    udev.append(PAIRED)
+    assert udev_impl.find_paired_node("/dev/hidraw0", 1, 0) == "/dev/hidraw5"
+
+    udev.remove(PAIRED)
+    udev_impl._phys_index.update(udev_impl.ACTION_REMOVE, FakeUdevDevice("/dev/hidraw5"))
+
+    assert udev_impl.find_paired_node("/dev/hidraw0", 1, 0) is None
+
+
+HIDPP_SHORT_DESCRIPTOR = bytes.fromhex("0600FF0901A101851075089506150026FF000901810009019100C0")
+HIDPP_LONG_DESCRIPTOR = bytes.fromhex("0600FF0902A101851175089513150026FF000902810009029100C0")
+MOUSE_DESCRIPTOR = bytes.fromhex(
+    "05010902A1010901A100050919012903150025019503750181029505750181010501093009311581257F750895028106C0C0"
+)
+
+
+@pytest.mark.parametrize(
+    "descriptor, capabilities",
+    [
+        (HIDPP_SHORT_DESCRIPTOR, (True, False)),
+        (HIDPP_LONG_DESCRIPTOR, (False, True)),
+        (HIDPP_SHORT_DESCRIPTOR + HIDPP_LONG_DESCRIPTOR, (True, True)),
+        (MOUSE_DESCRIPTOR, (False, False)),
+    ],
+)
+def test_hidpp_capabilities(descriptor, capabilities):
+    assert udev_impl._hidpp_capabilities(descriptor) == capabilities
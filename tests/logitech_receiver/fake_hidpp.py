@@ -398,6 +398,7 @@ class Device:
     gestures = device.Device.gestures
     __hash__ = device.Device.__hash__
     feature_request = device.Device.feature_request
+    feature_requests = device.Device.feature_requests
 
     def __post_init__(self):
         self._name = self.name
@@ -422,6 +423,9 @@ class Device:
                 return bytes.fromhex(r.response) if isinstance(r.response, str) else r.response
         print("RESPONSE", self._name, None)
 
+    def requests(self, calls):
+        return [self.request(*call) for call in calls]
+
     def ping(self, handle=None, devnumber=None, long_message=False):
         print("PING", self._protocol)
         return self._protocol
@@ -1,6 +1,13 @@
+import queue
+import threading
+
 import pytest
 
 from logitech_receiver import base
+from logitech_receiver import codec
+from logitech_receiver import exceptions
+from logitech_receiver import stats
+from logitech_receiver import timeouts
 
 
 @pytest.mark.parametrize(
@@ -76,6 +83,44 @@ def test_filter_products_of_interest(product_id, hidpp_short, hidpp_long):
         assert receiver_info["product_id"] == product_id
 
 
+def test_filter_products_of_interest_known_devices():
+    for record in base.KNOWN_DEVICE_IDS:
+        found = base._filter_products_of_interest(record["bus_id"], record["vendor_id"], record["product_id"])
+
+        assert found["bus_id"] == record["bus_id"]
+        assert found["product_id"] == record["product_id"]
+        assert found["isDevice"]
+
+
+@pytest.mark.parametrize(
+    "bus_id, vendor_id, product_id, expected",
+    [
+        (0x03, 0x046D, 0xC07D, True),
+        (0x03, 0x046D, 0xC094, True),
+        (0x03, 0x046D, 0xC095, False),
+        (0x03, 0x046D, 0xC32B, True),
+        (0x03, 0x046D, 0xC344, True),
+        (0x03, 0x046D, 0xB012, False),
+        (0x05, 0x046D, 0xB012, True),
+        (0x05, 0x046D, 0xB0FF, True),
+        (0x05, 0x046D, 0xB316, False),
+        (0x05, 0x046D, 0xB3FF, True),
+        (0x05, 0x046D, 0xC07D, False),
+        (0x03, 0x1234, 0xC07D, False),
+        (0x01, 0x046D, 0xC07D, False),
+    ],
+)
+def test_other_device_check(bus_id, vendor_id, product_id, expected):
+    record = base._other_device_check(bus_id, vendor_id, product_id)
+
+    if expected:
+        assert record["bus_id"] == bus_id
+        assert record["product_id"] == product_id
+        assert record["isDevice"]
+    else:
+        assert record is None
+
+
 @pytest.mark.parametrize(
     "report_id, sub_id, address, valid_notification",
     [
@@ -111,3 +156,202 @@ def test_get_next_sw_id():
 
     assert res1 == 2
     assert res2 == 3
+
+
+class FakeHidapi:
+    """Answers HID++ requests written to it, optionally holding replies back to reorder them."""
+
+    def __init__(self, answer, hold=0):
+        self.answer = answer
+        self.hold = hold
+        self.held = []
+        self.replies = queue.Queue()
+        self.written = []
+
+    def write(self, handle, data):
+        self.written.append(data)
+        reply = self.answer(data)
+        if reply is not None:
+            self.held.append(reply)
+        if len(self.held) >= self.hold:
+            for reply in reversed(self.held):
+                self.replies.put(reply)
+            self.held = []
+
+    def read_into(self, handle, buffer, timeout_ms):
+        try:
+            data = self.replies.get(timeout=timeout_ms / 1000)
+        except queue.Empty:
+            return 0
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self, handle):
+        pass
+
+
+def _echo(data):  # reply to a long request with its own function and software ID, and the device number as data
+    return data[:4] + bytes([data[1]]) + bytes(15)
+
+
+def test_read_reuses_buffer(mocker):
+    fake = FakeHidapi(None)
+    mocker.patch.object(base, "hidapi", fake)
+    fake.replies.put(bytes([0x11, 0x02, 0x08, 0x00, 0x01]) + bytes(15))
+    fake.replies.put(bytes([0x10, 0x03, 0x41, 0x04, 0x72, 0x01, 0x02]))
+
+    frame1 = base.read(0x11, 0.1)
+    frame2 = base.read(0x11, 0.1)
+
+    assert frame1 == codec.Frame(0x11, 0x02, bytes([0x08, 0x00, 0x01]) + bytes(15))
+    assert frame2 == codec.Frame(0x10, 0x03, bytes([0x41, 0x04, 0x72, 0x01, 0x02]))
+    assert base.read(0x11, 0.01) is None
+
+
+def test_read_ignores_irrelevant_message(mocker):
+    fake = FakeHidapi(None)
+    mocker.patch.object(base, "hidapi", fake)
+    fake.replies.put(bytes([0x10, 0x03, 0x41]))
+
+    assert base.read(0x11, 0.1) is None
+
+
+def test_request_concurrent_replies_out_of_order(mocker):
+    fake = FakeHidapi(_echo, hold=2)
+    mocker.patch.object(base, "hidapi", fake)
+    results = {}
+
+    def do_request(number):
+        results[number] = base.request(0x77, number, 0x0510, long_message=True)
+
+    threads = [threading.Thread(target=do_request, args=(n,)) for n in (1, 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake.written) == 2
+    assert results[1][0] == 1
+    assert results[2][0] == 2
+
+
+def test_request_future_callback(mocker):
+    fake = FakeHidapi(_echo)
+    mocker.patch.object(base, "hidapi", fake)
+    done = []
+
+    pending1 = base.request_future(0x78, 3, 0x0510, long_message=True, callback=done.append)
+    pending2 = base.request_future(0x78, 3, 0x0520, long_message=True)
+    result2 = pending2.result()
+
+    assert pending1.done()
+    assert done == [pending1]
+    assert pending1.result()[0] == 3
+    assert result2[0] == 3
+
+
+def test_request_feature_error(mocker):
+    fake = FakeHidapi(lambda data: b"\x11" + data[1:2] + b"\xff" + data[2:4] + b"\x05" + bytes(14))
+    mocker.patch.object(base, "hidapi", fake)
+
+    with pytest.raises(exceptions.FeatureCallError):
+        base.request(0x79, 1, 0x0510, long_message=True)
+    assert stats.snapshot()["handles"]["121"]["devices"]["1"]["errors"] == {"FF": 1}
+
+
+def test_request_timeout_stats(mocker):
+    fake = FakeHidapi(lambda data: None)
+    mocker.patch.object(base, "hidapi", fake)
+    mocker.patch.object(base, "_DEVICE_REQUEST_TIMEOUT", 0.05)
+
+    assert base.request(0x7B, 2, 0x0510, long_message=True) is None
+    assert stats.snapshot()["handles"]["123"]["devices"]["2"]["timeouts"] == 1
+
+
+def test_request_fails_fast_when_asleep(mocker):
+    fake = FakeHidapi(lambda data: None)
+    mocker.patch.object(base, "hidapi", fake)
+    mocker.patch.object(base, "_DEVICE_REQUEST_TIMEOUT", 0.05)
+    for _i in range(3):
+        assert base.request(0x7C, 3, 0x0510, long_message=True) is None
+    assert timeouts.asleep(0x7C, 3)
+    mocker.patch.object(base, "_DEVICE_REQUEST_TIMEOUT", 4)
+    mocker.patch.object(timeouts, "ASLEEP_TIMEOUT", 0.02)
+
+    assert base.request_future(0x7C, 3, 0x0510, long_message=True).timeout == 0.02
+    base.close(0x7C)
+    assert not timeouts.asleep(0x7C, 3)
+
+
+def test_ping(mocker):
+    fake = FakeHidapi(lambda data: data[:4] + b"\x04\x02" + data[6:7])
+    mocker.patch.object(base, "hidapi", fake)
+
+    assert base.ping(0x7A, 1) == 4.2
+
+
+def test_requests_pipelined(mocker):  # replies are only sent after 4 requests, so waiting for each reply would time out
+    fake = FakeHidapi(lambda data: data[:5] + bytes(15), hold=4)
+    mocker.patch.object(base, "hidapi", fake)
+
+    replies = base.requests(0x7D, 1, [(0x0510, i) for i in range(12)], long_message=True)
+
+    assert [reply[0] for reply in replies] == list(range(12))
+    assert len(fake.written) == 12
+
+
+def test_requests_feature_error(mocker):
+    def answer(data):
+        if data[4] == 3:
+            return b"\x11" + data[1:2] + b"\xff" + data[2:4] + b"\x05" + bytes(14)
+        return data[:5] + bytes(15)
+
+    fake = FakeHidapi(answer)
+    mocker.patch.object(base, "hidapi", fake)
+
+    with pytest.raises(exceptions.FeatureCallError):
+        base.requests(0x7E, 1, [(0x0510, i) for i in range(6)], long_message=True)
+    assert len(fake.written) == 6
+    assert base.requests(0x7E, 1, [(0x0510, 1), (0x0510, 2)], long_message=True)[1][0] == 2
+
+
+def test_request_ignores_stale_reply(mocker):  # a late reply to an earlier request is drained before the new one is sent
+    fake = FakeHidapi(lambda data: data[:4] + b"\x04\x05\x06")
+    mocker.patch.object(base, "hidapi", fake)
+    fake.replies.put(b"\x10\xff\x81\x00\x01\x02\x03")
+
+    assert base.request(0x7F, 0xFF, 0x8100) == b"\x04\x05\x06"
+
+
+def test_skip_incoming_per_file_descriptor(mocker):  # threaded handles have one descriptor per thread
+    fake = FakeHidapi(None)
+    mocker.patch.object(base, "hidapi", fake)
+    fake.replies.put(b"\x10\x01\x81\x00\x01\x02\x03")
+
+    with base._demultiplexer(0x70).reader(0x170):  # another thread is reading from its own descriptor
+        base._skip_incoming(0x70, 0x270, None)
+    assert fake.replies.empty()
+
+
+def test_request_future_abandoned(mocker):  # a request whose result is never asked for still times out
+    fake = FakeHidapi(lambda data: data[:4] + b"\x04\x05\x06" if len(fake.written) > 1 else None)
+    mocker.patch.object(base, "hidapi", fake)
+    mocker.patch.object(base, "_DEVICE_REQUEST_TIMEOUT", 0.05)
+    done = []
+
+    abandoned = base.request_future(0x71, 1, 0x8100, callback=done.append)
+    assert base.request(0x71, 1, 0x8100) == b"\x04\x05\x06"
+    assert done == [abandoned]
+    assert abandoned.result() is None
+    assert stats.snapshot()["handles"]["113"]["devices"]["1"]["timeouts"] == 1
+
+
+def test_request_ignores_stale_reply_while_another_thread_reads(mocker):
+    fake = FakeHidapi(lambda data: data[:4] + b"\x04\x05\x06")
+    mocker.patch.object(base, "hidapi", fake)
+    fake.replies.put(b"\x10\xff\x81\x00\x01\x02\x03")  # a late reply to an earlier request
+    reader = base._demultiplexer(0x6F).reader(0x6F)
+    reader.acquire()  # another thread is reading, and hands over shortly
+    threading.Timer(0.02, reader.release).start()
+
+    assert base.request(0x6F, 0xFF, 0x8100) == b"\x04\x05\x06"
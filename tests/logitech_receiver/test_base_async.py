@@ -0,0 +1,81 @@
+import asyncio
+import os
+import platform
+import socket
+
+import pytest
+
+from logitech_receiver import base_async
+from logitech_receiver import exceptions
+
+pytestmark = pytest.mark.skipif(platform.system() != "Linux", reason="asyncio transport needs hidraw file descriptors")
+
+
+def _fake_device(loop, sock, answer):
+    """Answer each report written to the other end of sock."""
+
+    def on_readable():
+        data = sock.recv(64)
+        reply = answer(data)
+        if reply is not None:
+            sock.send(reply)
+
+    loop.add_reader(sock.fileno(), on_readable)
+
+
+def _echo(data):
+    return data[:4] + bytes([data[1]]) + bytes(15)
+
+
+def _run(answer, coroutine_function):
+    async def main():
+        loop = asyncio.get_running_loop()
+        host, device = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        _fake_device(loop, device, answer)
+        handle = base_async.AsyncHandle(os.dup(host.fileno()), loop)
+        host.close()
+        try:
+            return await coroutine_function(handle)
+        finally:
+            handle.close()
+            loop.remove_reader(device.fileno())
+            device.close()
+
+    return asyncio.run(main())
+
+
+def test_request():
+    result = _run(_echo, lambda handle: handle.request(2, 0x0510, long_message=True))
+
+    assert result[0] == 2
+
+
+def test_concurrent_requests():
+    async def requests(handle):
+        return await asyncio.gather(*(handle.request(n, 0x0510, long_message=True) for n in (1, 2, 3)))
+
+    results = _run(_echo, requests)
+
+    assert [r[0] for r in results] == [1, 2, 3]
+
+
+def test_request_feature_error():
+    def error(data):
+        return b"\x11" + data[1:2] + b"\xff" + data[2:4] + b"\x05" + bytes(14)
+
+    with pytest.raises(exceptions.FeatureCallError):
+        _run(error, lambda handle: handle.request(1, 0x0510, long_message=True))
+
+
+def test_ping():
+    result = _run(lambda data: data[:4] + b"\x04\x05" + data[6:7], lambda handle: handle.ping(1))
+
+    assert result == 4.5
+
+
+def test_request_timeout(mocker):
+    mocker.patch("logitech_receiver.base._DEVICE_REQUEST_TIMEOUT", 0.05)
+
+    result = _run(lambda data: None, lambda handle: handle.request(1, 0x0510, long_message=True))
+
+    assert result is None
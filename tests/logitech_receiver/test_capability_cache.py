@@ -0,0 +1,74 @@
+import pytest
+
+from logitech_receiver import capability_cache
+from logitech_receiver import common
+from logitech_receiver import model_cache
+from logitech_receiver import settings_templates
+from logitech_receiver.hidpp20_constants import FEATURE
+
+from . import fake_hidpp
+
+RATES = [
+    fake_hidpp.Response("33", 0x0C00),  # 1, 2, 5 and 6 ms
+    fake_hidpp.Response("01", 0x0C10),
+]
+
+
+@pytest.fixture
+def cache_file(mocker, tmp_path):
+    path = tmp_path / "solaar" / "models.json"
+    mocker.patch.object(model_cache, "_file_path", str(path))
+    mocker.patch.object(model_cache, "_cache", None)
+    return path
+
+
+def _device(responses, model_key="RATE/1"):
+    device = fake_hidpp.Device(responses=responses, feature=FEATURE.REPORT_RATE, offset=0x0C)
+    device.features.model_key = model_key
+    return device
+
+
+def test_replies_recorded_and_reused(cache_file, mocker):
+    setting = settings_templates.ReportRate.build(_device(RATES))
+    model_cache._cache = None  # as in a new process
+    device = _device([])
+    device.features[FEATURE.REPORT_RATE]
+    spy_request = mocker.spy(device, "request")
+
+    cached = settings_templates.ReportRate.build(device)
+
+    assert setting.choices == common.NamedInts(**{"1ms": 1, "2ms": 2, "5ms": 5, "6ms": 6})
+    assert cached.choices == setting.choices
+    assert cached._device is device
+    assert model_cache.get("RATE/1", "capabilities/report_rate") == {"806000": "33"}
+    spy_request.assert_not_called()
+
+
+def test_not_cached_without_model_key(cache_file):
+    setting = settings_templates.ReportRate.build(_device(RATES, None))
+
+    assert len(setting.choices) == 4
+    assert not cache_file.exists()
+
+
+def test_not_cached_when_a_request_fails(cache_file):
+    device = _device(RATES)
+
+    result = capability_cache.build(
+        device, "test", lambda d: (d.feature_request(FEATURE.REPORT_RATE), d.feature_request(FEATURE.REPORT_RATE, 0x30))
+    )
+
+    assert result == (b"\x33", None)
+    assert model_cache.get("RATE/1", "capabilities/test") is None
+
+
+def test_requests_passed_on_after_build(cache_file, mocker):
+    device = _device(RATES)
+    capability_cache.build(device, "test", lambda d: d.feature_request(FEATURE.REPORT_RATE))
+    spy_request = mocker.spy(device, "request")
+
+    kept = capability_cache.build(device, "test", lambda d: d)
+
+    assert kept.feature_request(FEATURE.REPORT_RATE) == b"\x33"
+    assert kept.online
+    spy_request.assert_called_once()
@@ -0,0 +1,85 @@
+import struct
+
+import pytest
+
+from logitech_receiver import codec
+
+
+@pytest.mark.parametrize(
+    "devnumber, data, long_message, expected",
+    [
+        (0xFF, b"\x81\x00", False, b"\x10\xff\x81\x00\x00\x00\x00"),
+        (0x01, b"\x00\x1a\x01\x02\x03", False, b"\x10\x01\x00\x1a\x01\x02\x03"),
+        (0x01, b"\x00\x1a", True, b"\x11\x01\x00\x1a" + bytes(16)),
+        (0x02, b"\x00\x1a\x01\x02\x03\x04", False, b"\x11\x02\x00\x1a\x01\x02\x03\x04" + bytes(12)),
+        (0xFF, b"\x82\xb5", False, b"\x11\xff\x82\xb5" + bytes(16)),
+    ],
+)
+def test_encode_message(devnumber, data, long_message, expected):
+    assert codec.encode_message(devnumber, data, long_message) == expected
+
+
+def test_encode_dj():
+    result = codec.encode(codec.DJ_MESSAGE_ID, 0x01, b"\x42\x01")
+
+    assert result == b"\x20\x01\x42\x01" + bytes(11)
+    assert len(result) == codec.MEDIUM_MESSAGE_SIZE
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ((), b""),
+        ((0x01, 0x02), b"\x01\x02"),
+        ((0x01, b"\x02\x03", 0xFF), b"\x01\x02\x03\xff"),
+    ],
+)
+def test_pack_params(params, expected):
+    assert codec.pack_params(params) == expected
+
+
+@pytest.mark.parametrize("params", [(0x100,), (b"\x01", 0x100)])
+def test_pack_params_out_of_range(params):
+    with pytest.raises((ValueError, struct.error)):
+        codec.pack_params(params)
+
+
+def test_encode_request_and_ping():
+    assert codec.encode_request(0x0A1B, b"\x01") == b"\x0a\x1b\x01"
+    assert codec.encode_ping(0x0013, 0xAA) == b"\x00\x13\x00\x00\xaa"
+
+
+@pytest.mark.parametrize(
+    "data, relevant",
+    [
+        (b"\x10\x01\x00\x1a\x01\x02\x03", True),
+        (b"\x11\x01" + bytes(18), True),
+        (b"\x20\x01" + bytes(13), True),
+        (b"\x21\x01" + bytes(30), True),
+        (b"\x10\x01\x00\x1a", False),
+        (b"\x02\x01\x00\x1a\x01\x02\x03", False),
+    ],
+)
+def test_is_relevant(data, relevant):
+    assert codec.is_relevant(data) is relevant
+    assert codec.is_relevant(memoryview(data)) is relevant
+
+
+def test_decode():
+    packet = memoryview(bytearray(b"\x10\x02\x8f\x00\x1a\x05\x00"))
+
+    frame = codec.decode(packet)
+    packet[2] = 0  # the frame holds a copy of the payload
+
+    assert frame == codec.Frame(0x10, 0x02, b"\x8f\x00\x1a\x05\x00")
+    assert frame.sub_id == 0x8F
+    assert frame.is_error
+    assert frame.reply_key == b"\x00\x1a"
+    assert frame.encode() == b"\x10\x02\x8f\x00\x1a\x05\x00"
+    report_id, devnumber, data = frame
+    assert (report_id, devnumber, data) == (0x10, 0x02, b"\x8f\x00\x1a\x05\x00")
+
+
+def test_reply_key():
+    assert codec.reply_key(b"\x05\x1a\x01\x02") == b"\x05\x1a"
+    assert codec.reply_key(b"\xff\x05\x1a\x02") == b"\x05\x1a"
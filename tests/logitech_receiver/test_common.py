@@ -1,8 +1,9 @@
 import pytest
-import yaml
 
 from logitech_receiver import common
 
+yaml = common.yaml_module()
+
 
 def test_crc16():
     value = b"123456789"
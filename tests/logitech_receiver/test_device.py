@@ -14,6 +14,8 @@
 ## with this program; if not, write to the Free Software Foundation, Inc.,
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import time
+
 from dataclasses import dataclass
 from functools import partial
 from typing import Optional
@@ -23,6 +25,8 @@ import pytest
 from logitech_receiver import common
 from logitech_receiver import device
 from logitech_receiver import hidpp20
+from logitech_receiver import hidpp20_constants
+from logitech_receiver import settings_detection
 
 from . import fake_hidpp
 
@@ -41,6 +45,9 @@ class LowLevelInterfaceFake:
         func = partial(fake_hidpp.request, self.responses)
         return func(response, *args, **kwargs)
 
+    def requests(self, handle, devnumber, calls, **kwargs):
+        return [self.request(handle, devnumber, *call, **kwargs) for call in calls]
+
     def ping(self, response, *args, **kwargs):
         func = partial(fake_hidpp.ping, self.responses)
         return func(response, *args, **kwargs)
@@ -324,6 +331,51 @@ def test_device_settings(device_info, responses, protocol, p, persister, setting
     assert len(test_device.settings) == settings
 
 
+@pytest.mark.parametrize(
+    "device_info, responses, protocol, p, settings, detected",
+    [
+        (di_C318, fake_hidpp.r_keyboard_1, 1.0, {"n": "n"}, 1, False),
+        (di_B530, fake_hidpp.r_keyboard_2, 4.5, {"m": "m"}, 1, True),
+        (di_C068, fake_hidpp.r_mouse_1, 1.0, {"o": "o"}, 2, False),
+    ],
+)
+def test_device_detect_settings(device_info, responses, protocol, p, settings, detected, mocker):
+    mocker.patch("solaar.configuration.persister", return_value=p)
+    test_device = FakeDevice(responses, None, None, True, device_info=device_info)
+    test_device._name = "TestDevice"
+    test_device._protocol = protocol
+    found = []
+
+    assert test_device.detected_settings == []
+    assert not test_device.settings_detected
+    assert test_device.detect_settings(found.append) == found
+    assert len(found) == settings
+    assert test_device.detected_settings == found
+    assert test_device.settings_detected == detected
+    assert test_device.settings is test_device.detect_settings(found.append)
+    assert len(found) == settings
+
+
+def test_device_detect_settings_behind_another_detection(mocker):
+    mocker.patch("solaar.configuration.persister", return_value={"n": "n"})
+    test_device = FakeDevice(fake_hidpp.r_keyboard_1, None, None, True, device_info=di_C318)
+    test_device._name = "TestDevice"
+    test_device._protocol = 1.0
+    found = []
+
+    with test_device._settings_lock:  # another detection, e.g. by the listener applying the settings
+        future = settings_detection.schedule(test_device, found.append)
+        while not future.running():
+            time.sleep(0.001)
+        test_device._settings = ["setting"]
+        test_device._feature_settings_checked = True
+
+    assert future.result(1) == ["setting"]
+    assert found == []  # so the settings have to be taken from the device once detection is done
+    assert test_device.detected_settings == ["setting"]
+    settings_detection.shutdown()
+
+
 @pytest.mark.parametrize(
     "device_info, responses, protocol, battery, changed",
     [
@@ -353,3 +405,30 @@ def test_device_battery(device_info, responses, protocol, battery, changed, mock
     assert test_device.battery() == battery
     test_device.read_battery()
     spy_changed.assert_called_with(**changed)
+
+
+@pytest.mark.parametrize(
+    "features, epochs",
+    [
+        (None, [1, 1, 2, 3]),
+        ({hidpp20_constants.FEATURE.BATTERY_STATUS}, [1, 1, 2, 3]),
+        ({hidpp20_constants.FEATURE.WIRELESS_DEVICE_STATUS}, [1, 1, 1, 2]),
+    ],
+)
+def test_device_settings_epoch(features, epochs, mocker):
+    spy_apply = mocker.patch("logitech_receiver.settings.apply_all_settings")
+    test_device = FakeDevice(fake_hidpp.r_empty, None, None, online=True, device_info=di_CCCC)
+    test_device._protocol = 2.0
+    test_device.features = features
+    mocker.patch.object(test_device, "set_configuration")
+    mocker.patch.object(test_device, "read_battery")
+    test_device.settings_shadow.record("fn-swap", True)
+
+    seen = []
+    for change in [{"active": True}, {"active": False}, {"active": True}, {"active": True, "push": True}]:
+        test_device.changed(**change)
+        seen.append(test_device.settings_shadow.epoch)
+
+    assert seen == epochs
+    assert spy_apply.call_count == 3
+    assert test_device.settings_shadow.get("fn-swap") is None
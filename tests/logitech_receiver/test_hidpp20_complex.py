@@ -15,7 +15,6 @@
 ## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
 import pytest
-import yaml
 
 from logitech_receiver import common
 from logitech_receiver import exceptions
@@ -26,6 +25,7 @@ from logitech_receiver import special_keys
 from . import fake_hidpp
 
 _hidpp20 = hidpp20.Hidpp20()
+yaml = common.yaml_module()
 
 device_offline = fake_hidpp.Device("REGISTERS", False)
 device_registers = fake_hidpp.Device("OFFLINE", True, 1.0)
@@ -115,6 +115,33 @@ def test_FeaturesArray_enumerate(device, expected_result):
     assert result == expected_result
 
 
+def test_FeaturesArray_discover(mocker):
+    device = fake_hidpp.Device(
+        "DISCOVER",
+        True,
+        4.5,
+        [
+            fake_hidpp.Response("010001", 0x0000, "0001"),  # feature set at 0x01
+            fake_hidpp.Response("03", 0x0100),  # 3 features
+            fake_hidpp.Response("00010001", 0x0110, "01"),
+            fake_hidpp.Response("00030002", 0x0110, "02"),
+            fake_hidpp.Response("10000001", 0x0110, "03"),
+        ],
+    )
+    spy_requests = mocker.spy(device, "requests")
+    featuresarray = hidpp20.FeaturesArray(device)
+
+    assert featuresarray.discover()
+    spy_requests.assert_called_once_with([(0x0110, 2), (0x0110, 3)])
+    spy_request = mocker.spy(device, "request")
+    assert featuresarray.complete
+    assert featuresarray[hidpp20_constants.FEATURE.BATTERY_STATUS] == 3
+    assert featuresarray.get_feature_version(hidpp20_constants.FEATURE.DEVICE_FW_VERSION) == 2
+    assert hidpp20_constants.FEATURE.REPROG_CONTROLS_V4 not in featuresarray
+    assert featuresarray.discover()
+    assert spy_request.call_count == 0
+
+
 def test_FeaturesArray_setitem():
     featuresarray = hidpp20.FeaturesArray(device_standard)
 
@@ -873,3 +900,23 @@ def test_OnboardProfiles_device(responses, name, count, buttons, gbuttons, secto
     assert len(profiles.profiles) == count
 
     assert yaml.safe_load(yaml.dump(profiles)).to_bytes().hex() == profiles.to_bytes().hex()
+
+
+def test_KeysArrayV4_set_cid_reporting(mocker):
+    responses = fake_hidpp.responses_key + [fake_hidpp.Response(r, 0x530, r) for r in ["0052000051", "0053020000"]]
+    device = fake_hidpp.Device("KEY", responses=responses, feature=hidpp20_constants.FEATURE.REPROG_CONTROLS_V4, offset=5)
+    device._keys = _hidpp20.get_keys(device)
+    device._keys._ensure_all_keys_queried()
+    spy_requests = mocker.spy(device, "requests")
+
+    replies = device.keys.set_cid_reporting(
+        [
+            (0x52, None, 0x51),
+            (0x56, None, 0x99),  # not remappable to that
+            (0x53, {special_keys.MAPPING_FLAG.diverted: False}, 0),
+        ]
+    )
+
+    assert replies == [bytes.fromhex("0052000051"), None, bytes.fromhex("0053020000")]
+    spy_requests.assert_called_once_with([(0x0530, 0x00, 0x52, 0x00, 0x00, 0x51), (0x0530, 0x00, 0x53, 0x02, 0x00, 0x00)])
+    assert device.keys[device.keys.index(0x52)].mapped_to == 0x51
@@ -0,0 +1,149 @@
+import socket
+import threading
+
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+
+from logitech_receiver import listener
+from logitech_receiver import notification_ring
+from logitech_receiver import timeouts
+from logitech_receiver.base import HIDPPNotification
+from logitech_receiver.hidpp20_constants import FEATURE
+
+
+@dataclass
+class FakeReceiver:
+    handle: Any
+    path: str = "/dev/hidraw99"
+    name: str = "fake"
+    isDevice: bool = False
+    closed: bool = False
+
+    def close(self):
+        self.closed = True
+        self.handle.close()
+
+
+class RecordingListener(listener.EventsListener):
+    def __init__(self, receiver):
+        super().__init__(receiver, self._callback)
+        self.notifications = []
+        self.threads = set()
+        self.received = threading.Event()
+        self.stopped_called = False
+
+    def _callback(self, n):
+        self.notifications.append(n)
+        self.threads.add(threading.current_thread())
+        self.received.set()
+
+    def has_stopped(self):
+        self.stopped_called = True
+
+
+@pytest.fixture
+def receivers():
+    pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _i in range(3)]
+    yield [(FakeReceiver(host.detach(), path=f"/dev/hidraw9{i}"), device) for i, (host, device) in enumerate(pairs)]
+    for _host, device in pairs:
+        device.close()
+
+
+def test_listeners_share_the_events_threads(receivers):
+    listeners = [RecordingListener(receiver) for receiver, _device in receivers]
+    for rl in listeners:
+        rl.start()
+
+    for (_receiver, device), rl in zip(receivers, listeners):
+        device.send(bytes([0x10, 0x01, 0x41, 0x04, 0x01, 0x02, 0x03]))
+        assert rl.received.wait(2)
+
+    assert sum(isinstance(t, listener._EventsLoop) for t in threading.enumerate()) == 1
+    assert len(set().union(*(rl.threads for rl in listeners))) <= listener._WORKERS
+    assert all(not t.name.startswith(listener.EventsListener.__name__) for t in threading.enumerate())
+    assert all(rl.notifications[0].sub_id == 0x41 for rl in listeners)
+
+    for rl in listeners:
+        rl.stop()
+    for rl in listeners:
+        rl.join(2)
+        assert rl.stopped_called
+        assert not rl.is_alive()
+
+
+def test_slow_listener_does_not_block_others(receivers):
+    release = threading.Event()
+    slow = RecordingListener(receivers[0][0])
+    slow._notifications_callback = lambda n: release.wait(5)
+    fast = RecordingListener(receivers[1][0])
+    slow.start()
+    fast.start()
+
+    receivers[0][1].send(bytes([0x10, 0x01, 0x41, 0x04, 0x01, 0x02, 0x03]))
+    receivers[1][1].send(bytes([0x10, 0x01, 0x41, 0x04, 0x01, 0x02, 0x03]))
+    assert fast.received.wait(2)
+
+    release.set()
+    for rl in (slow, fast):
+        rl.stop()
+        rl.join(2)
+        assert not rl.is_alive()
+
+
+def test_listener_disconnect(receivers):
+    receiver, device = receivers[0]
+    rl = RecordingListener(receiver)
+    rl.start()
+
+    device.close()
+    rl.join(2)
+
+    assert rl.stopped_called
+    assert receiver.closed
+
+
+def test_connection_notification_wakes_device(receivers):
+    receiver, _device = receivers[0]
+    rl = RecordingListener(receiver)
+    for _i in range(3):
+        timeouts.record_timeout(receiver.handle, 1)
+
+    rl._deliver(HIDPPNotification(0x10, 1, 0x41, 0x04, bytes([0x40, 0x01, 0x02])))  # link lost
+    assert timeouts.asleep(receiver.handle, 1)
+    rl._deliver(HIDPPNotification(0x10, 1, 0x41, 0x04, bytes([0x00, 0x01, 0x02])))  # link established
+
+    assert not timeouts.asleep(receiver.handle, 1)
+    assert timeouts.timeout(receiver.handle, 1, 4) == 4
+    timeouts.forget(receiver.handle)
+
+
+@dataclass
+class FakeFeatures:
+    inverse: dict
+
+
+@dataclass
+class FakeDevice:
+    features: Any
+
+
+@pytest.mark.parametrize(
+    "sub_id, address, kind",
+    [
+        (0x41, 0x04, notification_ring.KEEP),  # device connection
+        (0x05, 0x00, notification_ring.KEEP),  # diverted keys
+        (0x05, 0x10, notification_ring.MOTION),  # raw XY
+        (0x08, 0x00, notification_ring.LATEST),  # battery
+        (0x09, 0x00, notification_ring.OTHER),
+        (0x0A, 0x00, notification_ring.KEEP),  # feature not known yet
+    ],
+)
+def test_notification_kind(sub_id, address, kind):
+    features = FakeFeatures({0x05: FEATURE.REPROG_CONTROLS_V4, 0x08: FEATURE.BATTERY_STATUS, 0x09: FEATURE.HIRES_WHEEL})
+    receiver = FakeReceiver(None)
+    receiver._devices = {1: FakeDevice(features)}
+    rl = RecordingListener(receiver)
+
+    assert rl._notification_kind(HIDPPNotification(0x11, 1, sub_id, address, bytes(16))) == kind
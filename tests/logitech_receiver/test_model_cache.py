@@ -0,0 +1,187 @@
+import json
+
+import pytest
+
+from logitech_receiver import common
+from logitech_receiver import hidpp20
+from logitech_receiver import model_cache
+from logitech_receiver import special_keys
+from logitech_receiver.hidpp20_constants import FEATURE
+from logitech_receiver.hidpp20_constants import FIRMWARE_KIND
+from logitech_receiver.special_keys import CONTROL
+
+from . import fake_hidpp
+
+FIRMWARE = (common.FirmwareInfo(FIRMWARE_KIND.Firmware, "RQK", "12.00.B0012", None),)
+FEATURE_SET = [
+    fake_hidpp.Response("010001", 0x0000, "0001"),  # feature set at 0x01
+    fake_hidpp.Response("03", 0x0100),  # 3 features
+]
+TABLE = [
+    fake_hidpp.Response("00010001", 0x0110, "01"),  # feature set at 0x01
+    fake_hidpp.Response("00030002", 0x0110, "02"),  # device information at 0x02
+    fake_hidpp.Response("10000001", 0x0110, "03"),  # battery status at 0x03
+]
+
+
+@pytest.fixture
+def cache_file(mocker, tmp_path):
+    path = tmp_path / "solaar" / "models.json"
+    mocker.patch.object(model_cache, "_file_path", str(path))
+    mocker.patch.object(model_cache, "_cache", None)
+    return path
+
+
+def _device(responses, firmware=FIRMWARE):
+    device = fake_hidpp.Device("CACHED", True, 4.5, responses)
+    device.modelId = "B36300000000"
+    device.firmware = firmware
+    return device
+
+
+def test_reads_and_stores_table(cache_file):
+    features = hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE), cached=True)
+
+    assert features._check()
+    assert features.complete
+    assert features[FEATURE.BATTERY_STATUS] == 3
+    assert features.get_feature_version(FEATURE.DEVICE_FW_VERSION) == 2
+    model = json.loads(cache_file.read_text())["models"]["B36300000000/0:RQK:12.00.B0012"]
+    assert model["features"] == {"count": 4, "features": [[0, 0, 0], [1, 1, 0], [3, 2, 2], [0x1000, 3, 1]]}
+
+
+def test_cached_table_needs_no_feature_requests(cache_file, mocker):
+    hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE), cached=True)._check()
+    model_cache._cache = None  # as in a new process
+    device = _device(FEATURE_SET)
+    spy_request = mocker.spy(device, "request")
+    features = hidpp20.FeaturesArray(device, cached=True)
+
+    assert FEATURE.BATTERY_STATUS in features
+    assert FEATURE.REPROG_CONTROLS_V4 not in features
+    assert features.get_feature(2) == FEATURE.DEVICE_FW_VERSION
+    assert features.get_feature_version(FEATURE.BATTERY_STATUS) == 1
+    assert list(features.enumerate())[-1] == (FEATURE.BATTERY_STATUS, 3)
+    assert spy_request.call_count == 2  # the index of FEATURE_SET and the number of features
+
+
+def test_table_not_used_when_count_differs(cache_file):
+    key = model_cache.model_key("B36300000000", FIRMWARE)
+    table = [[0, 0, 0], [1, 1, 0], [0x1B04, 2, 4], [3, 3, 2], [0x1000, 4, 1]]
+    model_cache.put(key, "features", {"count": 5, "features": table})
+
+    features = hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE), cached=True)
+
+    assert FEATURE.REPROG_CONTROLS_V4 not in features
+    assert features[FEATURE.BATTERY_STATUS] == 3
+    assert model_cache.get(key, "features")["count"] == 4
+
+
+def test_table_not_used_when_feature_set_moved(cache_file):
+    key = model_cache.model_key("B36300000000", FIRMWARE)
+    table = [[0, 0, 0], [1, 2, 0], [0x1B04, 1, 4], [0x1000, 3, 1]]
+    model_cache.put(key, "features", {"count": 4, "features": table})
+
+    features = hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE), cached=True)
+
+    assert FEATURE.REPROG_CONTROLS_V4 not in features
+    assert features.get_feature(2) == FEATURE.DEVICE_FW_VERSION
+
+
+def test_incomplete_table_not_stored(cache_file):
+    features = hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE[:2]), cached=True)
+
+    assert features._check()
+    assert not features.complete
+    assert not cache_file.exists()
+
+
+@pytest.mark.parametrize("model_id, firmware", [(None, FIRMWARE), ("B36300000000", ())])
+def test_no_key_without_model_and_firmware(model_id, firmware):
+    assert model_cache.model_key(model_id, firmware) is None
+
+
+def test_not_cached_by_default(cache_file):
+    features = hidpp20.FeaturesArray(_device(FEATURE_SET + TABLE))
+
+    assert features._check()
+    assert not features.complete
+    assert not cache_file.exists()
+
+
+def test_sections_of_a_model(cache_file):
+    model_cache.put("M/1", "features", {"count": 1})
+    model_cache.put("M/1", "keys", [[1]])
+    model_cache._cache = None
+
+    assert model_cache.get("M/1", "features") == {"count": 1}
+    assert model_cache.get("M/1", "keys") == [[1]]
+    assert model_cache.get("M/1", "other") is None
+    assert model_cache.get("M/2", "keys") is None
+
+
+def test_least_recently_stored_models_dropped(cache_file, mocker):
+    mocker.patch.object(model_cache, "_MAX_ENTRIES", 2)
+    model_cache.put("M/1", "keys", [])
+    model_cache.put("M/2", "keys", [])
+    model_cache.put("M/1", "features", {})
+    model_cache.put("M/3", "keys", [])
+
+    assert model_cache.get("M/1", "keys") == []
+    assert model_cache.get("M/2", "keys") is None
+
+
+def _key_device(model_key):
+    device = fake_hidpp.Device("KEY", responses=fake_hidpp.responses_key, feature=FEATURE.REPROG_CONTROLS_V4, offset=5)
+    device.features.model_key = model_key
+    return device
+
+
+def test_keys_read_once_per_model(cache_file, mocker):
+    keys = hidpp20.KeysArrayV4(_key_device("KEY/1"), 8)
+    keys._ensure_all_keys_queried()
+    model_cache._cache = None  # as in a new process
+    device = _key_device("KEY/1")
+    keys = hidpp20.KeysArrayV4(device, 8)
+    spy_request = mocker.spy(device, "request")
+
+    assert keys.index(CONTROL.Smart_Shift) == 6
+    assert keys[3].key == CONTROL.Back_Button
+    assert keys[2].group == 3
+    assert keys.cid_to_tid[0x00C4] == 0x009D
+    assert keys.group_cids[special_keys.CID_GROUP[3]] == [0x0052, 0x00C3, 0x00C4]
+    spy_request.assert_not_called()
+
+
+def test_keys_not_cached_without_model_key(cache_file):
+    keys = hidpp20.KeysArrayV4(_key_device(None), 8)
+    keys._ensure_all_keys_queried()
+
+    assert keys.index(CONTROL.Virtual_Gesture_Button) == 7
+    assert not cache_file.exists()
+
+
+def test_keys_not_used_when_count_differs(cache_file, mocker):
+    model_cache.put("KEY/1", "REPROG_CONTROLS_V4", [[0x0050, 0x0038, 0x0001, 1, 1, 4]])
+    device = _key_device("KEY/1")
+    keys = hidpp20.KeysArrayV4(device, 8)
+    spy_request = mocker.spy(device, "request")
+
+    assert keys.index(CONTROL.Virtual_Gesture_Button) == 7
+    assert spy_request.call_count == 8
+    assert len(model_cache.get("KEY/1", "REPROG_CONTROLS_V4")) == 8
+
+
+def test_keys_index_without_query(cache_file, mocker):
+    device = _key_device(None)
+    keys = hidpp20.KeysArrayV4(device, 8)
+    spy_request = mocker.spy(device, "request")
+
+    keys[1]
+
+    assert keys.index(CONTROL.Right_Button) == 1
+    assert spy_request.call_count == 1
+    assert keys.index(CONTROL.Back_Button) == 3
+    assert spy_request.call_count == 8
+    assert keys.index(CONTROL.Next) is None
+    assert spy_request.call_count == 8
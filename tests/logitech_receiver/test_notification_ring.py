@@ -0,0 +1,108 @@
+import struct
+
+from logitech_receiver import notification_ring
+from logitech_receiver.base import HIDPPNotification
+
+
+def _kind(n):  # as for a device with reprogrammable keys at index 5 and battery status at index 8
+    if n.sub_id == 0x05 and n.address == 0x10:
+        return notification_ring.MOTION
+    if n.sub_id == 0x08:
+        return notification_ring.LATEST
+    if n.sub_id == 0x05:
+        return notification_ring.KEEP
+    return notification_ring.OTHER
+
+
+def _raw_xy(dx, dy, devnumber=1):
+    return HIDPPNotification(0x11, devnumber, 0x05, 0x10, struct.pack("!hh", dx, dy) + bytes(12))
+
+
+def _key(cid):
+    return HIDPPNotification(0x11, 1, 0x05, 0x00, struct.pack("!H", cid) + bytes(14))
+
+
+def _battery(level):
+    return HIDPPNotification(0x11, 1, 0x08, 0x00, bytes([level]) + bytes(15))
+
+
+def _other(n):
+    return HIDPPNotification(0x11, 1, 0x09, 0x00, bytes([n]) + bytes(15))
+
+
+def _drain(ring):
+    notifications = []
+    while not ring.empty():
+        notifications.append(ring.get())
+    return notifications
+
+
+def _deltas(n):
+    return struct.unpack("!hh", n.data[:4])
+
+
+def test_merges_successive_motion():
+    ring = notification_ring.NotificationRing(8, _kind)
+    for _i in range(10):
+        ring.put(_raw_xy(3, -2))
+    ring.put(_raw_xy(1, 1, devnumber=2))
+
+    queued = _drain(ring)
+
+    assert [_deltas(n) for n in queued] == [(30, -20), (1, 1)]
+    assert ring.coalesced == 9
+    assert ring.dropped == 0
+
+
+def test_does_not_merge_motion_across_keys():
+    ring = notification_ring.NotificationRing(8, _kind)
+    ring.put(_raw_xy(3, 0))
+    ring.put(_key(0xC4))
+    ring.put(_raw_xy(5, 0))
+
+    assert [(n.address, n.data[:2]) for n in _drain(ring)] == [(0x10, b"\x00\x03"), (0x00, b"\x00\xc4"), (0x10, b"\x00\x05")]
+
+
+def test_merged_motion_saturates():
+    merged = notification_ring.merge_motion(_raw_xy(0x7000, -0x7000), _raw_xy(0x7000, -0x7000))
+
+    assert _deltas(merged) == (0x7FFF, -0x8000)
+
+
+def test_keeps_latest_battery():
+    ring = notification_ring.NotificationRing(8, _kind)
+    ring.put(_battery(90))
+    ring.put(_key(0xC4))
+    ring.put(_battery(80))
+
+    assert _drain(ring) == [_key(0xC4), _battery(80)]
+    assert ring.coalesced == 1
+
+
+def test_never_drops_keys():
+    ring = notification_ring.NotificationRing(4, _kind)
+    ring.put(_raw_xy(1, 0))
+    ring.put(_other(1))
+    for cid in range(1, 9):
+        ring.put(_key(cid))
+
+    queued = _drain(ring)
+
+    assert [n.data[:2] for n in queued if n.sub_id == 0x05 and n.address == 0x00] == [
+        struct.pack("!H", c) for c in range(1, 9)
+    ]
+    assert ring.dropped == 2
+
+
+def test_drops_redundant_before_other():
+    dropped = []
+    ring = notification_ring.NotificationRing(3, _kind, on_dropped=dropped.append)
+    ring.put(_other(1))
+    ring.put(_raw_xy(1, 0))
+    ring.put(_other(2))
+    ring.put(_other(3))
+    ring.put(_other(4))
+
+    assert [n.data[0] for n in _drain(ring)] == [2, 3, 4]
+    assert dropped == [_raw_xy(1, 0), _other(1)]
+    assert ring.dropped == 2
@@ -26,6 +26,7 @@ import pytest
 from logitech_receiver import common
 from logitech_receiver import hidpp20
 from logitech_receiver import hidpp20_constants
+from logitech_receiver import settings
 from logitech_receiver import settings_templates
 from logitech_receiver import special_keys
 
@@ -811,6 +812,101 @@ def test_SpeedChange_action(responses, currentSpeed, newSpeed, mocker):
     assert device.persister["pointer_speed"] == newSpeed
 
 
+def _applied_setting(sclass, responses, persisted, **kwargs):
+    device = fake_hidpp.Device(responses=responses, feature=sclass.feature, **kwargs)
+    device.persister = {sclass.name: persisted}
+    device.settings_shadow = settings.SettingsShadow()
+    return device, settings_templates.check_feature(device, sclass)
+
+
+def _writes(spy_request, id):
+    return [c for c in spy_request.call_args_list if c[0][0] == id]
+
+
+def test_apply_only_writes_values_not_known_on_device(mocker):
+    responses = [fake_hidpp.Response("01", 0x0400), fake_hidpp.Response("00", 0x0410, "00")]
+    device, setting = _applied_setting(settings_templates.FnSwap, responses, False)
+    spy_request = mocker.spy(device, "request")
+
+    setting.apply()
+    setting.apply()
+    assert len(_writes(spy_request, 0x0410)) == 1
+    assert device.settings_shadow.get("fn-swap") is False
+
+    device.settings_shadow.new_epoch()
+    setting.apply()
+    assert len(_writes(spy_request, 0x0410)) == 2
+
+
+def test_apply_after_write_or_failed_write(mocker):
+    responses = [fake_hidpp.Response("01", 0x0400), fake_hidpp.Response("00", 0x0410, "00")]
+    device, setting = _applied_setting(settings_templates.FnSwap, responses, False)
+    setting.apply()
+
+    setting.write(True)  # fails, as there is no response
+    assert device.settings_shadow.get("fn-swap") is None
+    setting.apply()
+    assert device.settings_shadow.get("fn-swap") is None
+
+
+@pytest.mark.parametrize("persisted, writes", [(False, 1), (True, 0)])
+def test_apply_with_verify(persisted, writes, mocker):
+    responses = [fake_hidpp.Response("01", 0x0400), fake_hidpp.Response("00", 0x0410, "00")]
+    device, setting = _applied_setting(settings_templates.FnSwap, responses, persisted)
+    device.settings_shadow.record("fn-swap", persisted)
+    spy_request = mocker.spy(device, "request")
+
+    setting.apply(verify=True)
+
+    assert len(_writes(spy_request, 0x0400)) == 1
+    assert len(_writes(spy_request, 0x0410)) == writes
+    assert device.settings_shadow.get("fn-swap") == persisted
+
+
+def test_apply_map_only_writes_changed_keys(mocker):
+    responses = responses_reprog_controls + [fake_hidpp.Response("0051000051", 0x0530, "0051000051")]
+    persisted = {0x50: 0x50, 0x51: 0x51, 0xC4: 0xC4}
+    device, setting = _applied_setting(settings_templates.ReprogrammableKeys, responses, persisted, offset=0x05)
+    spy_request = mocker.spy(device, "request")
+
+    setting.apply(verify=True)  # the right button is mapped to left click on the device
+    setting.apply()
+
+    assert [c[0][1:] for c in _writes(spy_request, 0x0530)] == [(0x00, 0x51, 0x00, 0x00, 0x51)]
+    assert device.settings_shadow.get("reprogrammable-keys") == persisted
+
+
+def test_map_write_pipelined(mocker):
+    device = fake_hidpp.Device(
+        responses=responses_reprog_controls, feature=hidpp20_constants.FEATURE.REPROG_CONTROLS_V4, offset=5
+    )
+    setting = settings_templates.check_feature(device, settings_templates.ReprogrammableKeys)
+    setting.read(cached=False)
+    spy_requests = mocker.spy(device, "requests")
+
+    assert setting.write({0x50: 0x50, 0x51: 0x50, 0xC4: 0xC4}) == {0x50: 0x50, 0x51: 0x50, 0xC4: 0xC4}
+
+    spy_requests.assert_called_once_with(
+        [
+            (0x0530, 0x00, 0x50, 0x00, 0x00, 0x50),
+            (0x0530, 0x00, 0x51, 0x00, 0x00, 0x50),
+            (0x0530, 0x00, 0xC4, 0x00, 0x00, 0xC4),
+        ]
+    )
+
+
+def test_apply_all_settings_verify(mocker):
+    device = fake_hidpp.Device()
+    device.persister = {"_verify": True, "_sensitive": {"b": settings.SENSITIVITY_IGNORE}}
+    device.settings = [mocker.Mock(), mocker.Mock()]
+    device.settings[1].name = "b"
+
+    settings.apply_all_settings(device)
+
+    device.settings[0].apply.assert_called_once_with(True)
+    device.settings[1].apply.assert_not_called()
+
+
 @pytest.mark.parametrize("test", simple_tests + key_tests)
 def test_check_feature_settings(test, mocker):
     tst = test.test
@@ -823,6 +919,37 @@ def test_check_feature_settings(test, mocker):
     assert already_known
 
 
+def test_check_feature_settings_only_for_features_of_device(mocker):
+    responses = [
+        fake_hidpp.Response("010001", 0x0000, "0001"),  # feature set at 0x01
+        fake_hidpp.Response("04", 0x0100),  # 5 features
+        fake_hidpp.Response("00030002", 0x0110, "02"),  # device information at 0x02
+        fake_hidpp.Response("40A00000", 0x0110, "03"),  # fn inversion at 0x03
+        fake_hidpp.Response("10000001", 0x0110, "04"),  # battery status at 0x04
+    ]
+    device = fake_hidpp.Device("FN", True, 4.5, responses)
+    spy_check_feature = mocker.spy(settings_templates, "check_feature")
+
+    already_known = []
+    settings_templates.check_feature_settings(device, already_known)
+
+    assert [s.name for s in already_known] == ["fn-swap"]
+    assert [c.args[1] for c in spy_check_feature.call_args_list] == [settings_templates.FnSwap]
+    assert "_absent" not in device.persister
+
+
+def test_settings_registry():
+    classes = [s for s in settings_templates.SETTINGS if s.feature]
+
+    assert sorted(sum(settings_templates._SETTINGS_BY_FEATURE.values(), []), key=classes.index) == classes
+    assert settings_templates._SETTINGS_BY_NAME["fn-swap"] == [
+        settings_templates.FnSwap,
+        settings_templates.NewFnSwap,
+        settings_templates.K375sFnSwap,
+    ]
+    assert settings_templates._SETTINGS_BY_FEATURE[hidpp20_constants.FEATURE.BACKLIGHT2][0] == settings_templates.Backlight2
+
+
 @pytest.mark.parametrize(
     "test",
     [
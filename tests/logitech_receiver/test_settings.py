@@ -1,6 +1,9 @@
 import pytest
 
 from logitech_receiver import settings
+from logitech_receiver.hidpp20_constants import FEATURE
+
+from . import fake_hidpp
 
 
 @pytest.mark.parametrize(
@@ -23,3 +26,25 @@ def test_bool_or_toggle(current, new, expected):
     result = settings.bool_or_toggle(current=current, new=new)
 
     assert result == expected
+
+
+def test_feature_rw_write_many(mocker):
+    responses = [fake_hidpp.Response("01AA", 0x0410, "01AA"), fake_hidpp.Response("02BB", 0x0410, "02BB")]
+    device = fake_hidpp.Device(responses=responses, feature=FEATURE.BACKLIGHT2)
+    spy_requests = mocker.spy(device, "requests")
+
+    replies = settings.FeatureRW(FEATURE.BACKLIGHT2, prefix=b"\x01").write_many(device, [b"\xaa", b"\xcc"])
+
+    assert replies == [b"\x01\xaa", None]
+    spy_requests.assert_called_once_with([(0x0410, b"\x01\xaa"), (0x0410, b"\x01\xcc")])
+
+
+def test_feature_rw_map_write_many(mocker):
+    responses = [fake_hidpp.Response("01AA", 0x0410, "01AA"), fake_hidpp.Response("02BB", 0x0410, "02BB")]
+    device = fake_hidpp.Device(responses=responses, feature=FEATURE.BACKLIGHT2)
+    spy_requests = mocker.spy(device, "requests")
+
+    replies = settings.FeatureRWMap(FEATURE.BACKLIGHT2).write_many(device, [(1, b"\xaa"), (2, b"\xbb")])
+
+    assert replies == [b"\x01\xaa", b"\x02\xbb"]
+    spy_requests.assert_called_once_with([(0x0410, b"\x01", b"\xaa"), (0x0410, b"\x02", b"\xbb")])
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from logitech_receiver import settings_detection
+
+
+class _Device:
+    """Detects settings named after the device, waiting for start while detecting."""
+
+    def __init__(self, name, handle, start=None, receiver=None):
+        self.name = name
+        self.handle = handle
+        self.receiver = receiver
+        self.start = start
+        self.running = []  # shared between the devices of a test
+
+    def detect_settings(self, found=None):
+        self.running.append(self.name)
+        concurrent = len(self.running)
+        if self.start:
+            self.start.wait(1)
+        settings = [f"{self.name}-{i}" for i in range(2)]
+        for s in settings:
+            if found:
+                found(s)
+        self.running.remove(self.name)
+        return settings, concurrent
+
+
+@pytest.fixture(autouse=True)
+def pool():
+    yield
+    settings_detection.shutdown()
+
+
+def test_schedule_detects_settings():
+    found = []
+
+    settings, _concurrent = settings_detection.schedule(_Device("a", 0x11), found.append).result(1)
+
+    assert settings == ["a-0", "a-1"]
+    assert found == settings
+
+
+def test_devices_on_the_same_handle_one_after_another():
+    start = threading.Event()
+    devices = [_Device(name, 0x11, start) for name in "abc"]
+    for device in devices:
+        device.running = devices[0].running
+
+    futures = [settings_detection.schedule(device) for device in devices]
+    start.set()
+
+    assert [f.result(1) for f in futures] == [(["a-0", "a-1"], 1), (["b-0", "b-1"], 1), (["c-0", "c-1"], 1)]
+
+
+def test_devices_on_the_same_receiver_one_after_another():
+    start = threading.Event()
+    receiver = _Device("receiver", 0x11)
+    devices = [_Device(name, None, start, receiver) for name in "ab"]
+    devices[1].running = devices[0].running
+
+    futures = [settings_detection.schedule(device) for device in devices]
+    start.set()
+
+    assert [f.result(1) for f in futures] == [(["a-0", "a-1"], 1), (["b-0", "b-1"], 1)]
+
+
+def test_devices_on_different_handles_in_parallel():
+    start = threading.Barrier(2)  # only passed if both detections run at the same time
+    devices = [_Device("a", 0x11, start), _Device("b", 0x12, start)]
+
+    futures = [settings_detection.schedule(device) for device in devices]
+
+    assert [f.result(2)[0] for f in futures] == [["a-0", "a-1"], ["b-0", "b-1"]]
+    assert not start.broken
+
+
+def test_detection_error():
+    device = _Device("a", None)
+    device.detect_settings = lambda found: 1 / 0
+
+    with pytest.raises(ZeroDivisionError):
+        settings_detection.schedule(device).result(1)
+
+
+def test_shutdown_cancels_waiting_jobs():
+    start = threading.Event()
+    first = settings_detection.schedule(_Device("a", 0x11, start))
+    second = settings_detection.schedule(_Device("b", 0x11))
+
+    settings_detection.shutdown()
+    start.set()
+
+    assert first.result(1)[0] == ["a-0", "a-1"]
+    assert second.cancelled()
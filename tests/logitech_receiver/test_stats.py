@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from logitech_receiver import stats
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    stats.reset()
+    yield
+    stats.reset()
+
+
+def test_latency_histogram_percentiles():
+    histogram = stats.LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.add(ms / 1000)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 100
+    assert summary["min_ms"] == 1.0
+    assert summary["max_ms"] == 100.0
+    assert summary["mean_ms"] == 50.5
+    assert 50 <= summary["p50_ms"] <= 50 * 1.2
+    assert 95 <= summary["p95_ms"] <= 100
+    assert 99 <= summary["p99_ms"] <= 100
+
+
+def test_latency_histogram_empty():
+    assert stats.LatencyHistogram().summary() == {"count": 0}
+    assert stats.LatencyHistogram().percentile(0.5) is None
+
+
+def test_record_and_snapshot():
+    stats.record_open(7, "/dev/hidraw7")
+    stats.record_reply(7, 1, 0x0512, 0.010)
+    stats.record_reply(7, 1, 0x0522, 0.030, error=0xFF)
+    stats.record_reply(7, 1, 0x81F1, 0.002, error=0x8F)
+    stats.record_reply(7, 1, 0x0013, 0.020, ping=True)
+    stats.record_timeout(7, 1)
+    stats.record_packet(7)
+    stats.record_notification(7, 2)
+
+    snapshot = stats.snapshot()
+
+    handle = snapshot["handles"]["/dev/hidraw7"]
+    assert handle["packets"] == 1
+    device = handle["devices"]["1"]
+    assert device["requests"]["count"] == 3
+    assert device["pings"]["count"] == 1
+    assert device["timeouts"] == 1
+    assert device["errors"] == {"8F": 1, "FF": 1}
+    assert device["features"]["feature 05"]["count"] == 2
+    assert device["features"]["register 81F1"]["count"] == 1
+    assert handle["devices"]["2"]["notifications"]["count"] == 1
+    json.dumps(snapshot)
+
+
+def test_handle_with_path():
+    class Handle:
+        path = "/dev/hidraw3"
+
+        def __int__(self):
+            return 12
+
+    stats.record_timeout(Handle(), 0xFF)
+
+    assert stats.snapshot()["handles"]["/dev/hidraw3"]["devices"]["255"]["timeouts"] == 1
+
+
+def test_dump(tmp_path):
+    stats.record_reply(5, 1, 0x0512, 0.010)
+    path = tmp_path / "stats.json"
+
+    stats.dump(str(path))
+
+    assert json.loads(path.read_text())["handles"]["5"]["devices"]["1"]["requests"]["count"] == 1
+
+
+def test_notification_queue_counters():
+    stats.record_notification_coalesced(0x7A, 1)
+    stats.record_notification_coalesced(0x7A, 1)
+    stats.record_notification_dropped(0x7A, 1)
+
+    notifications = stats.snapshot()["handles"]["122"]["devices"]["1"]["notifications"]
+
+    assert notifications == {"count": 0, "per_second": None, "dropped": 1, "coalesced": 2}
@@ -0,0 +1,114 @@
+import pytest
+
+from logitech_receiver import timeouts
+
+
+@pytest.fixture(autouse=True)
+def clean_timeouts():
+    timeouts.reset()
+    yield
+    timeouts.reset()
+
+
+def test_timeout_without_estimate():
+    assert timeouts.timeout(0x11, 1, 4) == 4
+
+
+def test_timeout_needs_several_replies():
+    for _i in range(3):
+        timeouts.record_reply(0x11, 1, 0.010)
+    assert timeouts.timeout(0x11, 1, 4) == 4
+
+    timeouts.record_reply(0x11, 1, 0.010)
+    assert timeouts.timeout(0x11, 1, 4) == 1  # fast device, so the floor of a quarter of the fixed timeout
+
+
+def test_timeout_follows_slow_device():
+    for _i in range(20):
+        timeouts.record_reply(0x11, 1, 0.500)
+        timeouts.record_reply(0x11, 1, 0.700)
+
+    assert 1 < timeouts.timeout(0x11, 1, 4) < 2
+    assert timeouts.timeout(0x11, 1, 0.9) == 0.9  # never more than the fixed timeout
+
+
+def test_timeout_is_per_device():
+    for _i in range(4):
+        timeouts.record_reply(0x11, 1, 0.010)
+
+    assert timeouts.timeout(0x11, 2, 4) == 4
+    assert timeouts.timeout(0x12, 1, 4) == 4
+
+
+def test_timeout_after_timeouts():
+    for _i in range(4):
+        timeouts.record_reply(0x11, 1, 0.010)
+
+    timeouts.record_timeout(0x11, 1)
+    assert timeouts.timeout(0x11, 1, 4) == 4
+    assert not timeouts.asleep(0x11, 1)
+
+    timeouts.record_timeout(0x11, 1)
+    timeouts.record_timeout(0x11, 1)
+    assert timeouts.asleep(0x11, 1)
+    assert timeouts.timeout(0x11, 1, 4) == timeouts.ASLEEP_TIMEOUT
+    assert timeouts.timeout(0x11, 1, 0.1) == 0.1
+
+
+@pytest.mark.parametrize("wake", [lambda: timeouts.record_reply(0x11, 1, 0.010), lambda: timeouts.record_activity(0x11, 1)])
+def test_wake_up(wake):
+    for _i in range(3):
+        timeouts.record_timeout(0x11, 1)
+    assert timeouts.asleep(0x11, 1)
+
+    wake()
+
+    assert not timeouts.asleep(0x11, 1)
+    assert timeouts.timeout(0x11, 1, 4) == 4
+
+
+def test_forget():
+    for _i in range(3):
+        timeouts.record_timeout(0x11, 1)
+        timeouts.record_timeout(0x12, 1)
+
+    timeouts.forget(0x11)
+
+    assert not timeouts.asleep(0x11, 1)
+    assert timeouts.asleep(0x12, 1)
+
+
+class ThreadedHandle:  # has a different file descriptor on each thread, so must not be known by it
+    path = "/dev/hidraw5"
+
+    def __int__(self):
+        raise AssertionError("file descriptor used as key")
+
+
+def test_threaded_handle():
+    for _i in range(3):
+        timeouts.record_timeout(ThreadedHandle(), 1)
+    assert timeouts.asleep(ThreadedHandle(), 1)
+
+    timeouts.record_activity(ThreadedHandle(), 1)
+    assert not timeouts.asleep(ThreadedHandle(), 1)
+
+    for _i in range(3):
+        timeouts.record_timeout(ThreadedHandle(), 1)
+    timeouts.forget(ThreadedHandle())
+    assert not timeouts.asleep(ThreadedHandle(), 1)
+
+
+def test_connection_after_asleep():
+    for _i in range(4):
+        timeouts.record_reply(0x11, 1, 0.010)
+    for _i in range(3):
+        timeouts.record_timeout(0x11, 1)
+    assert timeouts.timeout(0x11, 1, 4) == timeouts.ASLEEP_TIMEOUT
+
+    timeouts.record_activity(0x11, 1, connected=True)
+
+    assert not timeouts.asleep(0x11, 1)
+    assert timeouts.timeout(0x11, 1, 4) == 4  # the first request after connecting waits the full timeout
+    timeouts.record_reply(0x11, 1, 0.010)
+    assert timeouts.timeout(0x11, 1, 4) == 1
@@ -0,0 +1,128 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from solaar import mainloop
+
+
+@pytest.fixture
+def loop():
+    return mainloop.PlainLoop()
+
+
+def test_idle_add(loop):
+    calls = []
+
+    loop.idle_add(calls.append, 1)
+    loop.idle_add(calls.append, 2)
+    loop.iteration(0)
+    loop.iteration(0)
+
+    assert calls == [1, 2]
+
+
+def test_callbacks_are_repeated_while_they_return_true(loop):
+    calls = []
+
+    def three_times():
+        calls.append(None)
+        return len(calls) < 3
+
+    loop.timeout_add(1, three_times)
+    for _ in range(5):
+        loop.iteration(0.1)
+
+    assert len(calls) == 3
+
+
+def test_timeout_add(loop):
+    calls = []
+    start = time.monotonic()
+
+    loop.timeout_add(50, calls.append, "late")
+    loop.idle_add(calls.append, "early")
+    while len(calls) < 2:
+        loop.iteration(1)
+
+    assert calls == ["early", "late"]
+    assert time.monotonic() - start >= 0.05
+
+
+def test_source_remove(loop):
+    calls = []
+
+    source_id = loop.timeout_add(10, calls.append, 1)
+    assert loop.source_remove(source_id)
+    loop.iteration(0.05)
+
+    assert calls == []
+    assert not loop.source_remove(source_id)
+
+
+def test_io_add_watch(loop):
+    read_fd, write_fd = os.pipe()
+    reader = os.fdopen(read_fd, "rb", buffering=0)
+    received = []
+
+    def on_input(channel, condition, tag):
+        received.append((channel.read(10), condition, tag))
+        return True
+
+    loop.io_add_watch(reader, loop.PRIORITY_LOW, loop.IO_IN, on_input, "tag")
+    os.write(write_fd, b"data")
+    loop.iteration(1)
+    os.close(write_fd)
+    reader.close()
+
+    assert received == [(b"data", loop.IO_IN, "tag")]
+
+
+def test_idle_add_from_another_thread_wakes_up_the_loop(loop):
+    calls = []
+
+    threading.Timer(0.05, loop.idle_add, (calls.append, 1)).start()
+    loop.iteration(5)
+    loop.iteration(0)
+
+    assert calls == [1]
+
+
+def test_run_and_quit(loop):
+    loop.timeout_add(10, loop.quit)
+
+    loop.run()
+
+
+def test_headless_does_not_import_gi():
+    code = (
+        "import sys\n"
+        "sys.modules['gi'] = None\n"  # importing gi fails
+        "from solaar import mainloop\n"
+        "mainloop.use_plain_loop()\n"
+        "from solaar import headless, listener\n"
+        "from logitech_receiver import diversion, settings_templates\n"
+        "assert mainloop.glib() is mainloop.use_plain_loop()\n"
+        "assert diversion.gkeymap is None\n"
+    )
+    lib = os.path.join(os.path.dirname(__file__), "..", "..", "lib")
+
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PYTHONPATH": lib})
+
+
+def test_unix_signal_add(loop):
+    calls = []
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        loop.unix_signal_add(loop.PRIORITY_DEFAULT, signal.SIGUSR2, lambda: calls.append(1) or True)
+        os.kill(os.getpid(), signal.SIGUSR2)
+        loop.iteration(0)
+        loop.iteration(0)
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+    assert calls == [1]
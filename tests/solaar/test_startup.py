@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+LIB = os.path.join(os.path.dirname(__file__), "..", "..", "lib")
+# modules that take long to import and that showing or configuring devices does not need
+HEAVY_MODULES = (
+    "gi",
+    "gi.repository.Gtk",
+    "yaml",
+    "evdev",
+    "Xlib",
+    "psutil",
+    "keysyms.keysymdef",
+    "hid_parser.data",
+    "logitech_receiver.diversion",
+    "logitech_receiver.desktop_notifications",
+)
+
+
+def _run(code):
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PYTHONPATH": LIB})
+
+
+@pytest.mark.parametrize("action", ["show", "config"])
+def test_startup_imports(action):
+    code = (
+        f"import sys, solaar.gtk, solaar.cli.{action}\n"
+        f"heavy = [module for module in {HEAVY_MODULES!r} if module in sys.modules]\n"
+        "assert heavy == [], heavy\n"
+    )
+
+    _run(code)
+
+
+def test_key_tables_built_when_used():
+    code = (
+        "import solaar.gtk, solaar.cli.show\n"
+        "from logitech_receiver import settings_templates, special_keys\n"
+        "assert 'KEYS' not in vars(special_keys)\n"
+        "assert settings_templates.PersistentRemappableAction.choices_universe is special_keys.KEYS\n"
+        "assert special_keys.KEYS_Default in special_keys.KEYS_KEYS_CONSUMER\n"
+    )
+
+    _run(code)
@@ -0,0 +1,31 @@
+import os
+import signal
+import threading
+
+from logitech_receiver import stats
+from solaar import mainloop
+from solaar import stats_export
+
+
+def test_export_on_request(mocker, tmp_path):
+    mocker.patch.object(stats_export, "_file_path", str(tmp_path / "solaar" / "stats.json"))
+    mocker.patch.object(stats_export, "_pid_path", str(tmp_path / "solaar" / "stats.pid"))
+    mocker.patch.object(stats_export, "_source_id", None)
+    loop = mainloop.PlainLoop()
+    mocker.patch.object(mainloop, "glib", return_value=loop)
+    previous = signal.getsignal(signal.SIGUSR1)
+    stats.record_timeout(0x55, 1)
+
+    assert stats_export.request() is None  # no Solaar running
+    stats_export.start()
+    assert not os.path.exists(stats_export._file_path)  # nothing written until asked for
+
+    mocker.patch.object(stats_export, "_running_pid", return_value=os.getpid())
+    thread = threading.Thread(target=loop.run, daemon=True)
+    thread.start()
+    try:
+        assert stats_export.request()["handles"]["85"]["devices"]["1"]["timeouts"] >= 1
+    finally:
+        loop.quit()
+        thread.join(1)
+        signal.signal(signal.SIGUSR1, previous)
@@ -0,0 +1,22 @@
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("gi")
+
+from solaar.ui import config_panel  # NOQA: E402
+
+
+@pytest.mark.parametrize("shown", [True, False])
+def test_detection_done_shows_settings_detected_elsewhere(shown, mocker):
+    device = mock.Mock(detected_settings=["a", "b"])
+    device_id = ("/dev/hidraw1", 1)
+    mocker.patch.object(config_panel, "_box", mock.Mock(_last_device=device_id if shown else None))
+    show_setting = mocker.patch.object(config_panel, "_show_setting")
+    config_panel._detecting[device_id] = mock.Mock()
+
+    config_panel._detection_done(device, device_id, True)
+
+    assert device_id not in config_panel._detecting
+    expected = [mock.call(device, device_id, s, True, read=False) for s in ("a", "b")] if shown else []
+    assert show_setting.call_args_list == expected